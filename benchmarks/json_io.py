@@ -0,0 +1,144 @@
+"""
+Чтение и запись больших JSON-файлов данных: прежний формат против потокового.
+
+    python benchmarks/json_io.py                         # 10k, 100k, 1M записей
+    python benchmarks/json_io.py --sizes 10000,100000
+
+Записи похожи на portfolios.json. Файлы пишутся во временный каталог.
+Режимы:
+- pretty        — json.dump(indent=2) / json.load всего документа (JSON_IO_MODE="pretty")
+- stream/json   — компактная запись по строке на запись, чтение потоком (без orjson)
+- stream/orjson — то же с orjson (если установлен)
+Память — пик tracemalloc при чтении (отдельный проход).
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+# запуск как `python benchmarks/<name>.py` без установки пакета: корень репозитория в sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from valutatrade_hub.infra import jsonio  # noqa: E402
+
+
+def make_records(n: int) -> Iterator[dict[str, Any]]:
+    for uid in range(1, n + 1):
+        yield {
+            "user_id": uid,
+            "wallets": {
+                "USD": {"balance": uid * 1.5},
+                "BTC": {"balance": uid / 1e6},
+                "EUR": {"balance": 10.0},
+            },
+            "version": uid % 7,
+        }
+
+
+@contextmanager
+def without_orjson() -> Iterator[None]:
+    saved = jsonio.orjson
+    jsonio.orjson = None  # type: ignore[assignment]
+    try:
+        yield
+    finally:
+        jsonio.orjson = saved
+
+
+def timed(fn: Callable[[], Any]) -> tuple[float, Any]:
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+def peak_mib(fn: Callable[[], Any]) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20
+
+
+def write_pretty(path: str, n: int) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(list(make_records(n)), f, ensure_ascii=False, indent=2)
+
+
+def write_stream(path: str, n: int) -> None:
+    with jsonio.atomic_writer(path) as f:
+        jsonio.write_array(f, make_records(n))
+
+
+def read_full_json(path: str) -> int:
+    with open(path, encoding="utf-8") as f:
+        return len(json.load(f))
+
+
+def read_full_fast(path: str) -> int:
+    with open(path, "rb") as f:
+        return len(jsonio.loads(f.read()))
+
+
+def read_stream(path: str) -> int:
+    return sum(1 for _ in jsonio.iter_array(path))
+
+
+def find_last(path: str, n: int) -> bool:
+    # как поиск пользователя при входе: худший случай — запись в самом конце
+    return any(r["user_id"] == n for r in jsonio.iter_array(path))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк JSON-хранилища")
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    args = parser.parse_args()
+    sizes = [int(x) for x in args.sizes.split(",") if x]
+    has_orjson = jsonio.orjson is not None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pretty, compact = os.path.join(tmp, "pretty.json"), os.path.join(tmp, "compact.json")
+        for n in sizes:
+            print(f"--- {n} records")
+
+            # n, pretty и compact привязаны аргументами по умолчанию (B023)
+            t_pretty, _ = timed(lambda n=n: write_pretty(pretty, n))
+            with without_orjson():
+                t_stream_json, _ = timed(lambda n=n: write_stream(compact, n))
+            line = f"write: pretty {t_pretty:.2f}s, stream/json {t_stream_json:.2f}s"
+            if has_orjson:
+                t_stream_or, _ = timed(lambda n=n: write_stream(compact, n))
+                line += f", stream/orjson {t_stream_or:.2f}s"
+            print(line)
+            print(
+                f"size:  pretty {os.path.getsize(pretty) / 2**20:.1f} MiB, "
+                f"compact {os.path.getsize(compact) / 2**20:.1f} MiB"
+            )
+
+            t_load, _ = timed(lambda: read_full_json(pretty))
+            t_iter, _ = timed(lambda: read_stream(compact))
+            t_find, _ = timed(lambda n=n: find_last(compact, n))
+            line = (
+                f"read:  json.load {t_load:.2f}s, stream {t_iter:.2f}s, "
+                f"stream find-last {t_find:.2f}s"
+            )
+            if has_orjson:
+                t_or, _ = timed(lambda: read_full_fast(compact))
+                line += f", orjson.loads {t_or:.2f}s"
+            print(line)
+
+            print(
+                f"peak:  json.load {peak_mib(lambda: read_full_json(pretty)):.1f} MiB, "
+                f"stream {peak_mib(lambda: read_stream(compact)):.1f} MiB"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Загрузка портфелей в доменные модели: время и память.
+
+    python benchmarks/models.py                      # 100 000 пользователей × 5 кошельков
+    python benchmarks/models.py --users 1000000 --wallets 3
+
+Данные генерируются в памяти (как их вернул бы load_portfolios),
+хранилище не трогается. Память — пик tracemalloc на построение списка Portfolio.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any
+
+# запуск как `python benchmarks/<name>.py` без установки пакета: корень репозитория в sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from valutatrade_hub.core.models import Portfolio  # noqa: E402
+
+CODES = ["USD", "EUR", "GBP", "RUB", "JPY", "CNY", "BTC", "ETH", "SOL", "ADA"]
+
+
+def make_records(users: int, wallets: int, seed: int = 1) -> list[dict[str, Any]]:
+    rnd = random.Random(seed)
+    return [
+        {
+            "user_id": uid,
+            # коды — новые строки, как после json.loads
+            "wallets": {
+                "".join(c): {"balance": rnd.random() * 1000} for c in rnd.sample(CODES, wallets)
+            },
+            "version": 1,
+        }
+        for uid in range(1, users + 1)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк Portfolio.from_json / to_json")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--wallets", type=int, default=5)
+    args = parser.parse_args()
+
+    records = make_records(args.users, min(args.wallets, len(CODES)))
+    gc.collect()
+
+    # время и память меряются разными проходами: tracemalloc сильно замедляет аллокации
+    tracemalloc.start()
+    portfolios = [Portfolio.from_json(r) for r in records]
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del portfolios
+    gc.collect()
+
+    t0 = time.perf_counter()
+    portfolios = [Portfolio.from_json(r) for r in records]
+    load_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for p in portfolios:
+        for code in CODES[:3]:
+            p.get_wallet(code)
+        len(p.wallets)
+    access_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for p in portfolios:
+        p.to_json()
+    dump_s = time.perf_counter() - t0
+
+    n = len(portfolios)
+    print(f"portfolios={n} wallets/portfolio={args.wallets}")
+    print(
+        f"from_json: {load_s:.3f}s ({load_s / n * 1e6:.2f} us/portfolio), "
+        f"peak memory {peak / 2**20:.1f} MiB"
+    )
+    print(f"get_wallet×3 + wallets: {access_s:.3f}s")
+    print(f"to_json: {dump_s:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Пополнения/списания кошелька: целочисленные балансы против float.
+
+    python benchmarks/money.py                 # 1 000 000 операций
+    python benchmarks/money.py --ops 5000000 --amount 0.1 --code BTC
+
+FloatWallet повторяет прежний Wallet (баланс — float через setter с проверками),
+Wallet — текущий (минимальные единицы, целочисленная арифметика).
+Скорость — лучшая из трёх попыток; кроме неё печатается накопленная ошибка
+после --ops пополнений на --amount.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from decimal import Decimal
+
+# запуск как `python benchmarks/<name>.py` без установки пакета: корень репозитория в sys.path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from valutatrade_hub.core.models import Wallet  # noqa: E402
+from valutatrade_hub.core.utils import validate_amount  # noqa: E402
+
+
+class FloatWallet:
+    __slots__ = ("currency_code", "_balance")
+
+    def __init__(self, currency_code: str, balance: float = 0.0) -> None:
+        self.currency_code = currency_code
+        self.balance = balance
+
+    @property
+    def balance(self) -> float:
+        return self._balance
+
+    @balance.setter
+    def balance(self, value: float) -> None:
+        if not isinstance(value, (int, float)):
+            raise TypeError("balance must be a number")
+        if float(value) < 0:
+            raise ValueError("balance cannot be negative")
+        self._balance = float(value)
+
+    def deposit(self, amount: float) -> None:
+        validate_amount(amount)
+        self.balance = self.balance + float(amount)
+
+    def withdraw(self, amount: float) -> None:
+        validate_amount(amount)
+        if amount > self.balance:
+            raise ValueError("insufficient funds")
+        self.balance = self.balance - float(amount)
+
+
+def throughput(wallet: Wallet | FloatWallet, ops: int, amount: float) -> float:
+    deposit, withdraw = wallet.deposit, wallet.withdraw
+    t0 = time.perf_counter()
+    for _ in range(ops // 2):
+        deposit(amount)
+        withdraw(amount)
+    return ops / (time.perf_counter() - t0)
+
+
+def drift(wallet: Wallet | FloatWallet, ops: int, amount: float) -> Decimal:
+    for _ in range(ops):
+        wallet.deposit(amount)
+    exact = Decimal(str(amount)) * ops
+    return Decimal(repr(wallet.balance)) - exact
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк денежной арифметики кошелька")
+    parser.add_argument("--ops", type=int, default=1_000_000)
+    parser.add_argument("--amount", type=float, default=0.1)
+    parser.add_argument("--code", default="BTC")
+    args = parser.parse_args()
+
+    for label, cls in (("float", FloatWallet), ("units", Wallet)):
+        ops_s = max(throughput(cls(args.code, 1.0), args.ops, args.amount) for _ in range(3))
+        error = drift(cls(args.code, 0.0), args.ops, args.amount)
+        print(
+            f"{label:>5}: {ops_s / 1e6:.2f} M ops/s, "
+            f"error after {args.ops} deposits of {args.amount}: {error}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Время холодного старта CLI `project`.
+
+    python benchmarks/startup.py                 # из корня проекта
+    python benchmarks/startup.py --budget-ms 80 --runs 20
+
+Что проверяется:
+- суммарное время импорта valutatrade_hub.cli.interface по -X importtime
+  (медиана по --runs запускам) не больше --budget-ms;
+- после импорта и чтения настроек не загружены тяжёлые модули (HEAVY_MODULES):
+  они нужны только отдельным командам и должны импортироваться лениво;
+- для справки: чтение настроек из pyproject.toml и из кеша.
+
+Код выхода 1 — бюджет превышен или тяжёлый модуль загружен при старте.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("requests", "numpy", "asyncio", "tomllib", "valutatrade_hub.parser_service")
+ENTRY_MODULE = "valutatrade_hub.cli.interface"
+
+_PROBE = f"""
+import json, sys
+import {ENTRY_MODULE}
+from valutatrade_hub.infra.settings import SettingsLoader
+SettingsLoader().get("STORAGE_BACKEND")
+heavy = {HEAVY_MODULES!r}
+loaded = [m for m in sys.modules if any(m == h or m.startswith(h + ".") for h in heavy)]
+print(json.dumps(sorted(loaded)))
+"""
+
+_SETTINGS_PROBE = """
+import os, time
+from valutatrade_hub.infra import settings
+if {drop_cache}:
+    try:
+        os.remove(settings.CACHE_FILE_NAME)
+    except FileNotFoundError:
+        pass
+t0 = time.perf_counter()
+settings.SettingsLoader().get("STORAGE_BACKEND")
+print((time.perf_counter() - t0) * 1000)
+"""
+
+
+def _run(args: list[str]) -> subprocess.CompletedProcess[str]:
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, check=True)
+
+
+def import_time_ms(module: str) -> float:
+    """Суммарное время импорта модуля (cumulative из -X importtime), мс."""
+    stderr = _run(["-X", "importtime", "-c", f"import {module}"]).stderr
+    for line in stderr.splitlines():
+        # "import time:   self |  cumulative | <отступ>имя"
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    raise RuntimeError(f"{module} не найден в выводе -X importtime")
+
+
+def wall_time_ms(code: str) -> float:
+    t0 = time.perf_counter()
+    _run(["-c", code])
+    return (time.perf_counter() - t0) * 1000
+
+
+def settings_time_ms(use_cache: bool) -> float:
+    """Первое чтение настроек в новом процессе: из кеша или с разбором pyproject.toml, мс."""
+    return float(_run(["-c", _SETTINGS_PROBE.format(drop_cache=not use_cache)]).stdout)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Бенчмарк холодного старта CLI")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="бюджет на импорт CLI, мс")
+    args = parser.parse_args()
+
+    if not os.path.exists("pyproject.toml"):
+        print("Запускайте из корня проекта (нужен pyproject.toml)", file=sys.stderr)
+        return 2
+
+    _run(["-c", f"import {ENTRY_MODULE}"])  # прогрев: .pyc и кеш настроек
+    imports = [import_time_ms(ENTRY_MODULE) for _ in range(args.runs)]
+    interpreter = [wall_time_ms("pass") for _ in range(args.runs)]
+    startup = [wall_time_ms(f"import {ENTRY_MODULE}") for _ in range(args.runs)]
+    settings_toml = [settings_time_ms(use_cache=False) for _ in range(args.runs)]
+    settings_cached = [settings_time_ms(use_cache=True) for _ in range(args.runs)]
+    heavy = json.loads(_run(["-c", _PROBE]).stdout)
+
+    import_ms = statistics.median(imports)
+    print(
+        f"import {ENTRY_MODULE}: {import_ms:.1f} ms "
+        f"(-X importtime, budget {args.budget_ms:.0f} ms)"
+    )
+    print(
+        f"wall: python -c pass {statistics.median(interpreter):.1f} ms, "
+        f"with CLI import {statistics.median(startup):.1f} ms"
+    )
+    print(
+        f"settings: pyproject.toml {statistics.median(settings_toml):.2f} ms, "
+        f"cache {statistics.median(settings_cached):.2f} ms"
+    )
+    print(f"heavy modules at startup: {', '.join(heavy) or 'none'}")
+
+    ok = import_ms <= args.budget_ms and not heavy
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
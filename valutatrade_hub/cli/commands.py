@@ -0,0 +1,315 @@
+"""
+Неинтерактивный режим CLI: подкоманды argparse и пакетное выполнение JSONL.
+
+    project login --username alice --password secret
+    project buy --currency BTC --amount 0.01 --json
+    project batch ops.jsonl          # по строке JSON на операцию, "-" — stdin
+
+Токен после login сохраняется в CLI_TOKEN_FILE, а сами сессии — в CLI_SESSIONS_FILE,
+поэтому следующие вызовы работают от имени вошедшего пользователя.
+Другой токен можно передать через --token или VALUTATRADE_TOKEN.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, Any, TextIO
+
+from valutatrade_hub.core.models import Session
+from valutatrade_hub.core.sessions import SessionRegistry
+from valutatrade_hub.core.usecases import CoreService
+from valutatrade_hub.infra.backends.json_files import atomic_write_json, read_json
+from valutatrade_hub.infra.settings import SettingsLoader
+
+if TYPE_CHECKING:
+    from valutatrade_hub.parser_service.updater import RatesUpdater
+
+Params = dict[str, Any]
+
+
+class CommandContext:
+    """Один тёплый CoreService на весь запуск и текущий токен."""
+
+    def __init__(self, token: str | None = None, remember: bool = True) -> None:
+        settings = SettingsLoader()
+        self.token_file = str(settings.get("CLI_TOKEN_FILE", "data/.cli_token"))
+        sessions_file = str(
+            settings.get("SESSIONS_FILE", "")
+            or settings.get("CLI_SESSIONS_FILE", "data/sessions.json")
+        )
+        self.core = CoreService(sessions=SessionRegistry(path=sessions_file))
+        # remember=False (batch): login меняет токен только внутри запуска
+        self.remember = remember
+        self.token = token or os.environ.get("VALUTATRADE_TOKEN") or self._stored_token()
+
+    def _stored_token(self) -> str | None:
+        return read_json(self.token_file, default={}).get("token")
+
+    def set_token(self, token: str | None) -> None:
+        self.token = token
+        if self.remember:
+            atomic_write_json(self.token_file, {"token": token} if token else {})
+
+    def session(self, params: Params) -> Session:
+        return self.core.resolve_session(params.get("token") or self.token)
+
+
+# ---- команды: (контекст, параметры) -> результат (dict, сериализуемый в JSON) ----
+def build_updater() -> RatesUpdater:
+    # parser_service тянет requests и numpy: грузим только для update-rates
+    from valutatrade_hub.parser_service.config import ParserConfig
+    from valutatrade_hub.parser_service.providers import create_clients
+    from valutatrade_hub.parser_service.storage import RatesStorage
+    from valutatrade_hub.parser_service.updater import RatesUpdater
+
+    config = ParserConfig()
+    return RatesUpdater(
+        clients=create_clients(config),
+        storage=RatesStorage(),
+        wanted_pairs=config.wanted_pairs(),
+    )
+
+
+def _require(params: Params, key: str) -> Any:
+    value = params.get(key)
+    if value is None or value == "":
+        raise ValueError(f"Параметр '{key}' обязателен")
+    return value
+
+
+def _cmd_register(ctx: CommandContext, params: Params) -> dict[str, Any]:
+    username = _require(params, "username")
+    user_id = ctx.core.create_user(username=username, password=_require(params, "password"))
+    return {"user_id": user_id, "username": username}
+
+
+def _cmd_login(ctx: CommandContext, params: Params) -> dict[str, Any]:
+    token = ctx.core.open_session(_require(params, "username"), _require(params, "password"))
+    ctx.set_token(token)
+    session = ctx.core.resolve_session(token)
+    return {"token": token, "user_id": session.user_id, "username": session.username}
+
+
+def _cmd_logout(ctx: CommandContext, params: Params) -> dict[str, Any]:
+    token = params.get("token") or ctx.token
+    logged_out = bool(token) and ctx.core.logout(token)
+    if token == ctx.token:
+        ctx.set_token(None)
+    return {"logged_out": logged_out}
+
+
+def _cmd_show_portfolio(ctx: CommandContext, params: Params) -> dict[str, Any]:
+    base = str(params.get("base") or "USD").upper()
+    return ctx.core.show_portfolio(base, session=ctx.session(params))
+
+
+def _trade(side: str) -> Callable[[CommandContext, Params], dict[str, Any]]:
+    def run(ctx: CommandContext, params: Params) -> dict[str, Any]:
+        session = ctx.session(params)
+        trade = ctx.core.buy if side == "buy" else ctx.core.sell
+        return trade(
+            user_id=session.user_id,
+            currency_code=str(_require(params, "currency")).upper(),
+            amount=float(_require(params, "amount")),
+            base_currency=str(params.get("base") or "USD").upper(),
+        )
+
+    return run
+
+
+def _cmd_get_rate(ctx: CommandContext, params: Params) -> dict[str, Any]:
+    from_code = str(_require(params, "from")).upper()
+    to_code = str(_require(params, "to")).upper()
+    rate, updated_at, source = ctx.core.get_rate(from_code, to_code, allow_stale=True)
+    return {
+        "from": from_code,
+        "to": to_code,
+        "rate": rate,
+        "updated_at": updated_at,
+        "source": source,
+    }
+
+
+def _cmd_update_rates(ctx: CommandContext, params: Params) -> dict[str, Any]:
+    source = params.get("source")
+    return build_updater().run_update(only=[source] if source else None)
+
+
+COMMANDS: dict[str, Callable[[CommandContext, Params], dict[str, Any]]] = {
+    "register": _cmd_register,
+    "login": _cmd_login,
+    "logout": _cmd_logout,
+    "show-portfolio": _cmd_show_portfolio,
+    "buy": _trade("buy"),
+    "sell": _trade("sell"),
+    "get-rate": _cmd_get_rate,
+    "update-rates": _cmd_update_rates,
+}
+
+
+# ---- человекочитаемый вывод ----
+def format_portfolio(result: dict[str, Any]) -> str:
+    if result["empty"]:
+        return "Портфель пуст"
+    lines = [f"Портфель пользователя '{result['username']}' (база: {result['base']}):"]
+    for row in result["rows"]:
+        lines.append(
+            f"- {row['currency']}: {row['balance']:.4f} → "
+            f"{row['value_in_base']:.2f} {result['base']}"
+        )
+    lines.append(f"ИТОГО: {result['total']:.2f} {result['base']}")
+    return "\n".join(lines)
+
+
+def format_trade(side: str, result: dict[str, Any]) -> str:
+    title = "Покупка выполнена" if side == "buy" else "Продажа выполнена"
+    return (
+        f"{title}: {result['currency']}, "
+        f"было {result['before']:.4f} → стало {result['after']:.4f}"
+    )
+
+
+def format_update(result: dict[str, Any]) -> str:
+    if result.get("status") == "ok":
+        return f"Курсы обновлены успешно. Обновлено: {result.get('updated')}"
+    return f"Обновление завершено с ошибками. Обновлено: {result.get('updated')}"
+
+
+def format_result(command: str, result: dict[str, Any]) -> str:
+    match command:
+        case "register":
+            return f"Пользователь '{result['username']}' зарегистрирован (id={result['user_id']})"
+        case "login":
+            return f"Вы вошли как '{result['username']}'"
+        case "logout":
+            return "Вы вышли из аккаунта" if result["logged_out"] else "Активной сессии нет"
+        case "show-portfolio":
+            return format_portfolio(result)
+        case "buy" | "sell":
+            return format_trade(command, result)
+        case "get-rate":
+            return (
+                f"Курс {result['from']} → {result['to']}: {result['rate']:.8f} "
+                f"(обновлено {result['updated_at']})"
+            )
+        case "update-rates":
+            return format_update(result)
+    return json.dumps(result, ensure_ascii=False)
+
+
+# ---- пакетный режим ----
+def _read_jsonl(stream: TextIO) -> Iterator[tuple[int, Params | Exception]]:
+    for n, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            if not isinstance(item, dict):
+                raise ValueError("строка должна быть JSON-объектом")
+            yield n, item
+        except ValueError as e:
+            yield n, e
+
+
+def run_batch(
+    ctx: CommandContext,
+    items: Iterable[tuple[int, Params | Exception]],
+    out: TextIO,
+    stop_on_error: bool = False,
+) -> int:
+    """
+    Выполнить операции по порядку, печатая по строке JSON на каждую сразу по готовности.
+    Строка входа: {"command": "buy", "currency": "BTC", "amount": 0.1, ...}.
+    Возвращает число ошибок.
+    """
+    errors = 0
+    for n, item in items:
+        command = item.get("command") if isinstance(item, dict) else None
+        record: dict[str, Any] = {"line": n, "command": command}
+        try:
+            if isinstance(item, Exception):
+                raise item
+            if command not in COMMANDS:
+                raise ValueError(f"Неизвестная команда '{command}'")
+            record.update(status="ok", result=COMMANDS[command](ctx, item))
+        except Exception as e:  # noqa: BLE001 - ошибка одной строки не прерывает пакет
+            errors += 1
+            record.update(status="error", error=str(e), type=type(e).__name__)
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        if errors and stop_on_error:
+            break
+    return errors
+
+
+# ---- argparse ----
+def build_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--json", action="store_true", help="вывод в JSON")
+    common.add_argument(
+        "--token", default=None, help="токен сессии (по умолчанию — последний login)"
+    )
+
+    parser = argparse.ArgumentParser(prog="project", description="ValutaTrade Hub")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("register", "login"):
+        p = sub.add_parser(name, parents=[common])
+        p.add_argument("--username", required=True)
+        p.add_argument("--password", required=True)
+
+    sub.add_parser("logout", parents=[common])
+
+    p = sub.add_parser("show-portfolio", parents=[common])
+    p.add_argument("--base", default="USD")
+
+    for name in ("buy", "sell"):
+        p = sub.add_parser(name, parents=[common])
+        p.add_argument("--currency", required=True)
+        p.add_argument("--amount", type=float, required=True)
+        p.add_argument("--base", default="USD")
+
+    p = sub.add_parser("get-rate", parents=[common])
+    p.add_argument("--from", dest="from", required=True)
+    p.add_argument("--to", required=True)
+
+    p = sub.add_parser("update-rates", parents=[common])
+    p.add_argument("--source", default=None, help="обновить только этот источник")
+
+    p = sub.add_parser("batch", parents=[common], help="операции из JSONL-файла (\"-\" — stdin)")
+    p.add_argument("file")
+    p.add_argument("--stop-on-error", action="store_true")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    params = {k: v for k, v in vars(args).items() if k not in ("command", "json") and v is not None}
+
+    if args.command == "batch":
+        ctx = CommandContext(token=args.token, remember=False)
+        if args.file == "-":
+            errors = run_batch(ctx, _read_jsonl(sys.stdin), sys.stdout, args.stop_on_error)
+        else:
+            with open(args.file, encoding="utf-8") as f:
+                errors = run_batch(ctx, _read_jsonl(f), sys.stdout, args.stop_on_error)
+        return 1 if errors else 0
+
+    ctx = CommandContext(token=args.token)
+    try:
+        result = COMMANDS[args.command](ctx, params)
+    except Exception as e:  # noqa: BLE001
+        if args.json:
+            print(json.dumps({"error": str(e), "type": type(e).__name__}, ensure_ascii=False))
+        else:
+            print(f"Ошибка: {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+    else:
+        print(format_result(args.command, result))
+    return 0
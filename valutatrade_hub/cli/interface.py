@@ -1,17 +1,20 @@
 from __future__ import annotations
 
+import sys
+
+from valutatrade_hub.cli.commands import (
+    build_updater,
+    format_portfolio,
+    format_trade,
+    format_update,
+    main,
+)
 from valutatrade_hub.core.exceptions import (
     ApiRequestError,
     CurrencyNotFoundError,
     InsufficientFundsError,
 )
 from valutatrade_hub.core.usecases import CoreService
-from valutatrade_hub.infra.database import DatabaseManager
-
-from valutatrade_hub.parser_service.api_clients import CoinGeckoClient, ExchangeRateApiClient
-from valutatrade_hub.parser_service.config import ParserConfig
-from valutatrade_hub.parser_service.storage import RatesStorage
-from valutatrade_hub.parser_service.updater import RatesUpdater
 
 
 def print_menu(logged_in: bool) -> None:
@@ -60,6 +63,13 @@ def input_float(prompt: str) -> float:
 
 
 def run_cli() -> None:
+    """Точка входа project: с аргументами — подкоманды (cli.commands), без них — меню."""
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1:]))
+    run_interactive()
+
+
+def run_interactive() -> None:
     core = CoreService()
 
     while True:
@@ -93,95 +103,43 @@ def run_cli() -> None:
 
                 match choice:
                     case "1":  # show portfolio
-                        result = core.show_portfolio()
-                        if result["empty"]:
-                            print("Портфель пуст")
-                        else:
-                            print(f"\nПортфель пользователя '{session.username}' (база: {result['base']}):")
-                            for row in result["rows"]:
-                                print(
-                                    f"- {row['currency']}: {row['balance']:.4f} → "
-                                    f"{row['value_in_base']:.2f} {result['base']}"
-                                )
-                            print(f"ИТОГО: {result['total']:.2f} {result['base']}")
+                        result = core.show_portfolio(session=session)
+                        print(("" if result["empty"] else "\n") + format_portfolio(result))
 
                     case "2":  # buy
                         currency = input_non_empty("Код валюты: ").upper()
                         amount = input_float("Количество: ")
                         res = core.buy(session.user_id, currency, amount)
-                        print(
-                            f"Покупка выполнена: {currency}, "
-                            f"было {res['before']:.4f} → стало {res['after']:.4f}"
-                        )
+                        print(format_trade("buy", res))
 
                     case "3":  # sell
                         currency = input_non_empty("Код валюты: ").upper()
                         amount = input_float("Количество: ")
                         res = core.sell(session.user_id, currency, amount)
-                        print(
-                            f"Продажа выполнена: {currency}, "
-                            f"было {res['before']:.4f} → стало {res['after']:.4f}"
-                        )
+                        print(format_trade("sell", res))
 
                     case "4":  # get-rate
-                        db = DatabaseManager()
-                        snapshot = db.load_rates()
-                        pairs = (snapshot.get("pairs") or {}).keys()
-
-                        currencies: set[str] = set()
-                        for pair in pairs:
-                            if "_" in pair:
-                                left, right = pair.split("_", 1)
-                                currencies.add(left)
-                                currencies.add(right)
-
+                        currencies = core.list_rate_currencies()
                         if currencies:
                             print("Доступные валюты:")
-                            print(", ".join(sorted(currencies)))
+                            print(", ".join(currencies))
                         else:
                             print("Локальный кеш курсов пуст. Сначала выполните обновление курсов.")
 
                         from_c = input_non_empty("Из валюты: ").upper()
                         to_c = input_non_empty("В валюту: ").upper()
 
-                        try:
-                            rate, updated, _ = core.get_rate(from_c, to_c, allow_stale=True)
-                            print(f"Курс {from_c} → {to_c}: {rate:.8f} (обновлено {updated})")
-                        except ApiRequestError:
-                            # вычисление кросс-курса через USD, если прямой пары нет в кеше
-                            rate_from_usd, updated1, _ = core.get_rate(from_c, "USD", allow_stale=True)
-                            rate_to_usd, updated2, _ = core.get_rate(to_c, "USD", allow_stale=True)
-
-                            if rate_to_usd == 0:
-                                raise ApiRequestError(
-                                    f"Курс {from_c}→{to_c} недоступен. Повторите попытку позже."
-                                )
-
-                            cross = rate_from_usd / rate_to_usd
-                            updated = updated1 if updated1 >= updated2 else updated2
-                            print(f"Курс {from_c} → {to_c}: {cross:.8f} (обновлено {updated})")
+                        # кросс-курсы через опорные валюты считает core (RateGraph)
+                        rate, updated, _ = core.get_rate(from_c, to_c, allow_stale=True)
+                        print(f"Курс {from_c} → {to_c}: {rate:.8f} (обновлено {updated})")
 
                     case "5":  # update-rates
                         print("Обновление курсов...")
 
-                        config = ParserConfig()
-                        storage = RatesStorage()
-                        updater = RatesUpdater(
-                            clients=[
-                                ("CoinGecko", CoinGeckoClient(config)),
-                                ("ExchangeRate-API", ExchangeRateApiClient(config)),
-                            ],
-                            storage=storage,
-                        )
-
-                        result = updater.run_update()
-                        if result.get("status") == "ok":
-                            print(f"Курсы обновлены успешно. Обновлено: {result.get('updated')}")
-                        else:
-                            print(f"Обновление завершено с ошибками. Обновлено: {result.get('updated')}")
+                        print(format_update(build_updater().run_update()))
 
                     case "6":  # logout
-                        core._session = None
+                        core.logout()
                         print("Вы вышли из аккаунта")
 
                     case "0":
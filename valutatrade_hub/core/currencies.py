@@ -6,16 +6,24 @@ from dataclasses import dataclass
 from valutatrade_hub.core.exceptions import CurrencyNotFoundError
 from valutatrade_hub.core.utils import validate_currency_code, validate_non_empty_string
 
+# точность (знаков после запятой) для валют, которых нет в реестре
+DEFAULT_DECIMALS = 8
+
 
 class Currency(ABC):
     name: str
     code: str
+    # балансы хранятся целым числом минимальных единиц: 10 ** decimals единиц = 1.0
+    decimals: int
 
-    def __init__(self, name: str, code: str) -> None:
+    def __init__(self, name: str, code: str, decimals: int = DEFAULT_DECIMALS) -> None:
         validate_non_empty_string(name, "name")
         validate_currency_code(code)
+        if not isinstance(decimals, int) or not 0 <= decimals <= 8:
+            raise ValueError("decimals must be an integer in 0..8")
         self.name = name
         self.code = code
+        self.decimals = decimals
 
     @abstractmethod
     def get_display_info(self) -> str:
@@ -23,8 +31,8 @@ class Currency(ABC):
 
 
 class FiatCurrency(Currency):
-    def __init__(self, name: str, code: str, issuing_country: str) -> None:
-        super().__init__(name=name, code=code)
+    def __init__(self, name: str, code: str, issuing_country: str, decimals: int = 2) -> None:
+        super().__init__(name=name, code=code, decimals=decimals)
         validate_non_empty_string(issuing_country, "issuing_country")
         self.issuing_country = issuing_country
 
@@ -33,8 +41,10 @@ class FiatCurrency(Currency):
 
 
 class CryptoCurrency(Currency):
-    def __init__(self, name: str, code: str, algorithm: str, market_cap: float) -> None:
-        super().__init__(name=name, code=code)
+    def __init__(
+        self, name: str, code: str, algorithm: str, market_cap: float, decimals: int = 8
+    ) -> None:
+        super().__init__(name=name, code=code, decimals=decimals)
         validate_non_empty_string(algorithm, "algorithm")
         if not isinstance(market_cap, (int, float)) or market_cap < 0:
             raise ValueError("market_cap must be a non-negative number")
@@ -45,7 +55,10 @@ class CryptoCurrency(Currency):
         return f"[CRYPTO] {self.code} — {self.name} (Algo: {self.algorithm}, MCAP: {self.market_cap:.2e})"
 
 
-# Минимальный реестр поддерживаемых валют (можно расширять)
+# Минимальный реестр поддерживаемых валют; дополняется валютами из настроек парсера
+# (PARSER_FIAT_CURRENCIES / PARSER_CRYPTO_CURRENCIES) при первом промахе.
+# Точность — decimals (фиат 2, крипта 8; ETH и SOL на цепочке точнее — 18 и 9).
+# Баланс хранится целым числом минимальных единиц ("units" рядом с float "balance").
 _REGISTRY: dict[str, Currency] = {
     "USD": FiatCurrency("US Dollar", "USD", "United States"),
     "EUR": FiatCurrency("Euro", "EUR", "Eurozone"),
@@ -57,13 +70,58 @@ _REGISTRY: dict[str, Currency] = {
 }
 
 
+_configured_loaded = False
+
+
+def _load_configured() -> None:
+    """
+    Валюты из PARSER_FIAT_CURRENCIES / PARSER_CRYPTO_CURRENCIES, которых нет в реестре:
+    парсер получает и хранит их курсы, значит, они должны проходить get_rate/buy/sell.
+    Имя крипты — id из PARSER_CRYPTO_ID_MAP, если он задан.
+    """
+    global _configured_loaded
+    if _configured_loaded:
+        return
+    _configured_loaded = True
+    from valutatrade_hub.infra.settings import SettingsLoader
+
+    settings = SettingsLoader()
+    id_map = settings.get("PARSER_CRYPTO_ID_MAP", {}) or {}
+    ids = {str(k).upper(): str(v) for k, v in id_map.items()}
+    for key in ("PARSER_FIAT_CURRENCIES", "PARSER_CRYPTO_CURRENCIES"):
+        for raw in settings.get(key, []) or []:
+            code = str(raw).strip().upper()
+            if not code or code in _REGISTRY:
+                continue
+            try:
+                if key == "PARSER_FIAT_CURRENCIES":
+                    _REGISTRY[code] = FiatCurrency(code, code, "n/a")
+                else:
+                    _REGISTRY[code] = CryptoCurrency(ids.get(code, code), code, "n/a", 0.0)
+            except ValueError as e:
+                raise ValueError(f"{key}: некорректный код валюты '{raw}' ({e})") from None
+
+
 def get_currency(code: str) -> Currency:
     validate_currency_code(code)
     cur = _REGISTRY.get(code)
+    if not cur:
+        _load_configured()
+        cur = _REGISTRY.get(code)
     if not cur:
         raise CurrencyNotFoundError(code)
     return cur
 
 
+def currency_decimals(code: str) -> int:
+    """Точность валюты по реестру; для неизвестных кодов — DEFAULT_DECIMALS."""
+    cur = _REGISTRY.get(code)
+    if cur is None:
+        _load_configured()
+        cur = _REGISTRY.get(code)
+    return cur.decimals if cur is not None else DEFAULT_DECIMALS
+
+
 def list_supported_codes() -> list[str]:
+    _load_configured()
     return sorted(_REGISTRY.keys())
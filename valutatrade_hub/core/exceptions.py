@@ -13,3 +13,19 @@ class CurrencyNotFoundError(Exception):
 class ApiRequestError(Exception):
     def __init__(self, reason: str) -> None:
         super().__init__(f"Ошибка при обращении к внешнему API: {reason}")
+
+
+class ConcurrentModificationError(Exception):
+    def __init__(self, user_id: int, expected: int, actual: int) -> None:
+        super().__init__(
+            f"Портфель пользователя {user_id} изменён параллельно: "
+            f"ожидалась версия {expected}, текущая {actual}"
+        )
+        self.user_id = user_id
+        self.expected = expected
+        self.actual = actual
+
+
+class UserAlreadyExistsError(Exception):
+    def __init__(self, username: str) -> None:
+        super().__init__(f"Имя пользователя '{username}' уже занято")
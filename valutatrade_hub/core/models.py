@@ -1,18 +1,19 @@
 from __future__ import annotations
 
-import hashlib
+import math
+import sys
+from collections.abc import Mapping
 from dataclasses import dataclass
 from datetime import datetime
+from types import MappingProxyType
 from typing import Any
 
 from valutatrade_hub.core.exceptions import InsufficientFundsError
+from valutatrade_hub.core.money import Money, rescale, scale_of, to_units
+from valutatrade_hub.core.passwords import PasswordHasher
 from valutatrade_hub.core.utils import validate_amount, validate_currency_code, validate_non_empty_string
 
 
-def _sha256(text: str) -> str:
-    return hashlib.sha256(text.encode("utf-8")).hexdigest()
-
-
 class User:
     def __init__(
         self,
@@ -63,24 +64,62 @@ class User:
 
     def verify_password(self, password: str) -> bool:
         validate_non_empty_string(password, "password")
-        return _sha256(password + self._salt) == self._hashed_password
+        return PasswordHasher().verify(password, self._hashed_password, self._salt)
 
     def change_password(self, new_password: str) -> None:
         validate_non_empty_string(new_password, "new_password")
         if len(new_password) < 4:
             raise ValueError("Пароль должен быть не короче 4 символов")
-        self._hashed_password = _sha256(new_password + self._salt)
+        hasher = PasswordHasher()
+        self._salt = hasher.gen_salt()
+        self._hashed_password = hasher.hash(new_password, self._salt)
+
+
+# проверенные коды валют → один интернированный экземпляр строки:
+# validate_currency_code выполняется один раз на код за процесс,
+# а тысячи кошельков одной валюты делят одну строку
+_CODES: dict[str, str] = {}
+_CODES_MAX = 4096
+
+
+def checked_code(code: str) -> str:
+    """Проверенный и интернированный код валюты (ValueError, если код некорректен)."""
+    known = _CODES.get(code) if isinstance(code, str) else None
+    if known is not None:
+        return known
+    validate_currency_code(code)
+    code = sys.intern(code)
+    if len(_CODES) < _CODES_MAX:
+        _CODES[code] = code
+    return code
 
 
 class Wallet:
+    """
+    Баланс хранится целым числом минимальных единиц валюты (точность — из реестра
+    currencies): пополнения и списания не накапливают ошибку округления float.
+    balance — то же значение как float для вывода и оценки.
+    """
+
+    __slots__ = ("currency_code", "_units", "_scale")
+
     def __init__(self, currency_code: str, balance: float = 0.0) -> None:
-        validate_currency_code(currency_code)
-        self.currency_code = currency_code
+        self.currency_code = checked_code(currency_code)
+        self._scale = scale_of(self.currency_code)
         self.balance = balance  # goes through setter
 
+    @classmethod
+    def _trusted(cls, currency_code: str, units: int, scale: int) -> Wallet:
+        # без проверок: вызывающий уже проверил код и баланс
+        w = cls.__new__(cls)
+        w.currency_code = currency_code
+        w._units = units
+        w._scale = scale
+        return w
+
     @property
     def balance(self) -> float:
-        return self._balance
+        return self._units / self._scale
 
     @balance.setter
     def balance(self, value: float) -> None:
@@ -88,54 +127,81 @@ class Wallet:
             raise TypeError("balance must be a number")
         if float(value) < 0:
             raise ValueError("balance cannot be negative")
-        self._balance = float(value)
+        self._units = to_units(value, self._scale)
+
+    @property
+    def money(self) -> Money:
+        return Money(self.currency_code, self._units, self._scale)
+
+    def _amount_units(self, amount: float) -> int:
+        if type(amount) is float and 0.0 < amount < math.inf:
+            # горячий путь: обычная положительная сумма float
+            units = round(amount * self._scale)
+        else:
+            validate_amount(amount)
+            units = to_units(amount, self._scale)
+        if units <= 0:
+            raise ValueError(
+                f"'amount' меньше минимальной единицы {self.currency_code} ({1 / self._scale:g})"
+            )
+        return units
 
     def deposit(self, amount: float) -> None:
-        validate_amount(amount)
-        self.balance = self.balance + float(amount)
+        self._units += self._amount_units(amount)
 
     def withdraw(self, amount: float) -> None:
-        validate_amount(amount)
-        if amount > self.balance:
-            raise InsufficientFundsError(available=self.balance, required=amount, code=self.currency_code)
-        self.balance = self.balance - float(amount)
+        units = self._amount_units(amount)
+        if units > self._units:
+            raise InsufficientFundsError(
+                available=self.balance, required=amount, code=self.currency_code
+            )
+        self._units -= units
 
     def get_balance_info(self) -> str:
         return f"{self.currency_code}: {self.balance:.4f}"
 
 
 class Portfolio:
-    def __init__(self, user_id: int, wallets: dict[str, Wallet] | None = None) -> None:
+    __slots__ = ("_user_id", "_wallets", "_version")
+
+    def __init__(
+        self, user_id: int, wallets: dict[str, Wallet] | None = None, version: int = 0
+    ) -> None:
         self._user_id = int(user_id)
         self._wallets: dict[str, Wallet] = wallets or {}
+        # версия записи в хранилище на момент чтения (для compare-and-swap при сохранении)
+        self._version = int(version)
 
     @property
     def user_id(self) -> int:
         return self._user_id
 
     @property
-    def wallets(self) -> dict[str, Wallet]:
-        # копия, чтобы нельзя было перезаписать напрямую
-        return dict(self._wallets)
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def wallets(self) -> Mapping[str, Wallet]:
+        # представление только для чтения: без копии, но и без прямой перезаписи
+        return MappingProxyType(self._wallets)
 
     def add_currency(self, currency_code: str) -> Wallet:
-        validate_currency_code(currency_code)
-        if currency_code in self._wallets:
-            return self._wallets[currency_code]
-        w = Wallet(currency_code=currency_code, balance=0.0)
-        self._wallets[currency_code] = w
+        currency_code = checked_code(currency_code)
+        w = self._wallets.get(currency_code)
+        if w is None:
+            w = Wallet._trusted(currency_code, 0, scale_of(currency_code))
+            self._wallets[currency_code] = w
         return w
 
     def get_wallet(self, currency_code: str) -> Wallet | None:
-        validate_currency_code(currency_code)
-        return self._wallets.get(currency_code)
+        return self._wallets.get(checked_code(currency_code))
 
     def get_total_value(self, base_currency: str, exchange_rates: dict[str, float]) -> float:
         """
         Конвертирует все кошельки в base_currency по exchange_rates.
         exchange_rates: {"BTC_USD": 59337.21, ...} где формат "<FROM>_<TO>".
         """
-        validate_currency_code(base_currency)
+        base_currency = checked_code(base_currency)
         total = 0.0
         for code, wallet in self._wallets.items():
             if code == base_currency:
@@ -152,17 +218,39 @@ class Portfolio:
     def to_json(self) -> dict[str, Any]:
         return {
             "user_id": self._user_id,
-            "wallets": {code: {"balance": w.balance} for code, w in self._wallets.items()},
+            # точное значение — units (целое) при scale; float balance — для чтения людьми
+            # и кода, которому нужен только float (оценка портфелей): округлённое units / scale
+            # как double восстанавливается не всегда (например, 1e7..1e8 при 8 знаках)
+            "wallets": {
+                code: {"balance": w.balance, "units": w._units, "scale": w._scale}
+                for code, w in self._wallets.items()
+            },
+            "version": self._version,
         }
 
     @staticmethod
     def from_json(data: dict[str, Any]) -> "Portfolio":
+        # граница с хранилищем: код и баланс проверяются здесь один раз
         user_id = int(data["user_id"])
         wallets_raw: dict[str, Any] = data.get("wallets", {})
         wallets: dict[str, Wallet] = {}
         for code, wdata in wallets_raw.items():
-            wallets[code] = Wallet(currency_code=code, balance=float(wdata.get("balance", 0.0)))
-        return Portfolio(user_id=user_id, wallets=wallets)
+            code = checked_code(code)
+            scale = scale_of(code)
+            if wdata.get("units") is not None:
+                units = int(wdata["units"])
+                stored_scale = int(wdata.get("scale") or scale)
+                if stored_scale != scale:
+                    # точность валюты поменяли в реестре
+                    units = rescale(units, stored_scale, scale)
+            else:
+                # запись без units (до хранения единиц или upsert_wallet): float balance
+                # округляется до точности валюты — фиатный баланс молча до 2 знаков
+                units = to_units(float(wdata.get("balance", 0.0)), scale)
+            if units < 0:
+                raise ValueError("balance cannot be negative")
+            wallets[code] = Wallet._trusted(code, units, scale)
+        return Portfolio(user_id=user_id, wallets=wallets, version=int(data.get("version", 0)))
 
 
 @dataclass(frozen=True)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import math
+from functools import total_ordering
+from typing import TYPE_CHECKING, Any
+
+from valutatrade_hub.core.currencies import currency_decimals
+
+if TYPE_CHECKING:
+    from decimal import Decimal
+
+# код валюты → 10 ** decimals (реестр не меняется во время работы)
+_SCALES: dict[str, int] = {}
+
+
+def scale_of(code: str) -> int:
+    """Сколько минимальных единиц в 1.0 валюты code."""
+    scale = _SCALES.get(code)
+    if scale is None:
+        scale = _SCALES[code] = 10 ** currency_decimals(code)
+    return scale
+
+
+def to_units(amount: Any, scale: int) -> int:
+    """
+    Сумма → целое число минимальных единиц, лишние знаки округляются
+    до ближайшего (половина — к чётному).
+    float — быстрый путь для горячего кода; str/Decimal — точный, для ввода-вывода.
+    """
+    if isinstance(amount, int):
+        return amount * scale
+    if isinstance(amount, float):
+        if not math.isfinite(amount):
+            raise ValueError("amount must be a finite number")
+        return round(amount * scale)
+    from decimal import ROUND_HALF_EVEN, Decimal  # только ввод-вывод: не грузим на старте CLI
+
+    try:
+        value = (Decimal(str(amount)) * scale).quantize(Decimal(1), rounding=ROUND_HALF_EVEN)
+        return int(value)
+    except (ArithmeticError, ValueError):
+        raise ValueError(f"Некорректная сумма: {amount!r}") from None
+
+
+def rescale(units: int, from_scale: int, to_scale: int) -> int:
+    """Минимальные единицы при другой точности: округление до ближайшего, половина — к чётному."""
+    if to_scale >= from_scale:
+        return units * (to_scale // from_scale)
+    q, r = divmod(units, from_scale // to_scale)
+    half = from_scale // to_scale
+    if 2 * r > half or (2 * r == half and q % 2):
+        q += 1
+    return q
+
+
+def _decimals(scale: int) -> int:
+    return len(str(scale)) - 1
+
+
+@total_ordering
+class Money:
+    """
+    Сумма в одной валюте: целое число минимальных единиц (units) и масштаб.
+    Арифметика — целочисленная; Decimal и строка — только для вывода.
+    """
+
+    __slots__ = ("code", "units", "scale")
+
+    def __init__(self, code: str, units: int, scale: int | None = None) -> None:
+        self.code = code
+        self.units = int(units)
+        self.scale = scale_of(code) if scale is None else scale
+
+    @classmethod
+    def of(cls, code: str, amount: Any) -> Money:
+        scale = scale_of(code)
+        return cls(code, to_units(amount, scale), scale)
+
+    @property
+    def amount(self) -> float:
+        return self.units / self.scale
+
+    def to_decimal(self) -> Decimal:
+        from decimal import Decimal
+
+        return Decimal(self.units).scaleb(-_decimals(self.scale))
+
+    def _same(self, other: Money) -> None:
+        if self.code != other.code:
+            raise ValueError(f"Суммы в разных валютах: {self.code} и {other.code}")
+
+    def __add__(self, other: Money) -> Money:
+        self._same(other)
+        return Money(self.code, self.units + other.units, self.scale)
+
+    def __sub__(self, other: Money) -> Money:
+        self._same(other)
+        return Money(self.code, self.units - other.units, self.scale)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Money):
+            return NotImplemented
+        return self.code == other.code and self.units == other.units
+
+    def __lt__(self, other: Money) -> bool:
+        self._same(other)
+        return self.units < other.units
+
+    def __hash__(self) -> int:
+        return hash((self.code, self.units))
+
+    def __float__(self) -> float:
+        return self.amount
+
+    def __str__(self) -> str:
+        return f"{self.to_decimal():f} {self.code}"
+
+    def __repr__(self) -> str:
+        return f"Money({self.code!r}, {self.to_decimal():f})"
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from valutatrade_hub.infra.settings import SettingsLoader
+
+
+class HashAlgorithm(ABC):
+    """Алгоритм хеширования паролей. Хеш хранится как "<name>$<параметры>$<соль>$<hex>"."""
+
+    name: str = ""
+
+    @abstractmethod
+    def hash(self, password: str, salt: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def verify(self, password: str, encoded: str, salt: str) -> bool:
+        raise NotImplementedError
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """True — хеш посчитан с более слабыми параметрами, чем текущие."""
+        return False
+
+
+class LegacySha256(HashAlgorithm):
+    """Исходный формат: sha256(password + salt) в hex без префикса, соль — в поле "salt"."""
+
+    name = "sha256"
+
+    def hash(self, password: str, salt: str) -> str:
+        return hashlib.sha256((password + salt).encode("utf-8")).hexdigest()
+
+    def verify(self, password: str, encoded: str, salt: str) -> bool:
+        return hmac.compare_digest(self.hash(password, salt), encoded)
+
+
+class Pbkdf2Sha256(HashAlgorithm):
+    name = "pbkdf2_sha256"
+
+    def __init__(self, iterations: int = 600_000) -> None:
+        self.iterations = int(iterations)
+
+    def _derive(self, password: str, salt: str, iterations: int) -> str:
+        return hashlib.pbkdf2_hmac(
+            "sha256", password.encode("utf-8"), salt.encode("utf-8"), iterations
+        ).hex()
+
+    def hash(self, password: str, salt: str) -> str:
+        digest = self._derive(password, salt, self.iterations)
+        return f"{self.name}${self.iterations}${salt}${digest}"
+
+    def verify(self, password: str, encoded: str, salt: str) -> bool:
+        _, iterations, salt, digest = encoded.split("$", 3)
+        return hmac.compare_digest(self._derive(password, salt, int(iterations)), digest)
+
+    def needs_rehash(self, encoded: str) -> bool:
+        return int(encoded.split("$", 2)[1]) < self.iterations
+
+
+class Scrypt(HashAlgorithm):
+    name = "scrypt"
+
+    def __init__(self, n: int = 2**14, r: int = 8, p: int = 1) -> None:
+        self.n, self.r, self.p = int(n), int(r), int(p)
+
+    @staticmethod
+    def _derive(password: str, salt: str, n: int, r: int, p: int) -> str:
+        # scrypt занимает ~128 * n * r байт; запас, чтобы не упереться в maxmem по умолчанию
+        maxmem = 256 * n * r * p + (1 << 20)
+        return hashlib.scrypt(
+            password.encode("utf-8"), salt=salt.encode("utf-8"), n=n, r=r, p=p, maxmem=maxmem
+        ).hex()
+
+    @staticmethod
+    def _params(encoded: str) -> tuple[int, int, int]:
+        raw = dict(kv.split("=") for kv in encoded.split("$", 2)[1].split(","))
+        return int(raw["n"]), int(raw["r"]), int(raw["p"])
+
+    def hash(self, password: str, salt: str) -> str:
+        digest = self._derive(password, salt, self.n, self.r, self.p)
+        return f"{self.name}$n={self.n},r={self.r},p={self.p}${salt}${digest}"
+
+    def verify(self, password: str, encoded: str, salt: str) -> bool:
+        n, r, p = self._params(encoded)
+        salt, digest = encoded.split("$", 3)[2:]
+        return hmac.compare_digest(self._derive(password, salt, n, r, p), digest)
+
+    def needs_rehash(self, encoded: str) -> bool:
+        n, r, p = self._params(encoded)
+        # слабее, если слабее хотя бы один параметр (кортежи сравнивались бы лексикографически)
+        return n < self.n or r < self.r or p < self.p
+
+
+_ALGORITHMS: dict[str, type[HashAlgorithm]] = {
+    LegacySha256.name: LegacySha256,
+    Pbkdf2Sha256.name: Pbkdf2Sha256,
+    Scrypt.name: Scrypt,
+}
+
+
+def register_algorithm(cls: type[HashAlgorithm]) -> type[HashAlgorithm]:
+    """Подключить свой алгоритм (можно как декоратор класса)."""
+    _ALGORITHMS[cls.name] = cls
+    return cls
+
+
+def algorithm_name(encoded: str) -> str:
+    # у старых записей префикса нет
+    return encoded.split("$", 1)[0] if "$" in encoded else LegacySha256.name
+
+
+class PasswordHasher:
+    """
+    Singleton через __new__: общие ограничение KDF и кеш проверок на процесс.
+
+    - PASSWORD_HASH_ALGORITHM — алгоритм для новых паролей (scrypt | pbkdf2_sha256);
+      старые хеши проверяются своим алгоритмом по префиксу, needs_rehash()
+      подсказывает, что при входе хеш стоит пересчитать
+    - KDF выполняется в вызывающем потоке (hashlib отпускает GIL), но не больше
+      PASSWORD_HASH_WORKERS одновременно — память scrypt ограничена;
+      verify_async уносит KDF в поток и не блокирует цикл событий
+    - успешные проверки кешируются на PASSWORD_VERIFY_CACHE_TTL_SECONDS
+      (не больше PASSWORD_VERIFY_CACHE_SIZE записей) — повторный вход не платит за KDF.
+      Ключ — HMAC со случайным ключом процесса, сам пароль не хранится;
+      неудачные попытки не кешируются
+    """
+
+    _instance: PasswordHasher | None = None
+
+    def __new__(cls) -> PasswordHasher:
+        if cls._instance is None:
+            inst = super().__new__(cls)
+            inst._configure(SettingsLoader())
+            cls._instance = inst
+        return cls._instance
+
+    def _configure(self, settings: SettingsLoader) -> None:
+        self.algorithm_name = str(settings.get("PASSWORD_HASH_ALGORITHM", "scrypt"))
+        self._algorithms: dict[str, HashAlgorithm] = {
+            Scrypt.name: Scrypt(
+                n=int(settings.get("PASSWORD_SCRYPT_N", 2**14)),
+                r=int(settings.get("PASSWORD_SCRYPT_R", 8)),
+                p=int(settings.get("PASSWORD_SCRYPT_P", 1)),
+            ),
+            Pbkdf2Sha256.name: Pbkdf2Sha256(
+                int(settings.get("PASSWORD_PBKDF2_ITERATIONS", 600_000))
+            ),
+        }
+        workers = max(1, int(settings.get("PASSWORD_HASH_WORKERS", 4)))
+        self._slots = threading.BoundedSemaphore(workers)
+        self._cache_size = max(0, int(settings.get("PASSWORD_VERIFY_CACHE_SIZE", 1024)))
+        self._cache_ttl = float(settings.get("PASSWORD_VERIFY_CACHE_TTL_SECONDS", 60))
+        self._cache_key = secrets.token_bytes(32)
+        self._cache: OrderedDict[bytes, float] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _algorithm(self, name: str) -> HashAlgorithm:
+        alg = self._algorithms.get(name)
+        if alg is None:
+            cls = _ALGORITHMS.get(name)
+            if cls is None:
+                raise ValueError(f"Неизвестный алгоритм хеширования пароля '{name}'")
+            alg = self._algorithms[name] = cls()
+        return alg
+
+    @staticmethod
+    def gen_salt() -> str:
+        return secrets.token_hex(16)
+
+    # ---- хеширование ----
+    def hash(self, password: str, salt: str | None = None) -> str:
+        alg = self._algorithm(self.algorithm_name)
+        with self._slots:
+            return alg.hash(password, salt or self.gen_salt())
+
+    def needs_rehash(self, encoded: str) -> bool:
+        name = algorithm_name(encoded)
+        return name != self.algorithm_name or self._algorithm(name).needs_rehash(encoded)
+
+    # ---- проверка ----
+    def _key(self, password: str, encoded: str) -> bytes:
+        return hmac.digest(self._cache_key, f"{encoded}\0{password}".encode(), "sha256")
+
+    def _cached(self, key: bytes) -> bool:
+        with self._lock:
+            expires = self._cache.get(key)
+            if expires is None:
+                return False
+            if expires <= time.monotonic():
+                del self._cache[key]
+                return False
+            self._cache.move_to_end(key)
+            return True
+
+    def _remember(self, key: bytes) -> None:
+        if not self._cache_size:
+            return
+        with self._lock:
+            self._cache[key] = time.monotonic() + self._cache_ttl
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _verify_uncached(self, password: str, encoded: str, salt: str) -> bool:
+        try:
+            alg = self._algorithm(algorithm_name(encoded))
+            with self._slots:
+                return alg.verify(password, encoded, salt)
+        except (ValueError, KeyError, IndexError):
+            # испорченная запись хеша — просто неверный пароль
+            return False
+
+    def verify(self, password: str, encoded: str, salt: str = "") -> bool:
+        key = self._key(password, encoded)
+        if self._cached(key):
+            return True
+        ok = self._verify_uncached(password, encoded, salt)
+        if ok:
+            self._remember(key)
+        return ok
+
+    async def verify_async(self, password: str, encoded: str, salt: str = "") -> bool:
+        key = self._key(password, encoded)
+        if self._cached(key):
+            return True
+        import asyncio  # ~30 мс на старте, а нужен только async-вызывающим
+
+        ok = await asyncio.to_thread(self._verify_uncached, password, encoded, salt)
+        if ok:
+            self._remember(key)
+        return ok
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
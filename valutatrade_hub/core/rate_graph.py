@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import math
+import threading
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+
+from valutatrade_hub.core.utils import invert_rate, optional_numpy, pair_key
+from valutatrade_hub.infra.rates_cache import RatesCache, RatesSnapshot
+from valutatrade_hub.infra.settings import SettingsLoader
+
+_INF = math.inf
+
+
+@dataclass(frozen=True)
+class CrossRate:
+    rate: float
+    # самое старое звено пути: по нему проверяется TTL
+    updated_at: str | None
+    updated_dt: datetime | None
+    source: str
+    path: tuple[str, ...]
+
+
+@dataclass(frozen=True)
+class _Edge:
+    rate: float
+    updated_at: str | None
+    updated_dt: datetime | None
+    source: str
+    updated_ts: float | None
+    # ребро получено обращением курса обратной пары
+    inverse: bool = False
+
+    @property
+    def freshness(self) -> float:
+        return self.updated_ts if self.updated_ts is not None else -_INF
+
+
+class RateMatrix:
+    """
+    Полная матрица N×N курсов, построенная по одному снапшоту.
+
+    Недостающие пары триангулируются через валюты-опоры (pivots):
+    выбирается путь с минимальным числом звеньев, при равенстве —
+    с самым свежим «худшим» звеном. Это алгоритм Флойда—Уоршелла,
+    в котором промежуточными вершинами разрешены только опоры.
+
+    numpy используется (и импортируется) начиная с numpy_min_codes валют:
+    на десятке валют чистый Python строит матрицу быстрее, чем грузится numpy.
+    """
+
+    def __init__(
+        self, snapshot: RatesSnapshot, pivots: Iterable[str], numpy_min_codes: int = 64
+    ) -> None:
+        self.version = snapshot.version
+        self.last_refresh = snapshot.last_refresh
+
+        edges: dict[tuple[str, str], _Edge] = {}
+        for key, entry in snapshot.pairs.items():
+            if "_" not in key:
+                continue
+            a, b = key.split("_", 1)
+            stamp = (entry.updated_at, entry.updated_dt, entry.source, entry.updated_ts)
+            direct = _Edge(entry.rate, *stamp)
+            inverse = _Edge(invert_rate(entry.rate), *stamp, inverse=True)
+            for k, e in (((a, b), direct), ((b, a), inverse)):
+                # побеждает более свежее ребро; при равной свежести прямая пара важнее обратной
+                old = edges.get(k)
+                if (
+                    old is None
+                    or e.freshness > old.freshness
+                    or (e.freshness == old.freshness and old.inverse and not e.inverse)
+                ):
+                    edges[k] = e
+        self._edges = edges
+
+        self.codes: list[str] = sorted({c for pair in edges for c in pair})
+        self.index: dict[str, int] = {c: i for i, c in enumerate(self.codes)}
+        pivot_set = set(self.codes) if "*" in pivots else set(pivots)
+        self.pivots: list[str] = [c for c in self.codes if c in pivot_set]
+
+        self._np = optional_numpy() if len(self.codes) >= numpy_min_codes else None
+        if self._np is not None:
+            self._build_numpy()
+        else:
+            self._build_python()
+        self._cells: dict[tuple[int, int], CrossRate | None] = {}
+
+    # ---- построение ----
+    def _build_numpy(self) -> None:
+        np = self._np
+        n = len(self.codes)
+        rates = np.full((n, n), np.nan)
+        hops = np.full((n, n), np.inf)
+        fresh = np.full((n, n), -np.inf)
+        via = np.full((n, n), -1, dtype=np.int64)
+        np.fill_diagonal(rates, 1.0)
+        np.fill_diagonal(hops, 0.0)
+        np.fill_diagonal(fresh, np.inf)
+        for (a, b), e in self._edges.items():
+            i, j = self.index[a], self.index[b]
+            rates[i, j], hops[i, j], fresh[i, j] = e.rate, 1.0, e.freshness
+
+        for p in self.pivots:
+            k = self.index[p]
+            cand_h = hops[:, k, None] + hops[None, k, :]
+            cand_f = np.minimum(fresh[:, k, None], fresh[None, k, :])
+            better = (cand_h < hops) | ((cand_h == hops) & (cand_f > fresh))
+            if not better.any():
+                continue
+            rates = np.where(better, rates[:, k, None] * rates[None, k, :], rates)
+            hops = np.where(better, cand_h, hops)
+            fresh = np.where(better, cand_f, fresh)
+            via = np.where(better, k, via)
+
+        self._rates, self._hops, self._via = rates, hops, via
+
+    def _build_python(self) -> None:
+        n = len(self.codes)
+        rates = [[math.nan] * n for _ in range(n)]
+        hops = [[_INF] * n for _ in range(n)]
+        fresh = [[-_INF] * n for _ in range(n)]
+        via = [[-1] * n for _ in range(n)]
+        for i in range(n):
+            rates[i][i], hops[i][i], fresh[i][i] = 1.0, 0.0, _INF
+        for (a, b), e in self._edges.items():
+            i, j = self.index[a], self.index[b]
+            rates[i][j], hops[i][j], fresh[i][j] = e.rate, 1.0, e.freshness
+
+        for p in self.pivots:
+            k = self.index[p]
+            for i in range(n):
+                h_ik, f_ik, r_ik = hops[i][k], fresh[i][k], rates[i][k]
+                if h_ik == _INF:
+                    continue
+                row_h, row_f, row_r, row_v = hops[i], fresh[i], rates[i], via[i]
+                for j in range(n):
+                    h = h_ik + hops[k][j]
+                    f = min(f_ik, fresh[k][j])
+                    if h < row_h[j] or (h == row_h[j] and f > row_f[j]):
+                        row_h[j], row_f[j], row_r[j], row_v[j] = h, f, r_ik * rates[k][j], k
+
+        self._rates, self._hops, self._via = rates, hops, via
+
+    # ---- чтение ----
+    def _at(self, table: Any, i: int, j: int) -> Any:
+        return table[i, j] if self._np is not None else table[i][j]
+
+    def _path(self, i: int, j: int) -> list[int]:
+        k = int(self._at(self._via, i, j))
+        if k < 0:
+            return [i, j]
+        return self._path(i, k)[:-1] + self._path(k, j)
+
+    def lookup(self, from_code: str, to_code: str) -> CrossRate | None:
+        i, j = self.index.get(from_code), self.index.get(to_code)
+        if i is None or j is None or i == j:
+            return None
+        if (i, j) in self._cells:
+            return self._cells[(i, j)]
+
+        rate = float(self._at(self._rates, i, j))
+        cell: CrossRate | None = None
+        if not math.isnan(rate):
+            path = self._path(i, j)
+            legs = [
+                self._edges[(self.codes[a], self.codes[b])]
+                for a, b in zip(path[:-1], path[1:], strict=True)
+            ]
+            oldest = min(legs, key=lambda e: e.freshness)
+            sources = list(dict.fromkeys(e.source for e in legs))
+            cell = CrossRate(
+                rate=rate,
+                updated_at=oldest.updated_at,
+                updated_dt=oldest.updated_dt,
+                source="+".join(sources),
+                path=tuple(self.codes[x] for x in path),
+            )
+        self._cells[(i, j)] = cell
+        return cell
+
+    def rate_vector(self, codes: Sequence[str], base: str) -> list[float]:
+        """Курсы codes → base в том же порядке; base → 1.0, неизвестные — nan."""
+        j = self.index.get(base)
+        out: list[float] = []
+        for code in codes:
+            i = self.index.get(code)
+            if code == base:
+                out.append(1.0)
+            elif i is None or j is None:
+                out.append(math.nan)
+            else:
+                out.append(float(self._at(self._rates, i, j)))
+        return out
+
+    def rates_to(self, base: str) -> dict[str, float]:
+        """{"<CODE>_<base>": rate} для всех валют, которые выражаются через base."""
+        j = self.index.get(base)
+        if j is None:
+            return {}
+        out: dict[str, float] = {}
+        for code, i in self.index.items():
+            rate = float(self._at(self._rates, i, j))
+            if i != j and not math.isnan(rate):
+                out[pair_key(code, base)] = rate
+        return out
+
+
+class RateGraph:
+    """Держит RateMatrix актуальной: пересобирает её после каждой смены снапшота в RatesCache."""
+
+    def __init__(self, cache: RatesCache | None = None) -> None:
+        self._cache = cache or RatesCache()
+        self._lock = threading.Lock()
+        self._matrix: RateMatrix | None = None
+
+    def _pivots(self) -> list[str]:
+        settings = SettingsLoader()
+        default = [str(settings.get("DEFAULT_BASE_CURRENCY", "USD"))]
+        return [str(p) for p in settings.get("RATE_PIVOT_CURRENCIES", default)]
+
+    def matrix(self) -> RateMatrix:
+        snapshot = self._cache.snapshot()
+        m = self._matrix
+        if m is not None and m.version == snapshot.version:
+            return m
+        with self._lock:
+            if self._matrix is None or self._matrix.version != snapshot.version:
+                numpy_min = int(SettingsLoader().get("RATE_MATRIX_NUMPY_MIN_CODES", 64))
+                self._matrix = RateMatrix(snapshot, self._pivots(), numpy_min)
+            return self._matrix
+
+    def lookup(self, from_code: str, to_code: str) -> CrossRate | None:
+        return self.matrix().lookup(from_code, to_code)
@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from valutatrade_hub.core.models import Session
+from valutatrade_hub.infra.backends.base import file_stamp
+from valutatrade_hub.infra.backends.json_files import atomic_write_json, read_json
+from valutatrade_hub.infra.locking import file_lock
+from valutatrade_hub.infra.settings import SettingsLoader
+
+
+@dataclass(frozen=True)
+class _Entry:
+    session: Session
+    expires_at: float
+
+
+class SessionRegistry:
+    """
+    Сессии по токенам для одного экземпляра CoreService.
+
+    - срок жизни токена — SESSION_TTL_SECONDS с момента входа
+    - не больше SESSION_MAX_ENTRIES сессий: при переполнении вытесняется
+      та, к которой дольше всех не обращались (LRU)
+    - SESSIONS_FILE (необязательно): сессии переживают перезапуск процесса;
+      файл переписывается при входе/выходе (под file_lock, со слиянием
+      с состоянием на диске), обращения его не трогают
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float | None = None,
+        max_entries: int | None = None,
+        path: str | None = None,
+    ) -> None:
+        settings = SettingsLoader()
+        if ttl_seconds is None:
+            ttl_seconds = float(settings.get("SESSION_TTL_SECONDS", 43200))
+        if max_entries is None:
+            max_entries = int(settings.get("SESSION_MAX_ENTRIES", 10000))
+        if path is None:
+            path = str(settings.get("SESSIONS_FILE", ""))
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_entries = max(1, int(max_entries))
+        self.path = path or None
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._stamp: tuple[int, int, int] | None = None
+        if self.path:
+            self._load()
+
+    # ---- персистентность ----
+    def _read_file(self) -> dict[str, _Entry]:
+        assert self.path is not None
+        now = time.time()
+        raw: dict[str, Any] = read_json(self.path, default={})
+        out: dict[str, _Entry] = {}
+        for token, item in raw.items():
+            if float(item.get("expires_at", 0)) > now:
+                session = Session(user_id=int(item["user_id"]), username=str(item["username"]))
+                out[token] = _Entry(session, float(item["expires_at"]))
+        return out
+
+    def _adopt(self, on_disk: dict[str, _Entry]) -> None:
+        # файл — источник истины; порядок LRU сохраняется для известных токенов,
+        # чужие новые токены встают в начало (к ним ещё не обращались)
+        merged: OrderedDict[str, _Entry] = OrderedDict(
+            (t, e) for t, e in sorted(on_disk.items(), key=lambda kv: kv[1].expires_at)
+            if t not in self._entries
+        )
+        for token in self._entries:
+            if token in on_disk:
+                merged[token] = on_disk[token]
+        self._entries = merged
+        self._evict()
+
+    def _load(self) -> None:
+        assert self.path is not None
+        with file_lock(self.path, shared=True):
+            self._stamp = file_stamp(self.path)
+            self._adopt(self._read_file())
+
+    def _persist(self, added: dict[str, _Entry] | None = None, removed: Iterable[str] = ()) -> None:
+        """
+        Файл общий для процессов (CLI и сервер): под file_lock изменения
+        сливаются с тем, что на диске, а не затирают чужие сессии.
+        """
+        if not self.path:
+            self._evict()
+            return
+        with file_lock(self.path):
+            on_disk = self._read_file()
+            for token in removed:
+                on_disk.pop(token, None)
+            on_disk.update(added or {})
+            self._adopt(on_disk)
+            atomic_write_json(
+                self.path,
+                {
+                    token: {
+                        "user_id": e.session.user_id,
+                        "username": e.session.username,
+                        "expires_at": e.expires_at,
+                    }
+                    for token, e in self._entries.items()
+                },
+            )
+            self._stamp = file_stamp(self.path)
+
+    def _evict(self) -> None:
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    # ---- API ----
+    def create(self, session: Session) -> str:
+        token = secrets.token_urlsafe(32)
+        entry = _Entry(session, time.time() + self.ttl_seconds)
+        with self._lock:
+            self._entries[token] = entry
+            self._persist(added={token: entry})
+        return token
+
+    def get(self, token: str | None) -> Session | None:
+        """Сессия по токену или None (нет такого токена / истёк)."""
+        if not token:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None and self.path and file_stamp(self.path) != self._stamp:
+                # токен мог выдать другой процесс
+                self._load()
+                entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry.expires_at <= time.time():
+                del self._entries[token]
+                self._persist(removed=[token])
+                return None
+            self._entries.move_to_end(token)
+            return entry.session
+
+    def revoke(self, token: str | None) -> bool:
+        with self._lock:
+            if self._entries.pop(token or "", None) is None:
+                return False
+            self._persist(removed=[token or ""])
+            return True
+
+    def revoke_user(self, user_id: int) -> int:
+        """Завершить все сессии пользователя. Возвращает их число."""
+        with self._lock:
+            tokens = [t for t, e in self._entries.items() if e.session.user_id == int(user_id)]
+            for t in tokens:
+                del self._entries[t]
+            if tokens:
+                self._persist(removed=tokens)
+            return len(tokens)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
@@ -1,51 +1,85 @@
 from __future__ import annotations
 
-import secrets
 from datetime import datetime, timezone
 from typing import Any
 
 from valutatrade_hub.core.currencies import get_currency
 from valutatrade_hub.decorators import log_action
-from valutatrade_hub.core.exceptions import ApiRequestError, CurrencyNotFoundError, InsufficientFundsError
+from valutatrade_hub.core.exceptions import (
+    ApiRequestError,
+    ConcurrentModificationError,
+    CurrencyNotFoundError,
+    InsufficientFundsError,
+    UserAlreadyExistsError,
+)
 from valutatrade_hub.core.models import Portfolio, Session, User
-from valutatrade_hub.core.utils import invert_rate, is_rate_fresh, pair_key, validate_amount, validate_currency_code
+from valutatrade_hub.core.passwords import PasswordHasher
+from valutatrade_hub.core.rate_graph import CrossRate, RateGraph
+from valutatrade_hub.core.sessions import SessionRegistry
+from valutatrade_hub.core.utils import (
+    is_dt_fresh,
+    pair_key,
+    validate_amount,
+    validate_currency_code,
+)
+from valutatrade_hub.core.valuation import BalanceMatrix, BulkValuation, value_balances
 from valutatrade_hub.infra.database import DatabaseManager
+from valutatrade_hub.infra.locking import KeyedLocks
+from valutatrade_hub.infra.rates_cache import RatesCache
 from valutatrade_hub.infra.settings import SettingsLoader
+from valutatrade_hub.infra.users import UserRepository
 
 
 def _utc_now() -> datetime:
     return datetime.now(tz=timezone.utc)
 
 
-def _gen_salt() -> str:
-    # простая соль; можно усложнить, но по ТЗ достаточно
-    return secrets.token_hex(8)
-
-
-def _hash(password: str, salt: str) -> str:
-    import hashlib
-
-    return hashlib.sha256((password + salt).encode("utf-8")).hexdigest()
+def _batch_fields(args: tuple[Any, ...], kwargs: dict[str, Any], result: Any) -> dict[str, Any]:
+    # в журнал действий — размер пакета и итоги по статусам, а не поля одной сделки
+    orders = kwargs.get("orders", args[1] if len(args) > 1 else None)
+    fields: dict[str, Any] = {"orders": len(orders) if orders is not None else None}
+    for status in ("ok", "error", "skipped"):
+        fields[status] = sum(1 for r in result if r["status"] == status) if result else None
+    return fields
 
 
 class CoreService:
-    def __init__(self) -> None:
+    def __init__(self, sessions: SessionRegistry | None = None) -> None:
         self._settings = SettingsLoader()
         self._db = DatabaseManager()
-        self._session: Session | None = None
+        self._users = UserRepository(self._db)
+        self._hasher = PasswordHasher()
+        self._rates = RateGraph(RatesCache())
+        # сессии по токенам: один экземпляр обслуживает многих пользователей;
+        # _token — текущая сессия интерактивного CLI
+        self.sessions = sessions if sessions is not None else SessionRegistry()
+        self._token: str | None = None
+        # сделки одного пользователя в процессе идут по очереди, разных — параллельно;
+        # между процессами защищает версия портфеля (compare-and-swap при записи)
+        self._user_locks = KeyedLocks()
+        self._save_retries = max(1, int(self._settings.get("PORTFOLIO_SAVE_RETRIES", 5)))
 
     @property
     def session(self) -> Session | None:
-        return self._session
+        return self.sessions.get(self._token)
 
-    def require_login(self) -> Session:
-        if not self._session:
+    def require_login(self, session: Session | None = None) -> Session:
+        sess = session or self.session
+        if not sess:
             raise PermissionError("Сначала выполните login")
-        return self._session
+        return sess
+
+    def resolve_session(self, token: str | None) -> Session:
+        """Сессия по токену; PermissionError, если токена нет или он истёк."""
+        session = self.sessions.get(token)
+        if session is None:
+            raise PermissionError("Сессия не найдена или истекла. Выполните login")
+        return session
 
     # ---------- USERS ----------
     @log_action("REGISTER")
-    def register(self, username: str, password: str) -> str:
+    def create_user(self, username: str, password: str) -> int:
+        """Зарегистрировать пользователя и вернуть его id (UserAlreadyExistsError — имя занято)."""
         if not isinstance(username, str) or not username.strip():
             raise ValueError("--username обязателен и не пустой")
         if not isinstance(password, str) or not password:
@@ -53,91 +87,90 @@ class CoreService:
         if len(password) < 4:
             raise ValueError("Пароль должен быть не короче 4 символов")
 
-        users = self._db.load_users()
-        if any(u["username"] == username for u in users):
-            return f"Имя пользователя '{username}' уже занято"
+        if self._users.exists(username):
+            raise UserAlreadyExistsError(username)
 
-        new_id = (max((u["user_id"] for u in users), default=0) + 1) if users else 1
-        salt = _gen_salt()
-        hashed = _hash(password, salt)
+        salt = self._hasher.gen_salt()
+        hashed = self._hasher.hash(password, salt)
         reg_date = _utc_now()
 
-        users.append(
+        new_id = self._users.create(
             {
-                "user_id": new_id,
                 "username": username,
                 "hashed_password": hashed,
                 "salt": salt,
                 "registration_date": reg_date.isoformat(),
             }
         )
-        self._db.save_users(users)
+        if new_id is None:
+            # имя заняли параллельно, пока считался хеш
+            raise UserAlreadyExistsError(username)
 
         # создать пустой портфель
-        portfolios = self._db.load_portfolios()
-        portfolios.append({"user_id": new_id, "wallets": {}})
-        self._db.save_portfolios(portfolios)
+        self._db.save_portfolio({"user_id": new_id, "wallets": {}})
+        return new_id
 
+    def register(self, username: str, password: str) -> str:
+        try:
+            new_id = self.create_user(username=username, password=password)
+        except UserAlreadyExistsError as e:
+            return str(e)
         return f"Пользователь '{username}' зарегистрирован (id={new_id}). Войдите: login --username {username} --password ****"
 
     @log_action("LOGIN")
-    def login(self, username: str, password: str) -> str:
-        users = self._db.load_users()
-        u = next((x for x in users if x["username"] == username), None)
+    def authenticate(self, username: str, password: str) -> Session:
+        """Проверить пароль и вернуть сессию, не меняя состояние сервиса (серверный режим)."""
+        u = self._users.get_by_username(username)
         if not u:
-            return f"Пользователь '{username}' не найден"
+            raise PermissionError(f"Пользователь '{username}' не найден")
 
-        salt = u.get("salt", "")
-        hashed = _hash(password, salt)
-        if hashed != u.get("hashed_password"):
-            return "Неверный пароль"
+        hashed = str(u.get("hashed_password", ""))
+        if not self._hasher.verify(password, hashed, str(u.get("salt", ""))):
+            raise PermissionError("Неверный пароль")
+        if self._hasher.needs_rehash(hashed):
+            # старый sha256 или ослабленные параметры KDF — пересчитываем, пока знаем пароль
+            salt = self._hasher.gen_salt()
+            hashed = self._hasher.hash(password, salt)
+            self._users.save({**u, "hashed_password": hashed, "salt": salt})
 
-        self._session = Session(user_id=int(u["user_id"]), username=username)
+        return Session(user_id=int(u["user_id"]), username=username)
+
+    def open_session(self, username: str, password: str) -> str:
+        """Войти и получить токен новой сессии (текущую сессию CLI не трогает)."""
+        return self.sessions.create(self.authenticate(username=username, password=password))
+
+    def login(self, username: str, password: str) -> str:
+        try:
+            token = self.open_session(username, password)
+        except PermissionError as e:
+            return str(e)
+        self.sessions.revoke(self._token)
+        self._token = token
         return f"Вы вошли как '{username}'"
 
+    def logout(self, token: str | None = None) -> bool:
+        """Завершить сессию по токену (по умолчанию — текущую сессию CLI)."""
+        if token is None or token == self._token:
+            token, self._token = self._token, None
+        return self.sessions.revoke(token)
+
     # ---------- PORTFOLIO ----------
     def _load_portfolio(self, user_id: int) -> Portfolio:
-        portfolios = self._db.load_portfolios()
-        raw = next((p for p in portfolios if int(p["user_id"]) == int(user_id)), None)
+        raw = self._db.get_portfolio(user_id)
         if not raw:
             # если нет — создаём пустой
             return Portfolio(user_id=user_id, wallets={})
         return Portfolio.from_json(raw)
 
     def _save_portfolio(self, portfolio: Portfolio) -> None:
-        portfolios = self._db.load_portfolios()
-        found = False
-        for i, p in enumerate(portfolios):
-            if int(p["user_id"]) == portfolio.user_id:
-                portfolios[i] = portfolio.to_json()
-                found = True
-                break
-        if not found:
-            portfolios.append(portfolio.to_json())
-        self._db.save_portfolios(portfolios)
-
-    def _get_exchange_rates_snapshot(self) -> dict[str, Any]:
-        """
-        rates.json формат:
-        {
-          "pairs": { "BTC_USD": { "rate": 59337.21, "updated_at": "...", "source": "..." }, ... },
-          "last_refresh": "..."
-        }
-        """
-        return self._db.load_rates()
-
-    def _pairs_to_simple(self, rates_snapshot: dict[str, Any]) -> dict[str, float]:
-        pairs = rates_snapshot.get("pairs") or {}
-        out: dict[str, float] = {}
-        for k, v in pairs.items():
-            try:
-                out[k] = float(v["rate"])
-            except Exception:
-                continue
-        return out
-
-    def show_portfolio(self, base_currency: str = "USD") -> dict[str, Any]:
-        sess = self.require_login()
+        # бэкенд сам решает, как записать одну сущность (журнал — одна строка);
+        # если портфель изменили после чтения — ConcurrentModificationError
+        self._db.save_portfolio(portfolio.to_json(), expected_version=portfolio.version)
+
+    def show_portfolio(
+        self, base_currency: str = "USD", session: Session | None = None
+    ) -> dict[str, Any]:
+        sess = self.require_login(session)
         validate_currency_code(base_currency)
         # валюта должна быть известна по реестру (ТЗ: ошибка неизвестной базовой)
         get_currency(base_currency)
@@ -149,8 +182,8 @@ class CoreService:
                 "message": f"Портфель пользователя '{sess.username}' пуст. Купите валюту командой buy.",
             }
 
-        rates = self._get_exchange_rates_snapshot()
-        simple_rates = self._pairs_to_simple(rates)
+        # курсы всех валют к базовой, включая триангулированные через опорные валюты
+        simple_rates = self._rates.matrix().rates_to(base_currency)
 
         rows: list[dict[str, Any]] = []
         for code, wallet in portfolio.wallets.items():
@@ -165,12 +198,27 @@ class CoreService:
                 }
             )
 
-        total = portfolio.get_total_value(base_currency=base_currency, exchange_rates=simple_rates)
+        # та же формула, что и Portfolio.get_total_value, без второго прохода по кошелькам
+        total = sum(row["value_in_base"] for row in rows)
         return {"empty": False, "base": base_currency, "rows": rows, "total": total, "username": sess.username}
 
+    def value_all_portfolios(
+        self, base_currencies: list[str] | None = None
+    ) -> dict[str, BulkValuation]:
+        """
+        Оценка всех портфелей сразу (для отчётов): итог по каждому пользователю
+        и суммарная позиция по каждой валюте в каждой из base_currencies.
+        """
+        bases = base_currencies or [str(self._settings.get("DEFAULT_BASE_CURRENCY", "USD"))]
+        for base in bases:
+            validate_currency_code(base)
+            get_currency(base)
+        matrix = BalanceMatrix.from_portfolios(self._db.load_portfolios())
+        return value_balances(matrix, self._rates.matrix(), bases)
+
     # ---------- BUY/SELL ----------
-    @log_action("BUY", verbose=True)
-    def buy(self, user_id: int, currency_code: str, amount: float, base_currency: str = "USD") -> dict[str, Any]:
+    @staticmethod
+    def _validate_trade(currency_code: str, amount: float, base_currency: str) -> None:
         validate_amount(amount)
         validate_currency_code(currency_code)
         validate_currency_code(base_currency)
@@ -179,69 +227,189 @@ class CoreService:
         get_currency(currency_code)
         get_currency(base_currency)
 
-        portfolio = self._load_portfolio(user_id)
+    @staticmethod
+    def _apply_trade(
+        portfolio: Portfolio,
+        side: str,
+        currency_code: str,
+        amount: float,
+        base_currency: str,
+        quote: tuple[float, str, str],
+    ) -> dict[str, Any]:
+        """Изменить кошелёк в портфеле (в памяти) и собрать результат сделки."""
         wallet = portfolio.get_wallet(currency_code)
-        if wallet is None:
-            wallet = portfolio.add_currency(currency_code)
-
-        before = wallet.balance
-        wallet.deposit(amount)
-        after = wallet.balance
+        if side == "buy":
+            if wallet is None:
+                wallet = portfolio.add_currency(currency_code)
+            before = wallet.money
+            wallet.deposit(amount)
+        else:
+            if wallet is None:
+                raise ValueError(
+                    f"У вас нет кошелька '{currency_code}'. "
+                    "Добавьте валюту: она создаётся автоматически при первой покупке."
+                )
+            before = wallet.money
+            # withdraw может бросить InsufficientFundsError (ТЗ)
+            wallet.withdraw(amount)
+        after = wallet.money
+        # сумма, округлённая до точности валюты, — столько реально зачислено/списано
+        applied = abs((after - before).amount)
 
         # оценочная стоимость
-        rate, updated_at, source = self.get_rate(from_code=currency_code, to_code=base_currency, allow_stale=True)
-        est_cost = amount * rate
-
-        self._save_portfolio(portfolio)
+        rate, updated_at, source = quote
+        value_key = "estimated_cost" if side == "buy" else "estimated_revenue"
         return {
             "currency": currency_code,
-            "amount": amount,
-            "before": before,
-            "after": after,
+            "amount": applied,
+            "before": before.amount,
+            "after": after.amount,
             "rate": rate,
             "base": base_currency,
-            "estimated_cost": est_cost,
+            value_key: applied * rate,
             "updated_at": updated_at,
             "source": source,
         }
 
-    @log_action("SELL", verbose=True)
-    def sell(self, user_id: int, currency_code: str, amount: float, base_currency: str = "USD") -> dict[str, Any]:
-        validate_amount(amount)
-        validate_currency_code(currency_code)
-        validate_currency_code(base_currency)
-
-        get_currency(currency_code)
-        get_currency(base_currency)
+    def _trade(
+        self, side: str, user_id: int, currency_code: str, amount: float, base_currency: str
+    ) -> dict[str, Any]:
+        self._validate_trade(currency_code, amount, base_currency)
+        quote = self.get_rate(from_code=currency_code, to_code=base_currency, allow_stale=True)
+        with self._user_locks.hold([user_id]):
+            attempt = 0
+            while True:
+                # при конфликте версий перечитываем портфель и применяем сделку заново
+                portfolio = self._load_portfolio(user_id)
+                result = self._apply_trade(
+                    portfolio, side, currency_code, amount, base_currency, quote
+                )
+                try:
+                    self._save_portfolio(portfolio)
+                    return result
+                except ConcurrentModificationError:
+                    attempt += 1
+                    if attempt >= self._save_retries:
+                        raise
 
-        portfolio = self._load_portfolio(user_id)
-        wallet = portfolio.get_wallet(currency_code)
-        if wallet is None:
-            raise ValueError(
-                f"У вас нет кошелька '{currency_code}'. Добавьте валюту: она создаётся автоматически при первой покупке."
-            )
+    @log_action("BUY", verbose=True)
+    def buy(
+        self, user_id: int, currency_code: str, amount: float, base_currency: str = "USD"
+    ) -> dict[str, Any]:
+        return self._trade("buy", user_id, currency_code, amount, base_currency)
 
-        before = wallet.balance
-        # withdraw может бросить InsufficientFundsError (ТЗ)
-        wallet.withdraw(amount)
-        after = wallet.balance
+    @log_action("SELL", verbose=True)
+    def sell(self, user_id: int, currency_code: str, amount: float, base_currency: str = "USD") -> dict[str, Any]:
+        return self._trade("sell", user_id, currency_code, amount, base_currency)
 
-        rate, updated_at, source = self.get_rate(from_code=currency_code, to_code=base_currency, allow_stale=True)
-        revenue = amount * rate
+    @log_action("BATCH", describe=_batch_fields)
+    def execute_batch(
+        self, orders: list[dict[str, Any]], atomic: bool = True
+    ) -> list[dict[str, Any]]:
+        """
+        Пакет сделок: [{"side": "buy"|"sell", "user_id": 1, "currency_code": "BTC",
+        "amount": 0.5, "base_currency": "USD"}, ...].
+
+        - все заявки валидируются заранее, курс берётся один раз на пару
+        - портфели всех пользователей пакета загружаются одним чтением, заявки применяются
+          в памяти в исходном порядке, запись — одна на весь пакет
+        - atomic=True: при любой ошибке ничего не записывается
+          (успешные заявки получают status="skipped");
+          atomic=False: записываются все успешные заявки
+        - запись — compare-and-swap по версиям всех затронутых портфелей;
+          при конфликте пакет применяется заново к свежим портфелям
+
+        Возвращает результаты по каждой заявке: поля как у buy/sell
+        плюс side, user_id, status ("ok" | "error" | "skipped") и error.
+        """
+        results: list[dict[str, Any]] = []
+        quotes: dict[tuple[str, str], tuple[float, str, str] | Exception] = {}
 
-        self._save_portfolio(portfolio)
-        return {
-            "currency": currency_code,
-            "amount": amount,
-            "before": before,
-            "after": after,
-            "rate": rate,
-            "base": base_currency,
-            "estimated_revenue": revenue,
-            "updated_at": updated_at,
-            "source": source,
+        # 1. валидация и курсы — до каких-либо изменений
+        parsed: list[tuple[str, int, str, float, str] | None] = []
+        for order in orders:
+            try:
+                side = str(order.get("side", "")).lower()
+                if side not in ("buy", "sell"):
+                    raise ValueError(
+                        f"Неизвестный тип заявки '{order.get('side')}' (ожидается buy/sell)"
+                    )
+                user_id = int(order["user_id"])
+                code = order["currency_code"]
+                amount = order["amount"]
+                base = order.get("base_currency") or "USD"
+                self._validate_trade(code, amount, base)
+                if (code, base) not in quotes:
+                    try:
+                        quotes[(code, base)] = self.get_rate(code, base, allow_stale=True)
+                    except Exception as e:  # noqa: BLE001
+                        quotes[(code, base)] = e
+                quote = quotes[(code, base)]
+                if isinstance(quote, Exception):
+                    raise quote
+                parsed.append((side, user_id, code, amount, base))
+                results.append({"side": side, "user_id": user_id, "status": "ok", "error": None})
+            except Exception as e:  # noqa: BLE001
+                parsed.append(None)
+                results.append(_order_error(order, e))
+
+        users = {item[1] for item in parsed if item is not None}
+        with self._user_locks.hold(users):
+            attempt = 0
+            while True:
+                try:
+                    return self._apply_batch(parsed, [dict(r) for r in results], quotes, atomic)
+                except ConcurrentModificationError:
+                    attempt += 1
+                    if attempt >= self._save_retries:
+                        raise
+
+    def _apply_batch(
+        self,
+        parsed: list[tuple[str, int, str, float, str] | None],
+        results: list[dict[str, Any]],
+        quotes: dict[tuple[str, str], tuple[float, str, str] | Exception],
+        atomic: bool,
+    ) -> list[dict[str, Any]]:
+        touched: set[int] = set()
+        # все портфели пакета — одним проходом по хранилищу
+        users = {item[1] for item in parsed if item is not None}
+        raw = self._db.get_portfolios(users)
+        portfolios = {
+            uid: Portfolio.from_json(raw[uid]) if uid in raw else Portfolio(user_id=uid, wallets={})
+            for uid in users
         }
 
+        # 2. применение в памяти, по портфелю на пользователя
+        for item, result in zip(parsed, results, strict=True):
+            if item is None:
+                continue
+            side, user_id, code, amount, base = item
+            quote = quotes[(code, base)]
+            assert not isinstance(quote, Exception)
+            try:
+                result.update(
+                    self._apply_trade(portfolios[user_id], side, code, amount, base, quote)
+                )
+                touched.add(user_id)
+            except Exception as e:  # noqa: BLE001
+                result.update(status="error", error=f"{type(e).__name__}: {e}")
+
+        failed = any(r["status"] == "error" for r in results)
+        if atomic and failed:
+            for r in results:
+                if r["status"] == "ok":
+                    r["status"] = "skipped"
+            return results
+
+        # 3. одна запись на весь пакет
+        if touched:
+            self._db.save_portfolios_many(
+                [portfolios[uid].to_json() for uid in sorted(touched)],
+                expected_versions={uid: portfolios[uid].version for uid in touched},
+            )
+        return results
+
     # ---------- GET RATE ----------
     def get_rate(
         self,
@@ -251,6 +419,8 @@ class CoreService:
     ) -> tuple[float, str, str]:
         """
         Возвращает (rate, updated_at, source).
+        Пары без прямого курса триангулируются через опорные валюты (RATE_PIVOT_CURRENCIES);
+        updated_at — время самого старого звена, source — источники звеньев через "+".
         TTL берём из SettingsLoader.
         Если устарело и allow_stale=False -> ApiRequestError (Core не обязан сам ходить в сеть).
         """
@@ -262,32 +432,32 @@ class CoreService:
         get_currency(to_code)
 
         ttl = int(self._settings.get("RATES_TTL_SECONDS", 300))
-        rates = self._db.load_rates()
-        pairs = rates.get("pairs") or {}
-        key = pair_key(from_code, to_code)
-        if key in pairs:
-            entry = pairs[key]
-            updated_at = entry.get("updated_at")
-            source = entry.get("source", "unknown")
-            rate = float(entry.get("rate"))
-            if updated_at and is_rate_fresh(updated_at, ttl):
-                return rate, updated_at, source
-            if allow_stale:
-                return rate, updated_at or "unknown", source
-            raise ApiRequestError("Кеш устарел (TTL). Выполните update-rates или повторите позже.")
-
-        # обратный курс из кеша, если есть
-        inv_key = pair_key(to_code, from_code)
-        if inv_key in pairs:
-            entry = pairs[inv_key]
-            updated_at = entry.get("updated_at")
-            source = entry.get("source", "unknown")
-            inv_rate = float(entry.get("rate"))
-            rate = invert_rate(inv_rate)
-            if updated_at and is_rate_fresh(updated_at, ttl):
-                return rate, updated_at, source
-            if allow_stale:
-                return rate, updated_at or "unknown", source
-            raise ApiRequestError("Кеш устарел (TTL). Выполните update-rates или повторите позже.")
-
-        raise ApiRequestError(f"Курс {from_code}→{to_code} недоступен. Повторите попытку позже.")
+        cross = self._rates.lookup(from_code, to_code)
+        if cross is None:
+            raise ApiRequestError(
+                f"Курс {from_code}→{to_code} недоступен. Повторите попытку позже."
+            )
+        return self._checked_rate(cross, ttl, allow_stale)
+
+    @staticmethod
+    def _checked_rate(cross: CrossRate, ttl: int, allow_stale: bool) -> tuple[float, str, str]:
+        if cross.updated_dt is not None and is_dt_fresh(cross.updated_dt, ttl):
+            return cross.rate, cross.updated_at or "unknown", cross.source
+        if allow_stale:
+            return cross.rate, cross.updated_at or "unknown", cross.source
+        raise ApiRequestError("Кеш устарел (TTL). Выполните update-rates или повторите позже.")
+
+    def list_rate_currencies(self) -> list[str]:
+        """Валюты, для которых в кеше есть хотя бы один курс."""
+        return list(self._rates.matrix().codes)
+
+
+def _order_error(order: dict[str, Any], e: Exception) -> dict[str, Any]:
+    return {
+        "side": order.get("side"),
+        "user_id": order.get("user_id"),
+        "currency": order.get("currency_code"),
+        "amount": order.get("amount"),
+        "status": "error",
+        "error": f"{type(e).__name__}: {e}",
+    }
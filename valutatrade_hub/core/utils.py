@@ -3,6 +3,24 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Any
 
+_numpy: Any = None
+_numpy_checked = False
+
+
+def optional_numpy() -> Any:
+    """
+    Модуль numpy или None, если он не установлен.
+    Импорт откладывается до первого вызова: numpy — это ~60 мс старта CLI.
+    """
+    global _numpy, _numpy_checked
+    if not _numpy_checked:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - numpy необязателен
+            numpy = None  # type: ignore[assignment]
+        _numpy, _numpy_checked = numpy, True
+    return _numpy
+
 
 def now_utc() -> datetime:
     return datetime.now(tz=timezone.utc)
@@ -44,7 +62,10 @@ def validate_amount(amount: Any) -> None:
 
 
 def is_rate_fresh(updated_at_iso: str, ttl_seconds: int) -> bool:
-    updated_at = parse_iso_dt(updated_at_iso)
+    return is_dt_fresh(parse_iso_dt(updated_at_iso), ttl_seconds)
+
+
+def is_dt_fresh(updated_at: datetime, ttl_seconds: int) -> bool:
     age = (now_utc() - updated_at).total_seconds()
     return age <= ttl_seconds
 
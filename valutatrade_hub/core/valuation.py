@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import math
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from valutatrade_hub.core.rate_graph import RateMatrix
+from valutatrade_hub.core.utils import optional_numpy
+
+
+@dataclass
+class BalanceMatrix:
+    """
+    Колоночное представление всех портфелей: строки — пользователи, столбцы — валюты.
+    balances — numpy.ndarray (U×C) или список строк, если numpy не установлен.
+    """
+
+    user_ids: list[int]
+    codes: list[str]
+    balances: Any
+
+    @classmethod
+    def from_portfolios(cls, portfolios: Iterable[dict[str, Any]]) -> BalanceMatrix:
+        user_ids: list[int] = []
+        col: dict[str, int] = {}
+        rows: list[int] = []
+        cols: list[int] = []
+        vals: list[float] = []
+        for r, p in enumerate(portfolios):
+            user_ids.append(int(p["user_id"]))
+            for code, w in (p.get("wallets") or {}).items():
+                c = col.setdefault(code, len(col))
+                rows.append(r)
+                cols.append(c)
+                vals.append(float(w.get("balance", 0.0)))
+        codes = list(col)
+
+        np = optional_numpy()
+        if np is not None:
+            balances = np.zeros((len(user_ids), len(codes)))
+            if vals:
+                balances[np.asarray(rows), np.asarray(cols)] = np.asarray(vals)
+        else:
+            balances = [[0.0] * len(codes) for _ in user_ids]
+            for r, c, v in zip(rows, cols, vals, strict=True):
+                balances[r][c] = v
+        return cls(user_ids=user_ids, codes=codes, balances=balances)
+
+
+@dataclass(frozen=True)
+class BulkValuation:
+    base: str
+    # user_id → суммарная стоимость портфеля в base
+    totals: dict[int, float]
+    # валюта → суммарная стоимость всех кошельков этой валюты в base
+    exposures: dict[str, float]
+    # валюты, для которых нет курса к base (их вклад считается 0, как в get_total_value)
+    unpriced: list[str]
+
+
+def value_balances(
+    matrix: BalanceMatrix,
+    rates: RateMatrix,
+    bases: Sequence[str],
+) -> dict[str, BulkValuation]:
+    """
+    Стоимость всех портфелей сразу в нескольких базовых валютах:
+    одно умножение матрицы балансов (U×C) на матрицу курсов (C×K).
+    """
+    vectors = [rates.rate_vector(matrix.codes, base) for base in bases]
+    unpriced = [[c for c, r in zip(matrix.codes, v, strict=True) if math.isnan(r)] for v in vectors]
+
+    out: dict[str, BulkValuation] = {}
+    np = optional_numpy()
+    if np is not None:
+        r = np.nan_to_num(np.asarray(vectors, dtype=float).reshape(len(bases), len(matrix.codes)).T)
+        totals = matrix.balances @ r
+        exposures = matrix.balances.sum(axis=0)[:, None] * r
+        for k, base in enumerate(bases):
+            out[base] = BulkValuation(
+                base=base,
+                totals=dict(zip(matrix.user_ids, totals[:, k].tolist(), strict=True)),
+                exposures=dict(zip(matrix.codes, exposures[:, k].tolist(), strict=True)),
+                unpriced=unpriced[k],
+            )
+        return out
+
+    for k, base in enumerate(bases):
+        vec = [0.0 if math.isnan(x) else x for x in vectors[k]]
+        totals_py = {
+            uid: sum(b * x for b, x in zip(row, vec, strict=True))
+            for uid, row in zip(matrix.user_ids, matrix.balances, strict=True)
+        }
+        col_sums = [sum(col) for col in zip(*matrix.balances, strict=True)] or [0.0] * len(vec)
+        out[base] = BulkValuation(
+            base=base,
+            totals=totals_py,
+            exposures={c: s * x for c, s, x in zip(matrix.codes, col_sums, vec, strict=True)},
+            unpriced=unpriced[k],
+        )
+    return out
@@ -8,7 +8,42 @@ P = ParamSpec("P")
 R = TypeVar("R")
 
 
-def log_action(action: str, verbose: bool = False) -> Callable[[Callable[P, R]], Callable[P, R]]:
+class _ActionMessage:
+    """
+    Текст записи о действии. Строится только при форматировании записи,
+    то есть в потоке записи логов, а не в потоке операции.
+    """
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: dict[str, Any]) -> None:
+        self.fields = fields
+
+    def __str__(self) -> str:
+        f = self.fields
+        if "username" not in f:
+            # поля задала сама операция (log_action(describe=...))
+            text = " ".join(f"{k}={v}" for k, v in f.items() if k != "action")
+            return f"{f['action']} {text}"
+        who = f"user='{f['username']}'" if f["username"] else f"user_id={f['user_id']}"
+        text = f"{f['action']} {who} currency='{f['currency_code']}' amount={f['amount']}"
+        if f["rate"] is not None:
+            text += f" rate={f['rate']}"
+        if f["base"] is not None:
+            text += f" base='{f['base']}'"
+        text += f" result={f['result']}"
+        if "error_type" in f:
+            text += f" error_type={f['error_type']} error_message={f['error_message']!r}"
+        if "verbose" in f:
+            text += f" verbose={f['verbose']}"
+        return text
+
+
+def log_action(
+    action: str,
+    verbose: bool = False,
+    describe: Callable[[tuple[Any, ...], dict[str, Any], Any], dict[str, Any]] | None = None,
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
     """
     Декоратор доменных операций.
     Логирует поля:
@@ -16,39 +51,47 @@ def log_action(action: str, verbose: bool = False) -> Callable[[Callable[P, R]],
       result (OK/ERROR), error_type/error_message.
 
     verbose=True: логирует доп. контекст (например, balance before/after если передали в return).
+
+    describe(args, kwargs, result) — свои поля вместо username/currency/amount
+    для операций, у которых их нет (пакет сделок); при ошибке result=None.
+
+    В операции собирается только dict полей (он же — extra["action_fields"]
+    для JSON-формата); текст строится при записи.
     """
     logger = logging.getLogger("valutatrade.actions")
 
     def decorator(func: Callable[P, R]) -> Callable[P, R]:
         @functools.wraps(func)
         def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            if not logger.isEnabledFor(logging.INFO):
+                return func(*args, **kwargs)
+
             # По договорённости usecases передают именованные kwargs
-            username = kwargs.get("username")
-            user_id = kwargs.get("user_id")
-            currency_code = kwargs.get("currency_code")
-            amount = kwargs.get("amount")
-            base = kwargs.get("base_currency") or kwargs.get("base")
-            rate = kwargs.get("rate")
-
-            who = f"user='{username}'" if username else f"user_id={user_id}"
-            common = f"{action} {who} currency='{currency_code}' amount={amount}"
-            if rate is not None:
-                common += f" rate={rate}"
-            if base is not None:
-                common += f" base='{base}'"
+            fields: dict[str, Any] = {"action": action} if describe else {
+                "action": action,
+                "username": kwargs.get("username"),
+                "user_id": kwargs.get("user_id"),
+                "currency_code": kwargs.get("currency_code"),
+                "amount": kwargs.get("amount"),
+                "rate": kwargs.get("rate"),
+                "base": kwargs.get("base_currency") or kwargs.get("base"),
+            }
 
             try:
                 result = func(*args, **kwargs)
-                logger.info("%s result=OK%s", common, f" verbose={result}" if verbose else "")
-                return result
             except Exception as e:  # noqa: BLE001 (по ТЗ логировать любые ошибки)
-                logger.info(
-                    "%s result=ERROR error_type=%s error_message=%r",
-                    common,
-                    type(e).__name__,
-                    str(e),
-                )
+                if describe:
+                    fields.update(describe(args, kwargs, None))
+                fields.update(result="ERROR", error_type=type(e).__name__, error_message=str(e))
+                logger.info("%s", _ActionMessage(fields), extra={"action_fields": fields})
                 raise
+            if describe:
+                fields.update(describe(args, kwargs, result))
+            fields["result"] = "OK"
+            if verbose:
+                fields["verbose"] = result
+            logger.info("%s", _ActionMessage(fields), extra={"action_fields": fields})
+            return result
 
         return wrapper
 
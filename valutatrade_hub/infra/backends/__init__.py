@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from valutatrade_hub.infra.backends.base import StorageBackend
+from valutatrade_hub.infra.backends.journal import JournalBackend
+from valutatrade_hub.infra.backends.json_files import JsonFileBackend
+from valutatrade_hub.infra.backends.sqlite import SqliteBackend
+from valutatrade_hub.infra.settings import SettingsLoader
+
+_BACKENDS: dict[str, type[StorageBackend]] = {
+    JsonFileBackend.name: JsonFileBackend,
+    JournalBackend.name: JournalBackend,
+    SqliteBackend.name: SqliteBackend,
+}
+
+
+def create_backend(settings: SettingsLoader) -> StorageBackend:
+    name = str(settings.get("STORAGE_BACKEND", "json")).lower()
+    cls = _BACKENDS.get(name)
+    if cls is None:
+        known = ", ".join(sorted(_BACKENDS))
+        raise ValueError(f"Неизвестный STORAGE_BACKEND '{name}'. Доступны: {known}")
+    return cls(settings)
+
+
+__all__ = ["JournalBackend", "JsonFileBackend", "SqliteBackend", "StorageBackend", "create_backend"]
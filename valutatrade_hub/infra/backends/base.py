@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import os
+from abc import ABC, abstractmethod
+from collections.abc import Hashable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from valutatrade_hub.core.exceptions import ConcurrentModificationError
+from valutatrade_hub.infra.settings import SettingsLoader
+
+
+class StorageBackend(ABC):
+    """
+    Базовый интерфейс хранилища для DatabaseManager.
+
+    Полные load_*/save_* сохранены для совместимости, а save_user/save_portfolio
+    позволяют бэкенду записывать одну сущность, не переписывая всю коллекцию.
+
+    У каждого портфеля есть счётчик "version": save_portfolio с expected_version
+    работает как compare-and-swap и бросает ConcurrentModificationError,
+    если портфель успели изменить после чтения.
+    """
+
+    name: str = "base"
+
+    def __init__(self, settings: SettingsLoader) -> None:
+        self._settings = settings
+
+    def _path(self, key: str, default: str) -> str:
+        return str(self._settings.get(key, default))
+
+    # ---- users ----
+    @abstractmethod
+    def load_users(self) -> list[dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_users(self, users: list[dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def iter_users(self) -> Iterator[dict[str, Any]]:
+        """Пользователи по одному (для сканирования без списка в памяти)."""
+        return iter(self.load_users())
+
+    def save_user(self, user: dict[str, Any]) -> None:
+        users = self.load_users()
+        _replace_by_key(users, user, "user_id")
+        self.save_users(users)
+
+    # ---- portfolios ----
+    @abstractmethod
+    def load_portfolios(self) -> list[dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_portfolios(self, portfolios: list[dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    @contextmanager
+    def portfolios_lock(self) -> Iterator[None]:
+        """Блокировка на время чтение-проверка-запись портфелей. По умолчанию — без блокировки."""
+        yield
+
+    def save_portfolio(
+        self, portfolio: dict[str, Any], expected_version: int | None = None
+    ) -> None:
+        self.save_portfolios_many(
+            [portfolio],
+            None if expected_version is None else {int(portfolio["user_id"]): expected_version},
+        )
+
+    def save_portfolios_many(
+        self,
+        portfolios: list[dict[str, Any]],
+        expected_versions: dict[int, int] | None = None,
+    ) -> None:
+        """
+        Записать несколько портфелей одной операцией (пакетные сделки).
+        Если версия хотя бы одного не совпала с expected_versions — не пишется ни один.
+        """
+        with self.portfolios_lock():
+            self._save_portfolios_locked(portfolios, expected_versions)
+
+    def _save_portfolios_locked(
+        self,
+        portfolios: list[dict[str, Any]],
+        expected_versions: dict[int, int] | None,
+    ) -> None:
+        current = self.load_portfolios()
+        by_id = {int(p["user_id"]): p for p in current}
+        updated = [
+            next_version(by_id.get(int(p["user_id"])), p, expected_versions) for p in portfolios
+        ]
+        for p in updated:
+            _replace_by_key(current, p, "user_id")
+        self.save_portfolios(current)
+
+    def get_portfolio(self, user_id: int) -> dict[str, Any] | None:
+        return next((p for p in self.load_portfolios() if int(p["user_id"]) == int(user_id)), None)
+
+    def get_portfolios(self, user_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+        """Портфели нескольких пользователей за один проход; отсутствующих в ответе нет."""
+        wanted = {int(uid) for uid in user_ids}
+        return {int(p["user_id"]): p for p in self.load_portfolios() if int(p["user_id"]) in wanted}
+
+    def upsert_wallet(self, user_id: int, currency_code: str, balance: float) -> None:
+        with self.portfolios_lock():
+            portfolio = self.get_portfolio(user_id) or {"user_id": int(user_id), "wallets": {}}
+            portfolio.setdefault("wallets", {})[currency_code] = {"balance": float(balance)}
+            self._save_portfolios_locked([portfolio], None)
+
+    # ---- rates snapshot ----
+    @abstractmethod
+    def load_rates(self) -> dict[str, Any]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_rates(self, rates: dict[str, Any], changed: Iterable[str] | None = None) -> None:
+        """
+        rates — полный снапшот; changed — пары, изменившиеся с прошлой записи
+        (бэкенд может записать только их). None — записать всё.
+        """
+        raise NotImplementedError
+
+    # ---- history ----
+    @abstractmethod
+    def load_history(self) -> list[dict[str, Any]]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def save_history(self, history: list[dict[str, Any]]) -> None:
+        raise NotImplementedError
+
+    def iter_history(self) -> Iterator[dict[str, Any]]:
+        return iter(self.load_history())
+
+    def stamp(self, collection: str) -> Hashable | None:
+        """
+        Отпечаток состояния коллекции ("users", "portfolios", "rates", "history").
+        Пока отпечаток не изменился, закешированные данные можно не перечитывать.
+        None — бэкенд не умеет это определять, данные нужно читать заново.
+        """
+        return None
+
+    def close(self) -> None:
+        """Освободить ресурсы (файлы, соединения). По умолчанию ничего не делает."""
+        return None
+
+
+def _replace_by_key(items: list[dict[str, Any]], item: dict[str, Any], key: str) -> None:
+    for i, existing in enumerate(items):
+        if int(existing[key]) == int(item[key]):
+            items[i] = item
+            return
+    items.append(item)
+
+
+def portfolio_version(record: dict[str, Any] | None) -> int:
+    return int(record.get("version", 0)) if record else 0
+
+
+def next_version(
+    current: dict[str, Any] | None,
+    portfolio: dict[str, Any],
+    expected_versions: dict[int, int] | None,
+) -> dict[str, Any]:
+    """Проверить ожидаемую версию и вернуть запись с версией +1."""
+    user_id = int(portfolio["user_id"])
+    actual = portfolio_version(current)
+    expected = expected_versions.get(user_id) if expected_versions else None
+    if expected is not None and actual != int(expected):
+        raise ConcurrentModificationError(user_id, int(expected), actual)
+    return {**portfolio, "version": actual + 1}
+
+
+def file_stamp(path: str) -> tuple[int, int, int] | None:
+    """(mtime_ns, size, inode) файла или None, если файла нет."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size, st.st_ino
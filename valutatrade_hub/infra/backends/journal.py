@@ -0,0 +1,352 @@
+from __future__ import annotations
+
+import copy
+import json
+import os
+import threading
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from valutatrade_hub.infra.backends.base import StorageBackend, file_stamp, next_version
+from valutatrade_hub.infra.backends.json_files import (
+    JsonFileBackend,
+    atomic_write_records,
+    iter_json_records,
+)
+from valutatrade_hub.infra.locking import file_lock
+
+
+class JournalCollection:
+    """
+    Коллекция записей с ключом (user_id) в виде снапшота + журнала (WAL).
+
+    - snapshot: JSON-список всех записей на момент последней компакции
+    - wal: JSON Lines, одна строка на изменение ({"op": "put"|"del", ...})
+
+    Изменение одной записи = дописать одну короткую строку в wal,
+    стоимость не зависит от размера коллекции. После compact_every
+    записей в журнале состояние сбрасывается в снапшот, журнал обнуляется.
+
+    Запись (и компакция) идёт под межпроцессной блокировкой <wal>.lock:
+    внутри неё состояние дочитывается из журнала, проверяется и дописывается.
+    Чтение дочитывает журнал под разделяемой блокировкой: компакция заменяет
+    снапшот и обнуляет журнал в два шага, и между ними читать нельзя.
+    Незаконченная строка журнала пропускается.
+    """
+
+    def __init__(
+        self,
+        snapshot_path: str,
+        wal_path: str,
+        key_field: str,
+        legacy_path: str | None = None,
+        compact_every: int = 1000,
+        fsync: bool = True,
+    ) -> None:
+        self.snapshot_path = snapshot_path
+        self.wal_path = wal_path
+        self.key_field = key_field
+        self.legacy_path = legacy_path
+        self.compact_every = max(1, int(compact_every))
+        self.fsync = fsync
+
+        self._records: dict[int, dict[str, Any]] = {}
+        self._wal_offset = 0
+        self._wal_entries = 0
+        self._snapshot_stamp: tuple[int, int] | None = None
+        self._opened = False
+        # состояние (_records, смещение в журнале) общее для потоков процесса
+        self._mutex = threading.RLock()
+
+    # ---- чтение ----
+    def _stat(self, path: str) -> tuple[int, int] | None:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_ino
+
+    def _open(self) -> None:
+        if not os.path.exists(self.snapshot_path) and not os.path.exists(self.wal_path):
+            self._import_legacy()
+        self._load_full()
+        self._opened = True
+
+    def _import_legacy(self) -> None:
+        # одноразовый импорт из старого JSON-файла
+        legacy = iter_json_records(self.legacy_path) if self.legacy_path else iter(())
+        atomic_write_records(self.snapshot_path, legacy)
+
+    def _load_full(self) -> None:
+        # отметка снимается до чтения и сверяется после: без fcntl (Windows)
+        # блокировки нет, и компакция посреди чтения возможна — тогда читаем заново
+        while True:
+            stamp = self._stat(self.snapshot_path)
+            self._records = {}
+            for rec in iter_json_records(self.snapshot_path):
+                self._records[int(rec[self.key_field])] = rec
+            self._wal_offset = 0
+            self._wal_entries = 0
+            self._replay_tail()
+            if self._stat(self.snapshot_path) == stamp:
+                self._snapshot_stamp = stamp
+                return
+
+    def _replay_tail(self) -> None:
+        if not os.path.exists(self.wal_path):
+            return
+        with open(self.wal_path, "rb") as f:
+            f.seek(self._wal_offset)
+            chunk = f.read()
+        if not chunk:
+            return
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            # строка ещё дописывается (или оборвана) — дочитаем позже
+            return
+        for line in chunk[: end + 1].splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+                self._wal_entries += 1
+        self._wal_offset += end + 1
+
+    def _apply(self, entry: dict[str, Any]) -> None:
+        key = int(entry["key"])
+        if entry.get("op") == "del":
+            self._records.pop(key, None)
+        else:
+            self._records[key] = entry["value"]
+
+    def refresh(self) -> None:
+        """Подтянуть изменения, сделанные другими процессами."""
+        with self._mutex:
+            self._refresh()
+
+    def _refresh(self) -> None:
+        if self._opened and self._stat(self.snapshot_path) == self._snapshot_stamp:
+            try:
+                size = os.path.getsize(self.wal_path)
+            except FileNotFoundError:
+                size = 0
+            if size == self._wal_offset:
+                # ничего нового: блокировка не нужна
+                return
+        with file_lock(self.wal_path, shared=True):
+            self._sync()
+
+    def _sync(self) -> None:
+        # вызывается под блокировкой журнала (разделяемой или эксклюзивной)
+        if not self._opened:
+            self._open()
+            return
+        if self._stat(self.snapshot_path) != self._snapshot_stamp:
+            # кто-то выполнил компакцию
+            self._load_full()
+            return
+        try:
+            size = os.path.getsize(self.wal_path)
+        except FileNotFoundError:
+            size = 0
+        if size < self._wal_offset:
+            self._load_full()
+        elif size > self._wal_offset:
+            self._replay_tail()
+
+    def stamp(self) -> Hashable:
+        return file_stamp(self.snapshot_path), file_stamp(self.wal_path)
+
+    def get(self, key: int) -> dict[str, Any] | None:
+        with self._mutex:
+            self._refresh()
+            rec = self._records.get(int(key))
+            return copy.deepcopy(rec) if rec is not None else None
+
+    def get_many(self, keys: Iterable[int]) -> dict[int, dict[str, Any]]:
+        with self._mutex:
+            self._refresh()
+            found = {int(k): self._records.get(int(k)) for k in keys}
+            return {k: copy.deepcopy(rec) for k, rec in found.items() if rec is not None}
+
+    def all(self) -> list[dict[str, Any]]:
+        with self._mutex:
+            self._refresh()
+            return copy.deepcopy(list(self._records.values()))
+
+    # ---- запись ----
+    def _append(self, entries: list[dict[str, Any]]) -> None:
+        if not entries:
+            return
+        d = os.path.dirname(self.wal_path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        payload = "".join(
+            json.dumps(e, ensure_ascii=False, separators=(",", ":")) + "\n" for e in entries
+        ).encode("utf-8")
+        with open(self.wal_path, "ab") as f:
+            f.write(payload)
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        for e in entries:
+            self._apply(e)
+        self._wal_offset += len(payload)
+        self._wal_entries += len(entries)
+        if self._wal_entries >= self.compact_every:
+            self.compact()
+
+    @contextmanager
+    def locked(self) -> Iterator[None]:
+        """Эксклюзивная блокировка журнала; внутри состояние актуально."""
+        with self._mutex, file_lock(self.wal_path):
+            # не _refresh: вторая (разделяемая) flock из того же процесса
+            # ждала бы эту эксклюзивную вечно
+            self._sync()
+            yield
+
+    def put(self, record: dict[str, Any]) -> None:
+        self.put_many([record])
+
+    def put_many(
+        self,
+        records: list[dict[str, Any]],
+        check: Callable[[dict[str, Any] | None, dict[str, Any]], dict[str, Any]] | None = None,
+    ) -> None:
+        """
+        check(текущая запись, новая) вызывается под блокировкой и возвращает запись
+        для журнала; исключение из check отменяет запись всей пачки.
+        """
+        with self.locked():
+            if check is not None:
+                records = [check(self._records.get(int(r[self.key_field])), r) for r in records]
+            self._append(
+                [
+                    {"op": "put", "key": int(r[self.key_field]), "value": copy.deepcopy(r)}
+                    for r in records
+                ]
+            )
+
+    def replace_all(self, records: list[dict[str, Any]]) -> None:
+        """Записать полный список: в журнал попадают только отличающиеся записи."""
+        with self.locked():
+            entries: list[dict[str, Any]] = []
+            seen: set[int] = set()
+            for rec in records:
+                key = int(rec[self.key_field])
+                seen.add(key)
+                if self._records.get(key) != rec:
+                    entries.append({"op": "put", "key": key, "value": copy.deepcopy(rec)})
+            for key in self._records.keys() - seen:
+                entries.append({"op": "del", "key": key})
+            self._append(entries)
+
+    def compact(self) -> None:
+        atomic_write_records(self.snapshot_path, self._records.values())
+        with open(self.wal_path, "wb"):
+            pass
+        self._snapshot_stamp = self._stat(self.snapshot_path)
+        self._wal_offset = 0
+        self._wal_entries = 0
+
+
+class JournalBackend(StorageBackend):
+    """
+    Пользователи и портфели хранятся как снапшот + журнал (append-only).
+    При первом запуске данные один раз импортируются из USERS_FILE/PORTFOLIOS_FILE.
+    Курсы и история пока остаются в JSON-файлах.
+    """
+
+    name = "journal"
+
+    def __init__(self, settings: Any) -> None:
+        super().__init__(settings)
+        journal_dir = self._path("JOURNAL_DIR", "data/journal")
+        compact_every = int(self._settings.get("JOURNAL_COMPACT_EVERY", 1000))
+        fsync = bool(self._settings.get("JOURNAL_FSYNC", True))
+
+        self.users = JournalCollection(
+            snapshot_path=os.path.join(journal_dir, "users.snapshot.json"),
+            wal_path=os.path.join(journal_dir, "users.wal"),
+            key_field="user_id",
+            legacy_path=self._path("USERS_FILE", "data/users.json"),
+            compact_every=compact_every,
+            fsync=fsync,
+        )
+        self.portfolios = JournalCollection(
+            snapshot_path=os.path.join(journal_dir, "portfolios.snapshot.json"),
+            wal_path=os.path.join(journal_dir, "portfolios.wal"),
+            key_field="user_id",
+            legacy_path=self._path("PORTFOLIOS_FILE", "data/portfolios.json"),
+            compact_every=compact_every,
+            fsync=fsync,
+        )
+        self._files = JsonFileBackend(settings)
+
+    # ---- users ----
+    def load_users(self) -> list[dict[str, Any]]:
+        return self.users.all()
+
+    def save_users(self, users: list[dict[str, Any]]) -> None:
+        self.users.replace_all(users)
+
+    def save_user(self, user: dict[str, Any]) -> None:
+        self.users.put(user)
+
+    # ---- portfolios ----
+    def load_portfolios(self) -> list[dict[str, Any]]:
+        return self.portfolios.all()
+
+    def save_portfolios(self, portfolios: list[dict[str, Any]]) -> None:
+        self.portfolios.replace_all(portfolios)
+
+    def save_portfolios_many(
+        self,
+        portfolios: list[dict[str, Any]],
+        expected_versions: dict[int, int] | None = None,
+    ) -> None:
+        self.portfolios.put_many(
+            portfolios, check=lambda current, p: next_version(current, p, expected_versions)
+        )
+
+    def get_portfolio(self, user_id: int) -> dict[str, Any] | None:
+        return self.portfolios.get(user_id)
+
+    def get_portfolios(self, user_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+        return self.portfolios.get_many(user_ids)
+
+    def upsert_wallet(self, user_id: int, currency_code: str, balance: float) -> None:
+        def merge(current: dict[str, Any] | None, _: dict[str, Any]) -> dict[str, Any]:
+            p = copy.deepcopy(current) if current else {"user_id": int(user_id), "wallets": {}}
+            p.setdefault("wallets", {})[currency_code] = {"balance": float(balance)}
+            return next_version(current, p, None)
+
+        self.portfolios.put_many([{"user_id": int(user_id)}], check=merge)
+
+    # ---- rates / history: JSON-файлы ----
+    def load_rates(self) -> dict[str, Any]:
+        return self._files.load_rates()
+
+    def save_rates(self, rates: dict[str, Any], changed: Iterable[str] | None = None) -> None:
+        self._files.save_rates(rates, changed)
+
+    def load_history(self) -> list[dict[str, Any]]:
+        return self._files.load_history()
+
+    def iter_history(self) -> Iterator[dict[str, Any]]:
+        return self._files.iter_history()
+
+    def save_history(self, history: list[dict[str, Any]]) -> None:
+        self._files.save_history(history)
+
+    def stamp(self, collection: str) -> Hashable | None:
+        if collection == "users":
+            return self.users.stamp()
+        if collection == "portfolios":
+            return self.portfolios.stamp()
+        return self._files.stamp(collection)
+
+    def compact(self) -> None:
+        """Принудительно сбросить журналы в снапшоты."""
+        for coll in (self.users, self.portfolios):
+            with coll.locked():
+                coll.compact()
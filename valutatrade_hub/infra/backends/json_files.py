@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Callable, Hashable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from valutatrade_hub.infra.backends.base import StorageBackend, file_stamp, next_version
+from valutatrade_hub.infra.jsonio import atomic_writer, dumps, iter_array, loads, write_array
+from valutatrade_hub.infra.locking import file_lock
+from valutatrade_hub.infra.settings import SettingsLoader
+
+
+def _pretty() -> bool:
+    # "pretty" — прежний формат (indent=2, документ целиком), "stream" — компактный потоковый
+    return str(SettingsLoader().get("JSON_IO_MODE", "stream")).lower() == "pretty"
+
+
+def atomic_write_json(path: str, data: Any) -> None:
+    with atomic_writer(path) as f:
+        if _pretty():
+            f.write(json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+        elif isinstance(data, list):
+            write_array(f, data)
+        else:
+            f.write(dumps(data))
+
+
+def atomic_write_records(path: str, records: Iterable[dict[str, Any]]) -> None:
+    """Записать JSON-массив из итератора: записи не собираются в список (кроме режима pretty)."""
+    if _pretty():
+        atomic_write_json(path, list(records))
+        return
+    with atomic_writer(path) as f:
+        write_array(f, records)
+
+
+def read_json(path: str, default: Any) -> Any:
+    if not os.path.exists(path):
+        return default
+    with open(path, "rb") as f:
+        try:
+            return loads(f.read())
+        except ValueError:  # json.JSONDecodeError / orjson.JSONDecodeError
+            return default
+
+
+def iter_json_records(path: str) -> Iterator[dict[str, Any]]:
+    """Записи JSON-массива из файла по одной (нет файла — ни одной)."""
+    if os.path.exists(path):
+        yield from iter_array(path)
+
+
+class JsonFileBackend(StorageBackend):
+    """
+    Исходный формат: каждая коллекция — отдельный JSON-файл,
+    любая запись переписывает файл целиком.
+
+    Файл портфелей переписывается целиком, поэтому чтение-проверка-запись
+    выполняется под межпроцессной блокировкой portfolios.json.lock.
+
+    Поиск одной записи и запись одной сущности идут потоком:
+    файл читается по записи и сразу пишется во временный файл,
+    в памяти не держится вся коллекция.
+    """
+
+    name = "json"
+
+    _FILES = {
+        "users": ("USERS_FILE", "data/users.json"),
+        "portfolios": ("PORTFOLIOS_FILE", "data/portfolios.json"),
+        "rates": ("RATES_FILE", "data/rates.json"),
+        "history": ("HISTORY_FILE", "data/exchange_rates.json"),
+    }
+
+    def stamp(self, collection: str) -> Hashable | None:
+        key, default = self._FILES[collection]
+        return file_stamp(self._path(key, default))
+
+    @staticmethod
+    def _rewrite(
+        path: str,
+        updates: list[dict[str, Any]],
+        key: str,
+        merge: Callable[[dict[str, Any] | None, dict[str, Any]], dict[str, Any]],
+    ) -> None:
+        """Переписать файл потоком, заменив (или дописав в конец) записи updates по полю key."""
+        pending = {int(u[key]): u for u in updates}
+
+        def merged() -> Iterator[dict[str, Any]]:
+            for rec in iter_json_records(path):
+                new = pending.pop(int(rec[key]), None)
+                yield rec if new is None else merge(rec, new)
+            for new in list(pending.values()):
+                yield merge(None, new)
+
+        atomic_write_records(path, merged())
+
+    # ---- users ----
+    def load_users(self) -> list[dict[str, Any]]:
+        return list(read_json(self._path("USERS_FILE", "data/users.json"), default=[]))
+
+    def iter_users(self) -> Iterator[dict[str, Any]]:
+        return iter_json_records(self._path("USERS_FILE", "data/users.json"))
+
+    def save_users(self, users: list[dict[str, Any]]) -> None:
+        atomic_write_json(self._path("USERS_FILE", "data/users.json"), users)
+
+    def save_user(self, user: dict[str, Any]) -> None:
+        self._rewrite(
+            self._path("USERS_FILE", "data/users.json"), [user], "user_id", lambda _old, new: new
+        )
+
+    # ---- portfolios ----
+    def load_portfolios(self) -> list[dict[str, Any]]:
+        return list(read_json(self._path("PORTFOLIOS_FILE", "data/portfolios.json"), default=[]))
+
+    def save_portfolios(self, portfolios: list[dict[str, Any]]) -> None:
+        atomic_write_json(self._path("PORTFOLIOS_FILE", "data/portfolios.json"), portfolios)
+
+    @contextmanager
+    def portfolios_lock(self) -> Iterator[None]:
+        with file_lock(self._path("PORTFOLIOS_FILE", "data/portfolios.json")):
+            yield
+
+    def _save_portfolios_locked(
+        self,
+        portfolios: list[dict[str, Any]],
+        expected_versions: dict[int, int] | None,
+    ) -> None:
+        # конфликт версий посреди потока — исключение,
+        # временный файл удаляется, запись не происходит
+        self._rewrite(
+            self._path("PORTFOLIOS_FILE", "data/portfolios.json"),
+            portfolios,
+            "user_id",
+            lambda old, new: next_version(old, new, expected_versions),
+        )
+
+    def get_portfolio(self, user_id: int) -> dict[str, Any] | None:
+        for p in iter_json_records(self._path("PORTFOLIOS_FILE", "data/portfolios.json")):
+            if int(p["user_id"]) == int(user_id):
+                return p
+        return None
+
+    def get_portfolios(self, user_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+        # один проход по файлу; чтение прекращается, как только найдены все
+        wanted = {int(uid) for uid in user_ids}
+        found: dict[int, dict[str, Any]] = {}
+        if not wanted:
+            return found
+        for p in iter_json_records(self._path("PORTFOLIOS_FILE", "data/portfolios.json")):
+            uid = int(p["user_id"])
+            if uid in wanted:
+                found[uid] = p
+                if len(found) == len(wanted):
+                    break
+        return found
+
+    # ---- rates snapshot ----
+    def load_rates(self) -> dict[str, Any]:
+        path = self._path("RATES_FILE", "data/rates.json")
+        return dict(read_json(path, default={"pairs": {}, "last_refresh": None}))
+
+    def save_rates(self, rates: dict[str, Any], changed: Iterable[str] | None = None) -> None:
+        # файл снапшота небольшой и переписывается целиком
+        atomic_write_json(self._path("RATES_FILE", "data/rates.json"), rates)
+
+    # ---- history ----
+    def load_history(self) -> list[dict[str, Any]]:
+        return list(read_json(self._path("HISTORY_FILE", "data/exchange_rates.json"), default=[]))
+
+    def iter_history(self) -> Iterator[dict[str, Any]]:
+        return iter_json_records(self._path("HISTORY_FILE", "data/exchange_rates.json"))
+
+    def save_history(self, history: list[dict[str, Any]]) -> None:
+        atomic_write_json(self._path("HISTORY_FILE", "data/exchange_rates.json"), history)
@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Hashable, Iterable
+from typing import Any
+
+from valutatrade_hub.infra.backends.base import StorageBackend, next_version
+from valutatrade_hub.infra.backends.json_files import read_json
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    hashed_password TEXT NOT NULL,
+    salt TEXT NOT NULL,
+    registration_date TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_users_username ON users(username);
+
+CREATE TABLE IF NOT EXISTS portfolios (
+    user_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS wallets (
+    user_id INTEGER NOT NULL,
+    currency TEXT NOT NULL,
+    balance REAL NOT NULL,
+    units INTEGER,
+    scale INTEGER,
+    PRIMARY KEY (user_id, currency)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rates (
+    pair TEXT PRIMARY KEY,
+    rate REAL NOT NULL,
+    updated_at TEXT,
+    source TEXT
+);
+
+CREATE TABLE IF NOT EXISTS history (
+    id TEXT PRIMARY KEY,
+    from_currency TEXT NOT NULL,
+    to_currency TEXT NOT NULL,
+    rate REAL NOT NULL,
+    timestamp TEXT NOT NULL,
+    source TEXT,
+    meta TEXT
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+_USER_FIELDS = ("user_id", "username", "hashed_password", "salt", "registration_date")
+
+
+def _wallet(row: sqlite3.Row) -> dict[str, Any]:
+    if row["units"] is None:
+        return {"balance": row["balance"]}
+    return {"balance": row["balance"], "units": row["units"], "scale": row["scale"]}
+
+
+class SqliteBackend(StorageBackend):
+    """
+    Хранилище в одном файле SQLite (SQLITE_PATH).
+
+    Портфель пользователя читается и пишется по индексам
+    portfolios(user_id) / wallets(user_id, currency), без загрузки остальных.
+    При создании базы данные один раз импортируются из JSON-файлов.
+
+    Проверка версии портфеля и запись выполняются в одной транзакции
+    BEGIN IMMEDIATE — её блокировка SQLite и служит межпроцессной.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, settings: Any) -> None:
+        super().__init__(settings)
+        self._db_path = self._path("SQLITE_PATH", "data/valutatrade.db")
+        d = os.path.dirname(self._db_path)
+        if d:
+            os.makedirs(d, exist_ok=True)
+        is_new = not os.path.exists(self._db_path)
+
+        # одно соединение на процесс; доступ сериализуем блокировкой
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self._db_path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        if is_new:
+            self._import_json()
+
+    def _tx(self) -> _Transaction:
+        return _Transaction(self._conn, self._lock)
+
+    def _migrate(self) -> None:
+        # базы, созданные до появления версий портфелей
+        columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(portfolios)")}
+        if "version" not in columns:
+            self._conn.execute(
+                "ALTER TABLE portfolios ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+            )
+        # точный баланс в минимальных единицах; NULL — старая строка, только REAL balance
+        columns = {r["name"] for r in self._conn.execute("PRAGMA table_info(wallets)")}
+        for column in ("units", "scale"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE wallets ADD COLUMN {column} INTEGER")
+
+    def _bump(self, cur: sqlite3.Cursor, collection: str) -> None:
+        cur.execute(
+            "INSERT INTO meta(key, value) VALUES (?, 1) "
+            "ON CONFLICT(key) DO UPDATE SET value = value + 1",
+            (f"{collection}_version",),
+        )
+
+    def _import_json(self) -> None:
+        # одноразовый импорт существующих JSON-файлов
+        users = read_json(self._path("USERS_FILE", "data/users.json"), default=[])
+        portfolios = read_json(self._path("PORTFOLIOS_FILE", "data/portfolios.json"), default=[])
+        rates = read_json(self._path("RATES_FILE", "data/rates.json"), default={})
+        history = read_json(self._path("HISTORY_FILE", "data/exchange_rates.json"), default=[])
+        if users:
+            self.save_users(list(users))
+        if portfolios:
+            self.save_portfolios(list(portfolios))
+        if rates:
+            self.save_rates(dict(rates))
+        if history:
+            self.save_history(list(history))
+
+    # ---- users ----
+    def load_users(self) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT user_id, username, hashed_password, salt, registration_date "
+                "FROM users ORDER BY user_id"
+            ).fetchall()
+        return [dict(r) for r in rows]
+
+    def save_users(self, users: list[dict[str, Any]]) -> None:
+        with self._tx() as cur:
+            cur.execute("DELETE FROM users")
+            cur.executemany(
+                "INSERT INTO users VALUES (?, ?, ?, ?, ?)",
+                [tuple(u[f] for f in _USER_FIELDS) for u in users],
+            )
+            self._bump(cur, "users")
+
+    def save_user(self, user: dict[str, Any]) -> None:
+        with self._tx() as cur:
+            cur.execute(
+                "INSERT OR REPLACE INTO users VALUES (?, ?, ?, ?, ?)",
+                tuple(user[f] for f in _USER_FIELDS),
+            )
+
+            self._bump(cur, "users")
+
+    # ---- portfolios ----
+    def load_portfolios(self) -> list[dict[str, Any]]:
+        with self._lock:
+            heads = self._conn.execute(
+                "SELECT user_id, version FROM portfolios ORDER BY user_id"
+            ).fetchall()
+            rows = self._conn.execute(
+                "SELECT user_id, currency, balance, units, scale FROM wallets"
+            ).fetchall()
+        out: dict[int, dict[str, Any]] = {
+            uid: {"user_id": uid, "wallets": {}, "version": version} for uid, version in heads
+        }
+        for r in rows:
+            p = out.setdefault(r["user_id"], {"user_id": r["user_id"], "wallets": {}, "version": 0})
+            p["wallets"][r["currency"]] = _wallet(r)
+        return list(out.values())
+
+    def save_portfolios(self, portfolios: list[dict[str, Any]]) -> None:
+        with self._tx() as cur:
+            cur.execute("DELETE FROM wallets")
+            cur.execute("DELETE FROM portfolios")
+            for p in portfolios:
+                self._write_portfolio(cur, p, int(p.get("version", 0)))
+            self._bump(cur, "portfolios")
+
+    def _write_portfolio(
+        self, cur: sqlite3.Cursor, portfolio: dict[str, Any], version: int
+    ) -> None:
+        user_id = int(portfolio["user_id"])
+        cur.execute(
+            "INSERT INTO portfolios(user_id, version) VALUES (?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET version = excluded.version",
+            (user_id, int(version)),
+        )
+        cur.execute("DELETE FROM wallets WHERE user_id = ?", (user_id,))
+        cur.executemany(
+            "INSERT INTO wallets(user_id, currency, balance, units, scale) VALUES (?, ?, ?, ?, ?)",
+            [
+                (user_id, code, float(w.get("balance", 0.0)), w.get("units"), w.get("scale"))
+                for code, w in (portfolio.get("wallets") or {}).items()
+            ],
+        )
+
+    def _current_version(self, cur: sqlite3.Cursor, user_id: int) -> dict[str, Any] | None:
+        row = cur.execute(
+            "SELECT version FROM portfolios WHERE user_id = ?", (int(user_id),)
+        ).fetchone()
+        return {"version": row[0]} if row else None
+
+    def save_portfolios_many(
+        self,
+        portfolios: list[dict[str, Any]],
+        expected_versions: dict[int, int] | None = None,
+    ) -> None:
+        with self._tx() as cur:
+            for p in portfolios:
+                current = self._current_version(cur, p["user_id"])
+                record = next_version(current, p, expected_versions)
+                self._write_portfolio(cur, record, record["version"])
+            self._bump(cur, "portfolios")
+
+    def get_portfolio(self, user_id: int) -> dict[str, Any] | None:
+        with self._lock:
+            head = self._conn.execute(
+                "SELECT version FROM portfolios WHERE user_id = ?", (int(user_id),)
+            ).fetchone()
+            if not head:
+                return None
+            rows = self._conn.execute(
+                "SELECT currency, balance, units, scale FROM wallets WHERE user_id = ?",
+                (int(user_id),),
+            ).fetchall()
+        return {
+            "user_id": int(user_id),
+            "wallets": {r["currency"]: _wallet(r) for r in rows},
+            "version": head["version"],
+        }
+
+    def get_portfolios(self, user_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+        ids = sorted({int(uid) for uid in user_ids})
+        if not ids:
+            return {}
+        marks = ",".join("?" * len(ids))
+        with self._lock:
+            heads = self._conn.execute(
+                f"SELECT user_id, version FROM portfolios WHERE user_id IN ({marks})", ids
+            ).fetchall()
+            rows = self._conn.execute(
+                "SELECT user_id, currency, balance, units, scale FROM wallets "
+                f"WHERE user_id IN ({marks})",
+                ids,
+            ).fetchall()
+        found = {
+            int(h["user_id"]): {
+                "user_id": int(h["user_id"]),
+                "wallets": {},
+                "version": h["version"],
+            }
+            for h in heads
+        }
+        for r in rows:
+            if int(r["user_id"]) in found:
+                found[int(r["user_id"])]["wallets"][r["currency"]] = _wallet(r)
+        return found
+
+    def upsert_wallet(self, user_id: int, currency_code: str, balance: float) -> None:
+        with self._tx() as cur:
+            cur.execute(
+                "INSERT INTO portfolios(user_id, version) VALUES (?, 1) "
+                "ON CONFLICT(user_id) DO UPDATE SET version = version + 1",
+                (int(user_id),),
+            )
+            cur.execute(
+                # баланс задан float: прежние units больше не верны
+                "INSERT INTO wallets(user_id, currency, balance) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id, currency) DO UPDATE SET balance = excluded.balance, "
+                "units = NULL, scale = NULL",
+                (int(user_id), currency_code, float(balance)),
+            )
+
+            self._bump(cur, "portfolios")
+
+    # ---- rates snapshot ----
+    def load_rates(self) -> dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT pair, rate, updated_at, source FROM rates").fetchall()
+            last = self._conn.execute(
+                "SELECT value FROM meta WHERE key = 'last_refresh'"
+            ).fetchone()
+        return {
+            "pairs": {
+                r["pair"]: {"rate": r["rate"], "updated_at": r["updated_at"], "source": r["source"]}
+                for r in rows
+            },
+            "last_refresh": last[0] if last else None,
+        }
+
+    def save_rates(self, rates: dict[str, Any], changed: Iterable[str] | None = None) -> None:
+        pairs = rates.get("pairs") or {}
+        keys = list(pairs) if changed is None else [k for k in changed if k in pairs]
+        with self._tx() as cur:
+            if changed is None:
+                cur.execute("DELETE FROM rates")
+            cur.executemany(
+                "INSERT INTO rates(pair, rate, updated_at, source) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(pair) DO UPDATE SET rate = excluded.rate, "
+                "updated_at = excluded.updated_at, source = excluded.source",
+                [
+                    (k, float(pairs[k]["rate"]), pairs[k].get("updated_at"), pairs[k].get("source"))
+                    for k in keys
+                ],
+            )
+            cur.execute(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES ('last_refresh', ?)",
+                (rates.get("last_refresh"),),
+            )
+
+            self._bump(cur, "rates")
+
+    # ---- history ----
+    def load_history(self) -> list[dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, from_currency, to_currency, rate, timestamp, source, meta "
+                "FROM history ORDER BY timestamp, id"
+            ).fetchall()
+        out: list[dict[str, Any]] = []
+        for r in rows:
+            rec = dict(r)
+            rec["meta"] = json.loads(rec["meta"]) if rec["meta"] else {}
+            out.append(rec)
+        return out
+
+    def save_history(self, history: list[dict[str, Any]]) -> None:
+        with self._tx() as cur:
+            cur.execute("DELETE FROM history")
+            cur.executemany(
+                "INSERT OR IGNORE INTO history VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        h["id"],
+                        h["from_currency"],
+                        h["to_currency"],
+                        float(h["rate"]),
+                        h["timestamp"],
+                        h.get("source"),
+                        json.dumps(h.get("meta") or {}, ensure_ascii=False),
+                    )
+                    for h in history
+                ],
+            )
+            self._bump(cur, "history")
+
+    def stamp(self, collection: str) -> Hashable | None:
+        # счётчик версии коллекции увеличивается в той же транзакции, что и запись
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM meta WHERE key = ?", (f"{collection}_version",)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK под блокировкой соединения."""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.RLock) -> None:
+        self._conn = conn
+        self._lock = lock
+
+    def __enter__(self) -> sqlite3.Cursor:
+        self._lock.acquire()
+        try:
+            self._conn.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self._lock.release()
+            raise
+        return self._conn.cursor()
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        try:
+            self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self._lock.release()
@@ -1,16 +1,20 @@
 from __future__ import annotations
 
-import json
 import os
-import tempfile
-from typing import Any
+from collections.abc import Hashable, Iterable, Iterator
+from typing import TYPE_CHECKING, Any
 
+from valutatrade_hub.infra.backends import StorageBackend, create_backend
 from valutatrade_hub.infra.settings import SettingsLoader
 
+if TYPE_CHECKING:
+    from valutatrade_hub.parser_service.history import HistoryStore
+
 
 class DatabaseManager:
     """
-    Singleton: единая точка доступа к JSON-хранилищу.
+    Singleton: единая точка доступа к хранилищу.
+    Конкретный бэкенд выбирается параметром STORAGE_BACKEND ("json" | "journal" | "sqlite").
     """
     _instance: "DatabaseManager | None" = None
 
@@ -19,69 +23,83 @@ class DatabaseManager:
             cls._instance = super().__new__(cls)
             cls._instance._settings = SettingsLoader()
             cls._instance._ensure_data_dir()
+            cls._instance._backend = create_backend(cls._instance._settings)
         return cls._instance
 
     def _ensure_data_dir(self) -> None:
         data_dir = str(self._settings.get("DATA_DIR", "data"))
         os.makedirs(data_dir, exist_ok=True)
 
-    def _atomic_write_json(self, path: str, data: Any) -> None:
-        d = os.path.dirname(path)
-        if d:
-            os.makedirs(d, exist_ok=True)
-        fd, tmp_path = tempfile.mkstemp(prefix="tmp_", suffix=".json", dir=d or None, text=True)
-        try:
-            with os.fdopen(fd, "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            os.replace(tmp_path, path)  # atomic on same filesystem
-        finally:
-            if os.path.exists(tmp_path):
-                try:
-                    os.remove(tmp_path)
-                except OSError:
-                    pass
-
-    def _read_json(self, path: str, default: Any) -> Any:
-        if not os.path.exists(path):
-            return default
-        with open(path, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return default
+    @property
+    def backend(self) -> StorageBackend:
+        return self._backend
+
+    def stamp(self, collection: str) -> Hashable | None:
+        return self._backend.stamp(collection)
 
     # ---- users ----
     def load_users(self) -> list[dict[str, Any]]:
-        path = str(self._settings.get("USERS_FILE", "data/users.json"))
-        return list(self._read_json(path, default=[]))
+        return self._backend.load_users()
+
+    def iter_users(self) -> Iterator[dict[str, Any]]:
+        return self._backend.iter_users()
 
     def save_users(self, users: list[dict[str, Any]]) -> None:
-        path = str(self._settings.get("USERS_FILE", "data/users.json"))
-        self._atomic_write_json(path, users)
+        self._backend.save_users(users)
+
+    def save_user(self, user: dict[str, Any]) -> None:
+        self._backend.save_user(user)
 
     # ---- portfolios ----
     def load_portfolios(self) -> list[dict[str, Any]]:
-        path = str(self._settings.get("PORTFOLIOS_FILE", "data/portfolios.json"))
-        return list(self._read_json(path, default=[]))
+        return self._backend.load_portfolios()
 
     def save_portfolios(self, portfolios: list[dict[str, Any]]) -> None:
-        path = str(self._settings.get("PORTFOLIOS_FILE", "data/portfolios.json"))
-        self._atomic_write_json(path, portfolios)
+        self._backend.save_portfolios(portfolios)
+
+    def save_portfolio(
+        self, portfolio: dict[str, Any], expected_version: int | None = None
+    ) -> None:
+        self._backend.save_portfolio(portfolio, expected_version)
+
+    def save_portfolios_many(
+        self,
+        portfolios: list[dict[str, Any]],
+        expected_versions: dict[int, int] | None = None,
+    ) -> None:
+        self._backend.save_portfolios_many(portfolios, expected_versions)
+
+    def get_portfolio(self, user_id: int) -> dict[str, Any] | None:
+        return self._backend.get_portfolio(user_id)
+
+    def get_portfolios(self, user_ids: Iterable[int]) -> dict[int, dict[str, Any]]:
+        return self._backend.get_portfolios(user_ids)
+
+    def upsert_wallet(self, user_id: int, currency_code: str, balance: float) -> None:
+        self._backend.upsert_wallet(user_id, currency_code, balance)
 
     # ---- rates snapshot ----
     def load_rates(self) -> dict[str, Any]:
-        path = str(self._settings.get("RATES_FILE", "data/rates.json"))
-        return dict(self._read_json(path, default={"pairs": {}, "last_refresh": None}))
+        return self._backend.load_rates()
 
-    def save_rates(self, rates: dict[str, Any]) -> None:
-        path = str(self._settings.get("RATES_FILE", "data/rates.json"))
-        self._atomic_write_json(path, rates)
+    def save_rates(self, rates: dict[str, Any], changed: Iterable[str] | None = None) -> None:
+        self._backend.save_rates(rates, changed)
 
     # ---- history ----
+    # история курсов живёт в сегментах HISTORY_DIR (HistoryStore); история бэкенда
+    # (HISTORY_FILE / таблица sqlite) больше не пишется и служит только для однократного импорта
+    @property
+    def history(self) -> HistoryStore:
+        from valutatrade_hub.parser_service.history import history_store
+
+        return history_store()
+
     def load_history(self) -> list[dict[str, Any]]:
-        path = str(self._settings.get("HISTORY_FILE", "data/exchange_rates.json"))
-        return list(self._read_json(path, default=[]))
+        return list(self.iter_history())
+
+    def iter_history(self) -> Iterator[dict[str, Any]]:
+        return self.history.iter_records()
 
     def save_history(self, history: list[dict[str, Any]]) -> None:
-        path = str(self._settings.get("HISTORY_FILE", "data/exchange_rates.json"))
-        self._atomic_write_json(path, history)
+        """Дописать записи в историю; записи с уже известным id пропускаются."""
+        self.history.append(history)
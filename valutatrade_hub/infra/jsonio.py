@@ -0,0 +1,135 @@
+"""
+Потоковое чтение и компактная запись JSON-массивов записей.
+
+- iter_array: записи верхнеуровневого массива по одной, файл читается кусками;
+  в памяти — текущий кусок и одна запись, а не весь документ
+- write_array: массив пишется по записи на строку, пачками в буферизованный файл
+- atomic_writer: временный файл + os.replace (читатели не видят полузаписанный файл)
+- dumps/loads: orjson, если установлен, иначе стандартный json
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import tempfile
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from typing import IO, Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson необязателен
+    orjson = None  # type: ignore[assignment]
+
+READ_CHUNK = 1 << 16
+WRITE_BUFFER = 1 << 20
+# записей на один write() при потоковой записи
+WRITE_BATCH = 512
+
+_WS = re.compile(r"[ \t\n\r]*")
+_AFTER_ITEM = frozenset(" \t\n\r,]")
+
+
+def dumps(obj: Any) -> bytes:
+    """Компактный JSON в UTF-8."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def iter_array(path: str, chunk_size: int = READ_CHUNK) -> Iterator[Any]:
+    """
+    Записи JSON-массива из файла по одной.
+    Пустой файл или документ, который не является массивом, — ни одной записи
+    (как read_json с default=[]); ошибка внутри массива — json.JSONDecodeError.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as f:
+        buf, eof = "", False
+        while not buf.strip() and not eof:
+            more = f.read(chunk_size)
+            buf, eof = buf + more, not more
+        pos = _WS.match(buf).end()  # type: ignore[union-attr]
+        if pos >= len(buf) or buf[pos] != "[":
+            return
+        pos += 1
+        need_comma = False
+
+        while True:
+            pos = _WS.match(buf, pos).end()  # type: ignore[union-attr]
+            if pos < len(buf):
+                ch = buf[pos]
+                if ch == "]":
+                    return
+                if need_comma:
+                    if ch != ",":
+                        raise json.JSONDecodeError("Ожидалась ',' или ']'", buf, pos)
+                    pos += 1
+                    need_comma = False
+                    continue
+                try:
+                    value, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    end = -1
+                # число на границе куска могло оборваться ("1.5e" + "-07"): принимаем
+                # значение, только если за ним уже виден разделитель элементов массива
+                if end != -1 and (eof or (end < len(buf) and buf[end] in _AFTER_ITEM)):
+                    yield value
+                    pos = end
+                    need_comma = True
+                    continue
+            elif eof:
+                raise json.JSONDecodeError("Неожиданный конец массива", buf, pos)
+
+            # дочитываем: отбрасываем разобранное, кусок растёт вместе с записью
+            more = f.read(max(chunk_size, len(buf) - pos))
+            buf = buf[pos:] + more
+            pos = 0
+            eof = not more
+
+
+def write_array(f: IO[bytes], items: Iterable[Any]) -> int:
+    """Записать JSON-массив по записи на строку. Возвращает число записей."""
+    count = 0
+    batch: list[bytes] = []
+    f.write(b"[")
+    for item in items:
+        batch.append(dumps(item))
+        if len(batch) >= WRITE_BATCH:
+            f.write((b"\n" if not count else b",\n") + b",\n".join(batch))
+            count += len(batch)
+            batch.clear()
+    if batch:
+        f.write((b"\n" if not count else b",\n") + b",\n".join(batch))
+        count += len(batch)
+    f.write(b"\n]\n" if count else b"]\n")
+    return count
+
+
+@contextmanager
+def atomic_writer(path: str) -> Iterator[IO[bytes]]:
+    """Буферизованный бинарный файл; заменяет path, только если блок завершился без ошибки."""
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix="tmp_", suffix=".json", dir=d or None)
+    try:
+        with os.fdopen(fd, "wb", buffering=WRITE_BUFFER) as f:
+            yield f
+        os.replace(tmp_path, path)  # atomic on same filesystem
+    finally:
+        if os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
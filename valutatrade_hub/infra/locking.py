@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import ExitStack, contextmanager
+from typing import Any
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows: межпроцессной блокировки нет
+    fcntl = None  # type: ignore[assignment]
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False) -> Iterator[None]:
+    """
+    Межпроцессная блокировка (fcntl.flock) на файле <path>.lock.
+    shared=True — блокировка на чтение, несколько читателей одновременно.
+    """
+    if fcntl is None:
+        yield
+        return
+    lock_path = path + ".lock"
+    d = os.path.dirname(lock_path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+
+class KeyedLocks:
+    """
+    Потоковые блокировки по ключу (например, user_id): разные ключи не мешают друг другу.
+    Блокировка живёт, пока её кто-то держит или ждёт: у записи счётчик ссылок,
+    на нуле она удаляется — словарь не растёт с числом ключей.
+    """
+
+    def __init__(self) -> None:
+        self._guard = threading.Lock()
+        # ключ → [блокировка, число держащих и ждущих]
+        self._locks: dict[int, list[Any]] = {}
+
+    @contextmanager
+    def _held(self, key: int) -> Iterator[None]:
+        with self._guard:
+            entry = self._locks.get(key)
+            if entry is None:
+                entry = self._locks[key] = [threading.Lock(), 0]
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    @contextmanager
+    def hold(self, keys: Iterable[int]) -> Iterator[None]:
+        # всегда в порядке возрастания ключей — без взаимных блокировок
+        with ExitStack() as stack:
+            for key in sorted(set(keys)):
+                stack.enter_context(self._held(key))
+            yield
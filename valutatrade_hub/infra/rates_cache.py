@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from valutatrade_hub.core.utils import parse_iso_dt
+from valutatrade_hub.infra.database import DatabaseManager
+
+_UNSET: Any = object()
+
+
+@dataclass(frozen=True)
+class RateEntry:
+    rate: float
+    updated_at: str | None
+    updated_dt: datetime | None
+    source: str
+    # updated_dt в секундах эпохи: сравнение свежести без datetime
+    updated_ts: float | None = None
+
+    def to_json(self) -> dict[str, Any]:
+        return {"rate": self.rate, "updated_at": self.updated_at, "source": self.source}
+
+
+@dataclass(frozen=True)
+class RatesSnapshot:
+    version: int
+    pairs: dict[str, RateEntry]
+    last_refresh: str | None
+    # {"BTC_USD": 59337.21, ...} — для Portfolio.get_total_value
+    simple: dict[str, float] = field(default_factory=dict)
+    # пары, изменившиеся относительно предыдущей версии; None — снапшот перечитан целиком
+    changed: frozenset[str] | None = None
+
+
+def _parse_time(updated_at: Any) -> datetime | None:
+    try:
+        return parse_iso_dt(updated_at) if updated_at else None
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def parse_entry(
+    entry: dict[str, Any], times: dict[str, datetime | None] | None = None
+) -> RateEntry | None:
+    """
+    Запись пары из хранилища → RateEntry; None, если курс некорректен.
+    times — кеш разобранных updated_at (строка → datetime) на одну пачку пар.
+    """
+    try:
+        rate = float(entry["rate"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    updated_at = entry.get("updated_at")
+    if times is None or not isinstance(updated_at, str):
+        updated_dt = _parse_time(updated_at)
+    elif updated_at in times:
+        updated_dt = times[updated_at]
+    else:
+        updated_dt = times[updated_at] = _parse_time(updated_at)
+    return RateEntry(
+        rate=rate,
+        updated_at=updated_at,
+        updated_dt=updated_dt,
+        source=entry.get("source", "unknown"),
+        updated_ts=updated_dt.timestamp() if updated_dt else None,
+    )
+
+
+def _make_snapshot(
+    pairs: dict[str, RateEntry],
+    last_refresh: str | None,
+    version: int,
+    changed: frozenset[str] | None = None,
+) -> RatesSnapshot:
+    return RatesSnapshot(
+        version=version,
+        pairs=pairs,
+        last_refresh=last_refresh,
+        simple={k: e.rate for k, e in pairs.items()},
+        changed=changed,
+    )
+
+
+def _parse_snapshot(raw: dict[str, Any], version: int) -> RatesSnapshot:
+    pairs: dict[str, RateEntry] = {}
+    times: dict[str, datetime | None] = {}
+    for key, entry in (raw.get("pairs") or {}).items():
+        parsed = parse_entry(entry, times)
+        if parsed is not None:
+            pairs[key] = parsed
+    return _make_snapshot(pairs, raw.get("last_refresh"), version)
+
+
+class RatesCache:
+    """
+    Singleton: разобранный снапшот курсов в памяти процесса.
+
+    Снапшот перечитывается только если изменился отпечаток хранилища
+    (mtime/inode rates.json или версия в БД) либо после publish() от updater.
+    version растёт при каждой смене снапшота — по нему зависимые кеши
+    понимают, что пора пересчитаться; подписчики (subscribe) узнают о смене
+    сразу. Если курсы не изменились, версия тоже не меняется.
+    """
+    _instance: RatesCache | None = None
+
+    def __new__(cls) -> RatesCache:
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._db = DatabaseManager()
+            cls._instance._lock = threading.Lock()
+            cls._instance._stamp = _UNSET
+            cls._instance._version = 0
+            cls._instance._snapshot = RatesSnapshot(version=0, pairs={}, last_refresh=None)
+            cls._instance._listeners = []
+        return cls._instance
+
+    def snapshot(self) -> RatesSnapshot:
+        stamp: Hashable | None = self._db.stamp("rates")
+        if stamp is not None and stamp == self._stamp:
+            return self._snapshot
+        with self._lock:
+            if stamp is not None and stamp == self._stamp:
+                return self._snapshot
+            changed = self._install(self._db.load_rates(), stamp)
+            snap = self._snapshot
+        if changed:
+            self._notify(snap)
+        return snap
+
+    def get(self, pair: str) -> RateEntry | None:
+        return self.snapshot().pairs.get(pair)
+
+    @property
+    def version(self) -> int:
+        """Версия актуального снапшота: не изменилась — курсы те же, перечитывать нечего."""
+        return self.snapshot().version
+
+    def subscribe(self, listener: Callable[[RatesSnapshot], None]) -> None:
+        """listener(snapshot) вызывается после каждой смены снапшота."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def publish(self, raw: dict[str, Any]) -> None:
+        """Updater только что записал снапшот — берём его из памяти, без чтения файла."""
+        with self._lock:
+            changed = self._install(raw, self._db.stamp("rates"))
+            snap = self._snapshot
+        if changed:
+            self._notify(snap)
+
+    def apply(self, changes: dict[str, RateEntry], last_refresh: str | None) -> RatesSnapshot:
+        """
+        Updater записал изменившиеся пары: новый снапшот = текущий + changes.
+        Остальные пары не разбираются заново.
+        """
+        with self._lock:
+            current = self._snapshot
+            self._version += 1
+            self._snapshot = _make_snapshot(
+                {**current.pairs, **changes}, last_refresh, self._version, frozenset(changes)
+            )
+            self._stamp = self._db.stamp("rates")
+            snap = self._snapshot
+        self._notify(snap)
+        return snap
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._stamp = _UNSET
+
+    def _install(self, raw: dict[str, Any], stamp: Hashable | None) -> bool:
+        fresh = _parse_snapshot(raw, self._version + 1)
+        self._stamp = stamp
+        if (
+            fresh.pairs == self._snapshot.pairs
+            and fresh.last_refresh == self._snapshot.last_refresh
+        ):
+            # файл переписан, но курсы те же — зависимые кеши пересчитывать незачем
+            return False
+        self._version += 1
+        self._snapshot = fresh
+        return True
+
+    def _notify(self, snap: RatesSnapshot) -> None:
+        for listener in list(self._listeners):
+            listener(snap)
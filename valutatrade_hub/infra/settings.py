@@ -1,12 +1,13 @@
 from __future__ import annotations
 
+import json
 import os
 from typing import Any
 
-try:
-    import tomllib  # py311
-except ImportError:  # pragma: no cover
-    tomllib = None  # type: ignore
+# разобранная секция [tool.valutatrade] рядом с pyproject.toml;
+# действительна, пока у pyproject.toml не изменились mtime и размер
+CACHE_FILE_NAME = ".valutatrade_settings.json"
+_CACHE_FORMAT = 1
 
 
 class SettingsLoader:
@@ -14,6 +15,9 @@ class SettingsLoader:
     Singleton через __new__:
     - простой и понятный способ обеспечить один экземпляр
     - не создаёт новых экземпляров при повторных импортах
+
+    Чтобы не импортировать tomllib и не разбирать pyproject.toml на каждом
+    запуске CLI, секция кешируется в CACHE_FILE_NAME (обычный JSON).
     """
     _instance: "SettingsLoader | None" = None
 
@@ -27,11 +31,26 @@ class SettingsLoader:
     def _load_from_pyproject(self) -> dict[str, Any]:
         # предполагаем запуск из корня проекта
         path = os.path.join(os.getcwd(), "pyproject.toml")
-        if not os.path.exists(path) or tomllib is None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return {}
+        stamp = [_CACHE_FORMAT, st.st_mtime_ns, st.st_size]
+        cache_path = os.path.join(os.path.dirname(path), CACHE_FILE_NAME)
+
+        cached = _read_cache(cache_path, stamp)
+        if cached is not None:
+            return cached
+
+        try:
+            import tomllib  # py311
+        except ImportError:  # pragma: no cover
             return {}
         with open(path, "rb") as f:
             data = tomllib.load(f)
-        return (data.get("tool") or {}).get("valutatrade") or {}
+        section = (data.get("tool") or {}).get("valutatrade") or {}
+        _write_cache(cache_path, stamp, section)
+        return section
 
     def reload(self) -> None:
         self._cache = self._load_from_pyproject()
@@ -41,3 +60,30 @@ class SettingsLoader:
         if not self._loaded:
             self.reload()
         return self._cache.get(key, default)
+
+
+def _read_cache(path: str, stamp: list[int]) -> dict[str, Any] | None:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(data, dict) or data.get("stamp") != stamp:
+        return None
+    settings = data.get("settings")
+    return settings if isinstance(settings, dict) else None
+
+
+def _write_cache(path: str, stamp: list[int], settings: dict[str, Any]) -> None:
+    # кеш — только ускорение: каталог может быть только для чтения,
+    # а в TOML бывают значения, которых нет в JSON (даты)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"stamp": stamp, "settings": settings}, f, ensure_ascii=False)
+        os.replace(tmp, path)
+    except (OSError, TypeError, ValueError):
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
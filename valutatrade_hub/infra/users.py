@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Hashable
+from typing import Any
+
+from valutatrade_hub.infra.database import DatabaseManager
+
+_UNSET: Any = object()
+
+
+class UserRepository:
+    """
+    Каталог пользователей с индексом username → запись и текущим max(user_id).
+
+    Коллекция перечитывается только когда меняется её отпечаток
+    (mtime/size файла, версия в БД и т.п.), поэтому проверка имени,
+    выдача нового id и поиск при входе — O(1).
+    """
+
+    def __init__(self, db: DatabaseManager | None = None) -> None:
+        self._db = db or DatabaseManager()
+        self._lock = threading.RLock()
+        self._by_name: dict[str, dict[str, Any]] = {}
+        self._max_id = 0
+        self._stamp: Hashable | None = _UNSET
+
+    def _refresh(self) -> None:
+        stamp = self._db.stamp("users")
+        if stamp is not None and stamp == self._stamp:
+            return
+        by_name: dict[str, dict[str, Any]] = {}
+        max_id = 0
+        for u in self._db.iter_users():
+            by_name[u["username"]] = u
+            max_id = max(max_id, int(u["user_id"]))
+        self._by_name, self._max_id, self._stamp = by_name, max_id, stamp
+
+    def get_by_username(self, username: str) -> dict[str, Any] | None:
+        with self._lock:
+            self._refresh()
+            u = self._by_name.get(username)
+            return dict(u) if u is not None else None
+
+    def exists(self, username: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return username in self._by_name
+
+    def next_id(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._max_id + 1
+
+    def create(self, record: dict[str, Any]) -> int | None:
+        """
+        Выдать новый user_id и сохранить пользователя одной операцией
+        (параллельные регистрации в процессе не получат одинаковый id).
+        None — имя уже занято.
+        """
+        with self._lock:
+            self._refresh()
+            if record["username"] in self._by_name:
+                return None
+            user = {"user_id": self._max_id + 1, **record}
+            self.save(user)
+            return int(user["user_id"])
+
+    def save(self, user: dict[str, Any]) -> None:
+        """Добавить или обновить запись пользователя и сразу обновить индекс."""
+        with self._lock:
+            self._refresh()
+            self._db.save_user(user)
+            self._by_name[user["username"]] = dict(user)
+            self._max_id = max(self._max_id, int(user["user_id"]))
+            self._stamp = self._db.stamp("users")
@@ -1,14 +1,118 @@
+import atexit
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any
 
 from valutatrade_hub.infra.settings import SettingsLoader
 
+_listeners: list["_Listener"] = []
+
 
 def _ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
+class JsonLinesFormatter(logging.Formatter):
+    """
+    Одна запись — одна строка JSON.
+    Поля доменной операции (extra={"action_fields": {...}} из log_action)
+    выносятся на верхний уровень, остальные записи получают "message".
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        data: dict[str, Any] = {
+            # timezone.utc, а не datetime.UTC: пакет поддерживает Python 3.10
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),  # noqa: UP017
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        fields = getattr(record, "action_fields", None)
+        if isinstance(fields, dict):
+            data.update(fields)
+        else:
+            data["message"] = record.getMessage()
+        if record.exc_info:
+            data["exc"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Кладёт запись в ограниченную очередь; на диск её пишет поток QueueListener.
+
+    - сообщение НЕ форматируется в вызывающем потоке (в отличие от QueueHandler.prepare):
+      msg % args считается уже в потоке записи, поэтому args должны быть неизменяемыми
+      значениями (строки, числа) — так логирует весь проект
+    - очередь заполнена: overflow="drop" — запись отбрасывается и учитывается в dropped,
+      overflow="block" — вызывающий поток ждёт места (ни одна запись не теряется)
+    """
+
+    def __init__(self, q: "queue.Queue[logging.LogRecord | None]", overflow: str = "drop") -> None:
+        super().__init__(q)
+        self.block = overflow == "block"
+        self.dropped = 0
+        self._reported = 0
+        # счётчики меняют все логирующие потоки
+        self._drop_lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self.block:
+            self.queue.put(record)
+            return
+        with self._drop_lock:
+            try:
+                if self.dropped != self._reported:
+                    self._report_dropped(record)
+                self.queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+
+    def _report_dropped(self, record: logging.LogRecord) -> None:
+        # вызывается под _drop_lock
+        lost = self.dropped - self._reported
+        warning = logging.LogRecord(
+            record.name, logging.WARNING, __file__, 0,
+            "log queue overflow: %d records dropped", (lost,), None,
+        )
+        self.queue.put_nowait(warning)
+        self._reported = self.dropped
+
+
+class _Listener(QueueListener):
+    def enqueue_sentinel(self) -> None:
+        # put_nowait из базового класса падает на заполненной очереди
+        self.queue.put(self._sentinel)
+
+
+def _queued(
+    handler: logging.Handler, settings: SettingsLoader, overflow: str
+) -> BoundedQueueHandler:
+    """Обернуть обработчик: вызывающий поток только ставит запись в очередь."""
+    q: queue.Queue[logging.LogRecord | None] = queue.Queue(
+        maxsize=max(1, int(settings.get("LOG_QUEUE_SIZE", 10000)))
+    )
+    listener = _Listener(q, handler, respect_handler_level=True)
+    listener.start()
+    _listeners.append(listener)
+    qh = BoundedQueueHandler(q, overflow=overflow.lower())
+    qh.setLevel(handler.level)
+    return qh
+
+
+def stop_logging() -> None:
+    """Дописать всё из очередей и остановить потоки записи (вызывается и при выходе)."""
+    while _listeners:
+        _listeners.pop().stop()
+
+
 def configure_logging() -> None:
     """
     Настройка логирования:
@@ -16,9 +120,17 @@ def configure_logging() -> None:
     - parser.log: Parser Service
 
     Ротация: по размеру (1MB, 3 бэкапа).
-    Формат: человекочитаемый (как в ТЗ).
+    Формат: человекочитаемый (как в ТЗ); для actions.log можно
+    ACTIONS_LOG_FORMAT = "json" — JSON lines.
+
+    Запись асинхронная: логгеры получают BoundedQueueHandler, а файлы и консоль
+    пишут потоки QueueListener. Очередь — LOG_QUEUE_SIZE записей,
+    при переполнении — LOG_QUEUE_OVERFLOW ("drop" | "block") для консоли и parser.log;
+    actions.log — журнал операций, по умолчанию ACTIONS_LOG_QUEUE_OVERFLOW = "block".
     """
     settings = SettingsLoader()
+    overflow = str(settings.get("LOG_QUEUE_OVERFLOW", "drop"))
+    actions_overflow = str(settings.get("ACTIONS_LOG_QUEUE_OVERFLOW", "block"))
     log_dir = str(settings.get("LOG_DIR", "logs"))
     _ensure_dir(log_dir)
 
@@ -38,14 +150,15 @@ def configure_logging() -> None:
     ch = logging.StreamHandler()
     ch.setLevel(level)
     ch.setFormatter(fmt)
-    root.addHandler(ch)
+    root.addHandler(_queued(ch, settings, overflow))
 
     # Actions file handler
     actions_file = str(settings.get("ACTIONS_LOG_FILE", "logs/actions.log"))
     ah = RotatingFileHandler(actions_file, maxBytes=1_000_000, backupCount=3, encoding="utf-8")
     ah.setLevel(level)
-    ah.setFormatter(fmt)
-    logging.getLogger("valutatrade.actions").addHandler(ah)
+    json_actions = str(settings.get("ACTIONS_LOG_FORMAT", "text")).lower() == "json"
+    ah.setFormatter(JsonLinesFormatter() if json_actions else fmt)
+    logging.getLogger("valutatrade.actions").addHandler(_queued(ah, settings, actions_overflow))
     logging.getLogger("valutatrade.actions").setLevel(level)
     logging.getLogger("valutatrade.actions").propagate = False
 
@@ -54,6 +167,8 @@ def configure_logging() -> None:
     ph = RotatingFileHandler(parser_file, maxBytes=1_000_000, backupCount=3, encoding="utf-8")
     ph.setLevel(level)
     ph.setFormatter(fmt)
-    logging.getLogger("valutatrade.parser").addHandler(ph)
+    logging.getLogger("valutatrade.parser").addHandler(_queued(ph, settings, overflow))
     logging.getLogger("valutatrade.parser").setLevel(level)
     logging.getLogger("valutatrade.parser").propagate = False
+
+    atexit.register(stop_logging)
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Mapping
+from dataclasses import astuple, dataclass
+from typing import Any
+
+from valutatrade_hub.infra.locking import file_lock
+from valutatrade_hub.parser_service.timeseries import TimePoint, TimeSeriesStore, to_epoch
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy необязателен
+    np = None  # type: ignore[assignment]
+
+INTERVALS: dict[str, int] = {"1m": 60, "5m": 300, "1h": 3600, "1d": 86400}
+
+
+@dataclass(frozen=True)
+class Candle:
+    start: int
+    open: float
+    high: float
+    low: float
+    close: float
+    # среднее, взвешенное по времени действия курса (аналог VWAP без объёмов)
+    twap: float
+    mean: float
+    count: int
+
+
+class _ClosedSeries:
+    """Закрытые свечи одного ряда в памяти: только последние max_candles штук."""
+
+    __slots__ = ("candles", "last_start", "complete", "size")
+
+    def __init__(self, candles: list[Candle], complete: bool, size: int) -> None:
+        self.candles = candles
+        self.last_start = candles[-1].start if candles else None
+        # в памяти все свечи файла — запросам не нужно читать файл
+        self.complete = complete
+        # размер файла при чтении: изменился — файл дописал другой процесс
+        self.size = size
+
+
+class CandleAggregator:
+    """
+    Свечи OHLC по парам поверх TimeSeriesStore.
+
+    Закрытые свечи (конец интервала уже прошёл) дописываются в кеш
+    <cache_dir>/<PAIR>.<interval>.jsonl и больше не пересчитываются;
+    при каждом update() обрабатываются только точки начиная с первой
+    незакрытой свечи.
+
+    - точка, пришедшая после закрытия своей свечи (reopen / update_pairs(since=...)),
+      снова открывает эту свечу: она и более поздние удаляются из кеша и пересчитываются
+    - запись в кеш идёт под файловой блокировкой и только для свечей новее уже записанных,
+      при чтении дубликаты по start схлопываются — два процесса не плодят копии
+    - в памяти держится не больше max_series рядов и max_candles последних свечей ряда;
+      запросы глубже читают файл
+    """
+
+    def __init__(
+        self,
+        store: TimeSeriesStore,
+        cache_dir: str,
+        max_series: int = 64,
+        max_candles: int = 5000,
+    ) -> None:
+        self.store = store
+        self.cache_dir = cache_dir
+        self.max_series = max(1, int(max_series))
+        self.max_candles = max(1, int(max_candles))
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._closed: OrderedDict[tuple[str, str], _ClosedSeries] = OrderedDict()
+        self._open: dict[tuple[str, str], Candle | None] = {}
+
+    # ---- кеш закрытых свечей ----
+    def _cache_path(self, pair: str, interval: str) -> str:
+        return os.path.join(self.cache_dir, f"{pair}.{interval}.jsonl")
+
+    def _read_file(self, pair: str, interval: str) -> list[Candle]:
+        by_start: dict[int, Candle] = {}
+        path = self._cache_path(pair, interval)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        start, o, h, lo, c, twap, mean, count = json.loads(line)
+                        start = int(start)
+                        by_start[start] = Candle(start, o, h, lo, c, twap, mean, int(count))
+        return [by_start[k] for k in sorted(by_start)]
+
+    def _closed_series(self, pair: str, interval: str) -> _ClosedSeries:
+        key = (pair, interval)
+        path = self._cache_path(pair, interval)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        cached = self._closed.get(key)
+        if cached is None or cached.size != size:
+            candles = self._read_file(pair, interval)
+            complete = len(candles) <= self.max_candles
+            cached = _ClosedSeries(candles[-self.max_candles :], complete, size)
+            self._closed[key] = cached
+        self._closed.move_to_end(key)
+        while len(self._closed) > self.max_series:
+            self._closed.popitem(last=False)
+        return cached
+
+    def _append_closed(self, pair: str, interval: str, finished: list[Candle]) -> None:
+        path = self._cache_path(pair, interval)
+        with file_lock(path):
+            # другой процесс мог успеть записать те же свечи
+            cached = self._closed_series(pair, interval)
+            last = cached.last_start
+            fresh = [c for c in finished if last is None or c.start > last]
+            if not fresh:
+                return
+            with open(path, "a", encoding="utf-8") as f:
+                for c in fresh:
+                    f.write(json.dumps(list(astuple(c)), separators=(",", ":")) + "\n")
+            cached.candles.extend(fresh)
+            if len(cached.candles) > self.max_candles:
+                del cached.candles[: len(cached.candles) - self.max_candles]
+                cached.complete = False
+            cached.last_start = fresh[-1].start
+            cached.size = os.path.getsize(path)
+
+    def reopen(self, pair: str, since: TimePoint, intervals: Iterable[str] = INTERVALS) -> None:
+        """Пришли точки не раньше since: закрытые свечи, в которые они попадают, пересчитываются."""
+        moment = to_epoch(since)
+        with self._lock:
+            for interval in intervals:
+                bucket = moment - moment % INTERVALS[interval]
+                cached = self._closed_series(pair, interval)
+                if cached.last_start is None or cached.last_start < bucket:
+                    continue
+                path = self._cache_path(pair, interval)
+                with file_lock(path):
+                    keep = [c for c in self._read_file(pair, interval) if c.start < bucket]
+                    tmp = path + ".tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        for c in keep:
+                            f.write(json.dumps(list(astuple(c)), separators=(",", ":")) + "\n")
+                    os.replace(tmp, path)
+                self._closed.pop((pair, interval), None)
+
+    # ---- инкрементальное обновление ----
+    def update(self, pair: str, interval: str, now: float | None = None) -> None:
+        seconds = INTERVALS[interval]
+        now = time.time() if now is None else now
+        with self._lock:
+            closed = self._closed_series(pair, interval)
+            next_start = closed.last_start + seconds if closed.last_start is not None else 0
+            ts, rates = self.store.range(pair, next_start, int(now))
+            candles = _build_candles(ts, rates, seconds, now)
+
+            finished = [c for c in candles if c.start + seconds <= now]
+            if finished:
+                self._append_closed(pair, interval, finished)
+            tail = candles[len(finished):]
+            self._open[(pair, interval)] = tail[-1] if tail else None
+
+    def update_pairs(
+        self,
+        pairs: Iterable[str],
+        intervals: Iterable[str] = INTERVALS,
+        since: Mapping[str, int] | None = None,
+    ) -> None:
+        """since — самая ранняя новая точка по паре: поздние точки снова открывают свои свечи."""
+        now = time.time()
+        intervals = list(intervals)
+        for pair in pairs:
+            if since and pair in since:
+                self.reopen(pair, since[pair], intervals)
+            for interval in intervals:
+                self.update(pair, interval, now=now)
+
+    # ---- запросы ----
+    def candles(
+        self,
+        pair: str,
+        interval: str,
+        start: TimePoint | None = None,
+        end: TimePoint | None = None,
+    ) -> list[Candle]:
+        """Закрытые свечи из кеша плюс текущая незакрытая."""
+        self.update(pair, interval)
+        lo = to_epoch(start) if start is not None else None
+        hi = to_epoch(end) if end is not None else None
+        with self._lock:
+            closed = self._closed_series(pair, interval)
+            in_memory = closed.complete or (
+                lo is not None and bool(closed.candles) and lo >= closed.candles[0].start
+            )
+            out = list(closed.candles) if in_memory else self._read_file(pair, interval)
+            current = self._open.get((pair, interval))
+        if current is not None:
+            out.append(current)
+        return [c for c in out if (lo is None or c.start >= lo) and (hi is None or c.start <= hi)]
+
+    def rolling_volatility(self, pair: str, interval: str, window: int) -> list[tuple[int, float]]:
+        """
+        Скользящая волатильность: стандартное отклонение лог-доходностей
+        по close за последние window свечей. Возвращает (start свечи, значение).
+        """
+        candles = self.candles(pair, interval)
+        closes = [c.close for c in candles]
+        if window < 2 or len(closes) <= window:
+            return []
+        if np is not None:
+            r = np.diff(np.log(np.asarray(closes)))
+            windows = np.lib.stride_tricks.sliding_window_view(r, window)
+            vols = windows.std(axis=1, ddof=1)
+            return list(zip((c.start for c in candles[window:]), vols.tolist(), strict=True))
+
+        r = [math.log(b / a) for a, b in zip(closes[:-1], closes[1:], strict=True)]
+        out: list[tuple[int, float]] = []
+        for i in range(window, len(r) + 1):
+            chunk = r[i - window : i]
+            mean = sum(chunk) / window
+            var = sum((x - mean) ** 2 for x in chunk) / (window - 1)
+            out.append((candles[i].start, math.sqrt(var)))
+        return out
+
+
+def _build_candles(ts: Any, rates: Any, seconds: int, now: float) -> list[Candle]:
+    if len(ts) == 0:
+        return []
+    if np is not None:
+        return _build_candles_numpy(np.asarray(ts), np.asarray(rates), seconds, now)
+    return _build_candles_python(list(ts), list(rates), seconds, now)
+
+
+def _build_candles_numpy(ts: Any, rates: Any, seconds: int, now: float) -> list[Candle]:
+    bucket = ts - ts % seconds
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    ends = np.append(starts[1:], len(ts))
+    counts = ends - starts
+
+    # вес точки — сколько секунд курс действовал в пределах своей свечи
+    next_t = np.append(ts[1:], max(now, ts[-1]))
+    weights = np.minimum(next_t, bucket + seconds) - ts
+    w_sum = np.add.reduceat(weights, starts)
+    rw_sum = np.add.reduceat(rates * weights, starts)
+    mean = np.add.reduceat(rates, starts) / counts
+    twap = np.where(w_sum > 0, rw_sum / np.where(w_sum > 0, w_sum, 1), mean)
+
+    return [
+        Candle(int(s), float(o), float(h), float(lo), float(c), float(tw), float(m), int(n))
+        for s, o, h, lo, c, tw, m, n in zip(
+            bucket[starts],
+            rates[starts],
+            np.maximum.reduceat(rates, starts),
+            np.minimum.reduceat(rates, starts),
+            rates[ends - 1],
+            twap,
+            mean,
+            counts,
+            strict=True,
+        )
+    ]
+
+
+def _build_candles_python(
+    ts: list[int], rates: list[float], seconds: int, now: float
+) -> list[Candle]:
+    out: list[Candle] = []
+    i, n = 0, len(ts)
+    while i < n:
+        start = ts[i] - ts[i] % seconds
+        j = i
+        while j < n and ts[j] - ts[j] % seconds == start:
+            j += 1
+        chunk = rates[i:j]
+        w_sum = rw_sum = 0.0
+        for k in range(i, j):
+            next_t = ts[k + 1] if k + 1 < n else max(now, ts[k])
+            w = min(next_t, start + seconds) - ts[k]
+            w_sum += w
+            rw_sum += rates[k] * w
+        mean = sum(chunk) / len(chunk)
+        out.append(
+            Candle(
+                start=start,
+                open=chunk[0],
+                high=max(chunk),
+                low=min(chunk),
+                close=chunk[-1],
+                twap=rw_sum / w_sum if w_sum > 0 else mean,
+                mean=mean,
+                count=len(chunk),
+            )
+        )
+        i = j
+    return out
@@ -1,61 +1,139 @@
 from __future__ import annotations
 
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections.abc import Iterable, Sequence
 from typing import Any
 
-import requests
-
 from valutatrade_hub.core.exceptions import ApiRequestError
 from valutatrade_hub.parser_service.config import ParserConfig
+from valutatrade_hub.parser_service.transport import HttpTransport
+
+
+class RateLimiter:
+    """Не больше per_minute запросов в минуту: запросы разносятся на равные интервалы."""
+
+    def __init__(self, per_minute: float) -> None:
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
 
 
 class BaseApiClient(ABC):
+    """
+    Источник курсов.
+
+    Ёмкость источника (её учитывает планировщик запросов, providers.plan_requests):
+    - supported_pairs() — пары "<CODE>_<BASE>", которые источник умеет отдавать
+    - batch_size — пар на один запрос (0 — все пары одним запросом)
+    - request_cost — цена одного запроса в единицах квоты
+    - rate_limit_per_minute — не чаще стольких запросов в минуту (0 — без ограничения)
+    Значения по умолчанию переопределяются в PARSER_PROVIDER_LIMITS.
+    """
+
+    # имя источника: ключ реестра, PARSER_PROVIDERS, PARSER_SOURCE_INTERVALS
+    name: str = ""
+    batch_size: int = 0
+    request_cost: float = 1.0
+    rate_limit_per_minute: float = 0.0
+
+    _limiter: RateLimiter | None = None
+
+    def supported_pairs(self) -> list[str]:
+        """[] — источник не сообщает пары и опрашивается целиком (fetch_rates)."""
+        return []
+
     @abstractmethod
-    def fetch_rates(self) -> dict[str, float]:
+    def fetch_pairs(self, pairs: Sequence[str]) -> dict[str, float]:
+        """Курсы для pairs одним запросом (len(pairs) <= batch_size, если он задан)."""
         raise NotImplementedError
 
+    def batches(self, pairs: Iterable[str]) -> list[list[str]]:
+        items = list(pairs)
+        if not items:
+            return []
+        size = self.batch_size if self.batch_size > 0 else len(items)
+        return [items[i : i + size] for i in range(0, len(items), size)]
+
+    def fetch_batches(self, batches: Iterable[Sequence[str]]) -> dict[str, float]:
+        if self._limiter is None:
+            self._limiter = RateLimiter(self.rate_limit_per_minute)
+        out: dict[str, float] = {}
+        for batch in batches:
+            self._limiter.acquire()
+            out.update(self.fetch_pairs(batch))
+        return out
+
+    def fetch_rates(self) -> dict[str, float]:
+        """Все поддерживаемые пары."""
+        return self.fetch_batches(self.batches(self.supported_pairs()))
+
 
 class CoinGeckoClient(BaseApiClient):
-    def __init__(self, config: ParserConfig) -> None:
+    name = "CoinGecko"
+    # ids в query-строке: длинный список режется на несколько запросов
+    batch_size = 100
+    # бесплатный тариф — порядка 30 запросов в минуту
+    rate_limit_per_minute = 30.0
+
+    def __init__(self, config: ParserConfig, transport: HttpTransport | None = None) -> None:
         self.config = config
+        self.transport = transport or HttpTransport.default(config)
 
-    def fetch_rates(self) -> dict[str, float]:
-        ids = [
-            self.config.CRYPTO_ID_MAP[c]
-            for c in self.config.CRYPTO_CURRENCIES
-            if c in self.config.CRYPTO_ID_MAP
+    def supported_pairs(self) -> list[str]:
+        base = self.config.BASE_CURRENCY
+        return [
+            f"{c}_{base}" for c in self.config.CRYPTO_CURRENCIES if c in self.config.CRYPTO_ID_MAP
         ]
+
+    def fetch_pairs(self, pairs: Sequence[str]) -> dict[str, float]:
+        base = self.config.BASE_CURRENCY
+        ids: dict[str, str] = {}
+        for pair in pairs:
+            code, _, pair_base = pair.partition("_")
+            cid = self.config.CRYPTO_ID_MAP.get(code)
+            if pair_base == base and cid:
+                ids[cid] = code
         if not ids:
             return {}
 
-        params = {"ids": ",".join(ids), "vs_currencies": self.config.BASE_CURRENCY.lower()}
-        try:
-            r = requests.get(
-                self.config.COINGECKO_URL,
-                params=params,
-                timeout=self.config.REQUEST_TIMEOUT,
-            )
-            if r.status_code != 200:
-                raise ApiRequestError(f"CoinGecko status_code={r.status_code}")
-            data: dict[str, Any] = r.json()
-        except requests.exceptions.RequestException as e:
-            raise ApiRequestError(f"CoinGecko network error: {e}") from e
-        except ValueError as e:
-            raise ApiRequestError(f"CoinGecko invalid JSON: {e}") from e
+        params = {"ids": ",".join(ids), "vs_currencies": base.lower()}
+        data: dict[str, Any] = self.transport.get_json(
+            self.config.COINGECKO_URL, source=self.name, params=params
+        )
 
         out: dict[str, float] = {}
-        base_key = self.config.BASE_CURRENCY.lower()
-        for code, cid in self.config.CRYPTO_ID_MAP.items():
+        base_key = base.lower()
+        for cid, code in ids.items():
             if cid in data and base_key in data[cid]:
-                out[f"{code}_{self.config.BASE_CURRENCY}"] = float(data[cid][base_key])
+                out[f"{code}_{base}"] = float(data[cid][base_key])
         return out
 
 
 class ExchangeRateApiClient(BaseApiClient):
-    def __init__(self, config: ParserConfig) -> None:
+    name = "ExchangeRate-API"
+    # один запрос /latest/<BASE> отдаёт все валюты сразу
+    batch_size = 0
+
+    def __init__(self, config: ParserConfig, transport: HttpTransport | None = None) -> None:
         self.config = config
+        self.transport = transport or HttpTransport.default(config)
 
-    def fetch_rates(self) -> dict[str, float]:
+    def supported_pairs(self) -> list[str]:
+        return [f"{c}_{self.config.BASE_CURRENCY}" for c in self.config.FIAT_CURRENCIES]
+
+    def fetch_pairs(self, pairs: Sequence[str]) -> dict[str, float]:
         if not self.config.EXCHANGERATE_API_KEY:
             raise ApiRequestError("ExchangeRate-API key is missing (EXCHANGERATE_API_KEY)")
 
@@ -63,15 +141,7 @@ class ExchangeRateApiClient(BaseApiClient):
             f"{self.config.EXCHANGERATE_API_URL}/"
             f"{self.config.EXCHANGERATE_API_KEY}/latest/{self.config.BASE_CURRENCY}"
         )
-        try:
-            r = requests.get(url, timeout=self.config.REQUEST_TIMEOUT)
-            if r.status_code != 200:
-                raise ApiRequestError(f"ExchangeRate-API status_code={r.status_code}")
-            data: dict[str, Any] = r.json()
-        except requests.exceptions.RequestException as e:
-            raise ApiRequestError(f"ExchangeRate-API network error: {e}") from e
-        except ValueError as e:
-            raise ApiRequestError(f"ExchangeRate-API invalid JSON: {e}") from e
+        data: dict[str, Any] = self.transport.get_json(url, source=self.name)
 
         if data.get("result") != "success":
             raise ApiRequestError(f"ExchangeRate-API result={data.get('result')}")
@@ -85,8 +155,9 @@ class ExchangeRateApiClient(BaseApiClient):
         # Нам нужны пары <FIAT>_USD. В ответе base=USD и conversion_rates[EUR]=0.8583 означает 1 USD = 0.8583 EUR.
         # Но по ТЗ в rates.json формат: EUR_USD = 1 EUR = X USD.
         # Поэтому инвертируем: EUR_USD = 1 / conversion_rates[EUR]
-        for code in self.config.FIAT_CURRENCIES:
-            if code in rates and float(rates[code]) != 0:
-                out[f"{code}_{self.config.BASE_CURRENCY}"] = 1.0 / float(rates[code])
+        for pair in pairs:
+            code, _, pair_base = pair.partition("_")
+            if pair_base == self.config.BASE_CURRENCY and code in rates and float(rates[code]) != 0:
+                out[pair] = 1.0 / float(rates[code])
 
         return out
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from typing import Any
 
 from valutatrade_hub.infra.settings import SettingsLoader
 
@@ -19,6 +20,10 @@ class ParserConfig:
     CRYPTO_ID_MAP: dict[str, str] = None  # type: ignore
 
     REQUEST_TIMEOUT: int = 10
+    REQUEST_RETRIES: int = 3
+    REQUEST_BACKOFF_SECONDS: float = 0.5
+    REQUEST_BACKOFF_MAX_SECONDS: float = 30.0
+    HTTP_POOL_SIZE: int = 10
 
     RATES_FILE_PATH: str = "data/rates.json"
     HISTORY_FILE_PATH: str = "data/exchange_rates.json"
@@ -28,5 +33,29 @@ class ParserConfig:
             self.CRYPTO_ID_MAP = {"BTC": "bitcoin", "ETH": "ethereum", "SOL": "solana"}
         # подтянем пути из SettingsLoader, если есть
         s = SettingsLoader()
+        self.FIAT_CURRENCIES = _codes(s.get("PARSER_FIAT_CURRENCIES", self.FIAT_CURRENCIES))
+        self.CRYPTO_CURRENCIES = _codes(s.get("PARSER_CRYPTO_CURRENCIES", self.CRYPTO_CURRENCIES))
+        extra_ids = s.get("PARSER_CRYPTO_ID_MAP", {}) or {}
+        self.CRYPTO_ID_MAP = {
+            **self.CRYPTO_ID_MAP,
+            **{str(k).upper(): str(v) for k, v in extra_ids.items()},
+        }
         self.RATES_FILE_PATH = str(s.get("RATES_FILE", self.RATES_FILE_PATH))
         self.HISTORY_FILE_PATH = str(s.get("HISTORY_FILE", self.HISTORY_FILE_PATH))
+        self.REQUEST_RETRIES = int(s.get("PARSER_REQUEST_RETRIES", self.REQUEST_RETRIES))
+        self.REQUEST_BACKOFF_SECONDS = float(
+            s.get("PARSER_BACKOFF_SECONDS", self.REQUEST_BACKOFF_SECONDS)
+        )
+        self.REQUEST_BACKOFF_MAX_SECONDS = float(
+            s.get("PARSER_BACKOFF_MAX_SECONDS", self.REQUEST_BACKOFF_MAX_SECONDS)
+        )
+
+    def wanted_pairs(self) -> list[str]:
+        """Пары "<CODE>_<BASE>", которые должен покрыть опрос источников."""
+        codes = dict.fromkeys((*self.FIAT_CURRENCIES, *self.CRYPTO_CURRENCIES))
+        return [f"{c}_{self.BASE_CURRENCY}" for c in codes if c != self.BASE_CURRENCY]
+
+
+def _codes(value: Any) -> tuple[str, ...]:
+    return tuple(str(c).strip().upper() for c in value if str(c).strip())
+
@@ -0,0 +1,285 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
+from datetime import datetime, timezone
+from typing import Any
+
+from valutatrade_hub.core.utils import parse_iso_dt
+from valutatrade_hub.infra.backends.json_files import atomic_write_json, read_json
+from valutatrade_hub.infra.settings import SettingsLoader
+
+_INDEX_FILE = "index.json"
+_SEGMENT_PREFIX = "history-"
+_SEGMENT_SUFFIX = ".jsonl"
+_SEGMENT_TIME = "%Y%m%dT%H%M%SZ"
+
+
+class HistoryStore:
+    """
+    История курсов в виде сегментов JSON Lines, разбитых по времени.
+
+    - запись дописывается в конец сегмента, в который попадает её timestamp:
+      стоимость append — O(размер пачки), а не O(всей истории)
+    - index.json — маленький индекс сегментов (начало, число записей, первый/последний ts,
+      размер файла); индекс пишется после сегмента, поэтому при открытии он сверяется
+      с размерами сегментов и достраивается по их хвостам
+    - дедупликация по id: множество id читается только для нужного сегмента
+      и держится в небольшом LRU-кеше
+    - при первом запуске история из бэкенда (legacy_records) однократно импортируется
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_seconds: int = 86400,
+        legacy_records: Callable[[], Iterable[dict[str, Any]]] | None = None,
+        cached_segments: int = 4,
+    ) -> None:
+        self.directory = directory
+        self.segment_seconds = max(1, int(segment_seconds))
+        self.legacy_records = legacy_records
+        self.cached_segments = max(1, int(cached_segments))
+        self._lock = threading.Lock()
+        self._index: dict[str, dict[str, Any]] | None = None
+        # сегмент → (размер файла при чтении, множество id)
+        self._ids: OrderedDict[str, tuple[int, set[str]]] = OrderedDict()
+
+    # ---- сегменты ----
+    def _segment_start(self, ts: str) -> int:
+        epoch = int(parse_iso_dt(ts).timestamp())
+        return epoch - epoch % self.segment_seconds
+
+    def _segment_name(self, start: int) -> str:
+        # timezone.utc, а не datetime.UTC: пакет поддерживает Python 3.10
+        stamp = datetime.fromtimestamp(start, tz=timezone.utc).strftime(_SEGMENT_TIME)  # noqa: UP017
+        return f"{_SEGMENT_PREFIX}{stamp}{_SEGMENT_SUFFIX}"
+
+    @staticmethod
+    def _name_start(name: str) -> int:
+        stamp = name[len(_SEGMENT_PREFIX) : -len(_SEGMENT_SUFFIX)]
+        start = datetime.strptime(stamp, _SEGMENT_TIME).replace(tzinfo=timezone.utc)  # noqa: UP017
+        return int(start.timestamp())
+
+    def _segment_path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load_index(self) -> dict[str, dict[str, Any]]:
+        if self._index is None:
+            index_path = self._segment_path(_INDEX_FILE)
+            if not os.path.exists(index_path):
+                os.makedirs(self.directory, exist_ok=True)
+                # прерванный импорт: уже записанные сегменты подхватываются,
+                # дубликаты по id отсекаются
+                self._index = {}
+                self._recover_index()
+                self._import_legacy()
+                atomic_write_json(index_path, self._index)
+            else:
+                self._index = dict(read_json(index_path, default={}))
+                if self._recover_index():
+                    atomic_write_json(index_path, self._index)
+        return self._index
+
+    def _import_legacy(self) -> None:
+        if self.legacy_records is None:
+            return
+        # старая история может быть большой: записи читаются потоком
+        self._append_locked(self.legacy_records())
+
+    def _recover_index(self) -> bool:
+        """
+        Сверить индекс с сегментами: процесс мог упасть между дозаписью сегмента
+        и записью index.json. Сегменты, выросшие после индекса, дочитываются с известного
+        размера, незнакомые или укоротившиеся — целиком. True — индекс изменился.
+        """
+        assert self._index is not None
+        changed = False
+        for name in sorted(os.listdir(self.directory)):
+            if not (name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX)):
+                continue
+            size = os.path.getsize(self._segment_path(name))
+            meta = self._index.get(name)
+            known = int(meta.get("bytes", -1)) if meta else -1
+            if known == size:
+                continue
+            if meta is None or known < 0 or known > size:
+                meta = {
+                    "start": self._name_start(name),
+                    "count": 0,
+                    "first_ts": None,
+                    "last_ts": None,
+                }
+                known = 0
+            count, stamps, end = _scan_segment(self._segment_path(name), known)
+            meta["count"] += count
+            if stamps:
+                meta["first_ts"] = min([s for s in (meta["first_ts"], *stamps) if s], key=_ts_key)
+                meta["last_ts"] = max([s for s in (meta["last_ts"], *stamps) if s], key=_ts_key)
+            meta["bytes"] = end
+            self._index[name] = meta
+            changed = True
+        return changed
+
+    def _segment_ids(self, name: str) -> set[str]:
+        path = self._segment_path(name)
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        cached = self._ids.get(name)
+        if cached is not None and cached[0] == size:
+            self._ids.move_to_end(name)
+            return cached[1]
+
+        ids: set[str] = set()
+        if size:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        ids.add(json.loads(line).get("id"))
+        self._ids[name] = (size, ids)
+        self._ids.move_to_end(name)
+        while len(self._ids) > self.cached_segments:
+            self._ids.popitem(last=False)
+        return ids
+
+    # ---- запись ----
+    def append(self, records: Iterable[dict[str, Any]]) -> int:
+        """Дописать новые записи (дубликаты по id пропускаются). Возвращает число записанных."""
+        with self._lock:
+            self._load_index()
+            written = self._append_locked(list(records))
+            if written:
+                atomic_write_json(self._segment_path(_INDEX_FILE), self._index)
+            return written
+
+    def _append_locked(self, records: Iterable[dict[str, Any]]) -> int:
+        assert self._index is not None
+        by_segment: dict[str, list[dict[str, Any]]] = {}
+        starts: dict[str, int] = {}
+        for rec in records:
+            start = self._segment_start(rec["timestamp"])
+            name = self._segment_name(start)
+            starts[name] = start
+            by_segment.setdefault(name, []).append(rec)
+
+        written = 0
+        for name, recs in by_segment.items():
+            ids = self._segment_ids(name)
+            fresh: list[dict[str, Any]] = []
+            for rec in recs:
+                if rec.get("id") not in ids:
+                    ids.add(rec.get("id"))
+                    fresh.append(rec)
+            if not fresh:
+                continue
+
+            payload = "".join(
+                json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in fresh
+            ).encode("utf-8")
+            path = self._segment_path(name)
+            with open(path, "ab") as f:
+                f.write(payload)
+            self._ids[name] = (os.path.getsize(path), ids)
+
+            meta = self._index.setdefault(
+                name, {"start": starts[name], "count": 0, "first_ts": None, "last_ts": None}
+            )
+            meta["bytes"] = self._ids[name][0]
+            meta["count"] += len(fresh)
+            stamps = [r["timestamp"] for r in fresh]
+            meta["first_ts"] = min([s for s in (meta["first_ts"], *stamps) if s], key=_ts_key)
+            meta["last_ts"] = max([s for s in (meta["last_ts"], *stamps) if s], key=_ts_key)
+            written += len(fresh)
+        return written
+
+    # ---- чтение ----
+    def segments(self) -> list[str]:
+        with self._lock:
+            index = self._load_index()
+            return sorted(index, key=lambda n: index[n]["start"])
+
+    def iter_records(
+        self, since: str | None = None, until: str | None = None
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Записи в порядке сегментов (внутри сегмента — в порядке записи).
+        since/until (ISO) отсекают целые сегменты по индексу и записи по timestamp.
+        """
+        since_dt = parse_iso_dt(since) if since else None
+        until_dt = parse_iso_dt(until) if until else None
+        with self._lock:
+            index = dict(self._load_index())
+        for name in sorted(index, key=lambda n: index[n]["start"]):
+            meta = index[name]
+            if since_dt and meta["last_ts"] and parse_iso_dt(meta["last_ts"]) < since_dt:
+                continue
+            if until_dt and meta["first_ts"] and parse_iso_dt(meta["first_ts"]) > until_dt:
+                continue
+            path = self._segment_path(name)
+            if not os.path.exists(path):
+                continue
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    rec = json.loads(line)
+                    if since_dt or until_dt:
+                        ts = parse_iso_dt(rec["timestamp"])
+                        if (since_dt and ts < since_dt) or (until_dt and ts > until_dt):
+                            continue
+                    yield rec
+
+
+def _ts_key(ts: str) -> datetime:
+    return parse_iso_dt(ts)
+
+
+def _scan_segment(path: str, offset: int) -> tuple[int, list[str], int]:
+    """
+    Записи сегмента после offset: (число записей, их timestamp, конец последней целой строки).
+    Оборванная последняя строка (падение посреди записи) отрезается.
+    """
+    count, stamps, end = 0, [], offset
+    with open(path, "rb+") as f:
+        f.seek(offset)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            end += len(line)
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            count += 1
+            if rec.get("timestamp"):
+                stamps.append(rec["timestamp"])
+        f.truncate(end)
+    return count, stamps, end
+
+
+_stores: dict[str, HistoryStore] = {}
+_stores_lock = threading.Lock()
+
+
+def history_store() -> HistoryStore:
+    """
+    Общий для процесса HistoryStore из настроек (HISTORY_DIR, HISTORY_SEGMENT_SECONDS).
+    Однократный импорт берёт старую историю из бэкенда хранилища (HISTORY_FILE или таблица sqlite).
+    """
+    settings = SettingsLoader()
+    directory = str(settings.get("HISTORY_DIR", "data/history"))
+    with _stores_lock:
+        store = _stores.get(directory)
+        if store is None:
+            from valutatrade_hub.infra.database import DatabaseManager
+
+            store = _stores[directory] = HistoryStore(
+                directory=directory,
+                segment_seconds=int(settings.get("HISTORY_SEGMENT_SECONDS", 86400)),
+                legacy_records=DatabaseManager().backend.iter_history,
+            )
+        return store
@@ -0,0 +1,177 @@
+"""
+Реестр источников курсов и планирование запросов.
+
+Источник — подкласс BaseApiClient с атрибутом name. Откуда берутся классы:
+- встроенные (CoinGecko, ExchangeRate-API)
+- entry points группы "valutatrade.providers" установленных пакетов
+- строки "package.module:ClassName" прямо в PARSER_PROVIDERS
+"""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import math
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from valutatrade_hub.infra.settings import SettingsLoader
+from valutatrade_hub.parser_service.api_clients import (
+    BaseApiClient,
+    CoinGeckoClient,
+    ExchangeRateApiClient,
+)
+from valutatrade_hub.parser_service.config import ParserConfig
+
+ENTRY_POINT_GROUP = "valutatrade.providers"
+DEFAULT_PROVIDERS = [CoinGeckoClient.name, ExchangeRateApiClient.name]
+# что можно переопределить в PARSER_PROVIDER_LIMITS
+_LIMIT_FIELDS = {"batch_size": int, "request_cost": float, "rate_limit_per_minute": float}
+
+_PROVIDERS: dict[str, type[BaseApiClient]] = {
+    CoinGeckoClient.name: CoinGeckoClient,
+    ExchangeRateApiClient.name: ExchangeRateApiClient,
+}
+_entry_points_loaded = False
+
+logger = logging.getLogger("valutatrade.parser")
+
+
+def register_provider(cls: type[BaseApiClient], name: str | None = None) -> type[BaseApiClient]:
+    """Зарегистрировать класс источника (можно как декоратор)."""
+    key = name or cls.name
+    if not key:
+        raise ValueError(f"У источника {cls.__qualname__} не задано имя (name)")
+    _PROVIDERS[key] = cls
+    return cls
+
+
+def _load_entry_points() -> None:
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    from importlib.metadata import entry_points
+
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        try:
+            cls = ep.load()
+        except Exception as e:  # noqa: BLE001 - сломанный плагин не должен ронять обновление
+            logger.error("Provider plugin %s failed to load: %s", ep.value, e)
+            continue
+        register_provider(cls, cls.name or ep.name)
+
+
+def _import_class(path: str) -> type[BaseApiClient]:
+    module_name, _, attr = path.partition(":")
+    cls = getattr(importlib.import_module(module_name), attr)
+    if not (isinstance(cls, type) and issubclass(cls, BaseApiClient)):
+        raise ValueError(f"{path} не является подклассом BaseApiClient")
+    return cls
+
+
+def provider_class(name: str) -> type[BaseApiClient]:
+    return _resolve(name)[1]
+
+
+def _resolve(name: str) -> tuple[str, type[BaseApiClient]]:
+    """(ключ реестра, класс): ключ — имя источника в плане, логах и настройках."""
+    if ":" in name:
+        cls = _import_class(name)
+        key = cls.name or name
+        register_provider(cls, key)
+        return key, cls
+    if name not in _PROVIDERS:
+        _load_entry_points()
+    cls = _PROVIDERS.get(name)
+    if cls is None:
+        known = ", ".join(sorted(_PROVIDERS))
+        raise ValueError(f"Неизвестный источник курсов '{name}'. Доступны: {known}")
+    return name, cls
+
+
+def available_providers() -> list[str]:
+    _load_entry_points()
+    return sorted(_PROVIDERS)
+
+
+def create_clients(
+    config: ParserConfig, settings: SettingsLoader | None = None
+) -> list[tuple[str, BaseApiClient]]:
+    """Клиенты из PARSER_PROVIDERS в заданном порядке, с лимитами из PARSER_PROVIDER_LIMITS."""
+    settings = settings or SettingsLoader()
+    names = settings.get("PARSER_PROVIDERS", DEFAULT_PROVIDERS) or DEFAULT_PROVIDERS
+    limits: dict[str, Any] = settings.get("PARSER_PROVIDER_LIMITS", {}) or {}
+
+    clients: list[tuple[str, BaseApiClient]] = []
+    for entry in names:
+        # имя — ключ реестра: плагин из entry point может быть зарегистрирован
+        # под именем точки входа, а не под cls.name
+        name, cls = _resolve(str(entry))
+        client = cls(config)  # type: ignore[call-arg]
+        if client.name != name:
+            client.name = name
+        for key, value in (limits.get(name) or {}).items():
+            if key not in _LIMIT_FIELDS:
+                raise ValueError(f"PARSER_PROVIDER_LIMITS.{name}: неизвестный параметр '{key}'")
+            setattr(client, key, _LIMIT_FIELDS[key](value))
+        clients.append((name, client))
+    return clients
+
+
+@dataclass
+class RequestPlan:
+    # имя источника → пачки пар по запросу; None — источник опрашивается целиком (fetch_rates)
+    batches: dict[str, list[list[str]] | None] = field(default_factory=dict)
+    # пары, которые не умеет отдавать ни один источник
+    uncovered: list[str] = field(default_factory=list)
+
+    @property
+    def requests(self) -> int:
+        return sum(len(b) for b in self.batches.values() if b is not None)
+
+
+def plan_requests(wanted: Iterable[str], clients: list[tuple[str, BaseApiClient]]) -> RequestPlan:
+    """
+    Распределить нужные пары по источникам так, чтобы запросов (с учётом их цены)
+    было как можно меньше.
+
+    Жадное покрытие множества: на каждом шаге берётся источник с наибольшим
+    числом новых пар на единицу стоимости (ceil(пар / batch_size) * request_cost),
+    при равенстве — стоящий раньше в списке. Пара достаётся ровно одному источнику.
+    Источники без supported_pairs() в планировании не участвуют и опрашиваются целиком.
+    """
+    plan = RequestPlan()
+    remaining = list(dict.fromkeys(wanted))
+    supported: dict[str, set[str]] = {}
+    for name, client in clients:
+        pairs = set(client.supported_pairs())
+        if pairs:
+            supported[name] = pairs
+        else:
+            plan.batches[name] = None
+
+    by_name = dict(clients)
+    while remaining and supported:
+        best: tuple[float, str, list[str]] | None = None
+        for name, pairs in supported.items():
+            cover = [p for p in remaining if p in pairs]
+            if not cover:
+                continue
+            client = by_name[name]
+            size = client.batch_size if client.batch_size > 0 else len(cover)
+            cost = math.ceil(len(cover) / size) * max(client.request_cost, 1e-9)
+            score = len(cover) / cost
+            if best is None or score > best[0]:
+                best = (score, name, cover)
+        if best is None:
+            break
+        _, name, cover = best
+        plan.batches[name] = by_name[name].batches(cover)
+        del supported[name]
+        taken = set(cover)
+        remaining = [p for p in remaining if p not in taken]
+
+    plan.uncovered = remaining
+    return plan
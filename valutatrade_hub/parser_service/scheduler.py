@@ -1,21 +1,171 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import random
+import signal
+import threading
 import time
+from dataclasses import dataclass
+from typing import Any
 
 from valutatrade_hub.infra.settings import SettingsLoader
 from valutatrade_hub.parser_service.updater import RatesUpdater
 
 
+@dataclass
+class _SourceState:
+    name: str
+    interval: float
+    # «якорь» расписания без jitter: сдвигается ровно на interval, поэтому период не плывёт
+    anchor: float
+    next_due: float
+    failures: int = 0
+
+
 class ParserScheduler:
+    """
+    Планировщик обновления курсов.
+
+    - фиксированный темп: время следующего запуска считается от расписания,
+      а не от окончания обновления, пропущенные тики не догоняются
+    - у каждого источника свой интервал (PARSER_SOURCE_INTERVALS)
+    - jitter: случайный сдвиг до PARSER_JITTER_RATIO * interval
+    - неудачный источник опрашивается реже: interval * 2^failures,
+      но не реже PARSER_MAX_BACKOFF_SECONDS
+    - остановка: stop(), SIGTERM/SIGINT в run_forever или отмена задачи в run_async
+    """
+
     def __init__(self, updater: RatesUpdater) -> None:
         self.updater = updater
         self.logger = logging.getLogger("valutatrade.parser")
         self.settings = SettingsLoader()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+        default_interval = float(self.settings.get("PARSER_UPDATE_INTERVAL_SECONDS", 300))
+        per_source: dict[str, Any] = self.settings.get("PARSER_SOURCE_INTERVALS", {}) or {}
+        self.jitter_ratio = float(self.settings.get("PARSER_JITTER_RATIO", 0.1))
+        self.max_backoff = float(self.settings.get("PARSER_MAX_BACKOFF_SECONDS", 3600))
+
+        now = time.monotonic()
+        self._sources = [
+            _SourceState(
+                name=name,
+                interval=float(per_source.get(name, default_interval)),
+                anchor=now,
+                next_due=now,
+            )
+            for name in updater.source_names()
+        ]
+
+    # ---- расписание ----
+    def _jitter(self, interval: float) -> float:
+        return random.uniform(0, self.jitter_ratio * interval) if self.jitter_ratio > 0 else 0.0
+
+    def _reschedule(self, state: _SourceState, failed: bool, now: float) -> None:
+        if failed:
+            state.failures += 1
+            delay = min(self.max_backoff, state.interval * 2**state.failures)
+            self.logger.warning(
+                "Source %s failed %d time(s) in a row, next try in %.0fs",
+                state.name,
+                state.failures,
+                delay,
+            )
+            # после backoff возвращаемся на обычную сетку от этой точки
+            state.anchor = now + delay
+            state.next_due = state.anchor + self._jitter(state.interval)
+            return
+
+        state.failures = 0
+        state.anchor += state.interval
+        if state.anchor <= now:
+            # обновление заняло дольше интервала — пропускаем тики, а не стреляем очередью
+            missed = int((now - state.anchor) // state.interval) + 1
+            state.anchor += missed * state.interval
+        state.next_due = state.anchor + self._jitter(state.interval)
+
+    def seconds_until_next(self) -> float:
+        if not self._sources:
+            return float(self.settings.get("PARSER_UPDATE_INTERVAL_SECONDS", 300))
+        return max(0.0, min(s.next_due for s in self._sources) - time.monotonic())
+
+    def tick(self) -> dict[str, Any] | None:
+        """Опросить источники, срок которых подошёл. None — если таких нет."""
+        now = time.monotonic()
+        due = [s for s in self._sources if s.next_due <= now]
+        if not due:
+            return None
+        try:
+            result = self.updater.run_update(only=[s.name for s in due])
+        except Exception:
+            # иначе next_due остаётся в прошлом и цикл крутится без пауз
+            done = time.monotonic()
+            for s in due:
+                self._reschedule(s, True, done)
+            raise
+        failed = set(result.get("failed_sources") or [])
+        done = time.monotonic()
+        for s in due:
+            self._reschedule(s, s.name in failed, done)
+        return result
+
+    # ---- запуск ----
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception:  # noqa: BLE001 - планировщик не должен падать из-за одного тика
+                self.logger.exception("Scheduler tick failed")
+            self._stop.wait(self.seconds_until_next())
+        self.logger.info("Scheduler stopped")
 
     def run_forever(self) -> None:
-        interval = int(self.settings.get("PARSER_UPDATE_INTERVAL_SECONDS", 300))
-        self.logger.info("Scheduler started. Interval=%ds", interval)
-        while True:
-            self.updater.run_update()
-            time.sleep(interval)
+        """Блокирующий цикл. В главном потоке SIGTERM/SIGINT завершают его штатно."""
+        sources = {s.name: s.interval for s in self._sources}
+        self.logger.info("Scheduler started. Sources=%s", sources)
+        self._stop.clear()
+        previous: dict[int, Any] = {}
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                previous[sig] = signal.signal(sig, lambda *_: self._stop.set())
+        try:
+            self._loop()
+        finally:
+            for sig, handler in previous.items():
+                signal.signal(sig, handler)
+
+    def start(self) -> threading.Thread:
+        """Запустить в фоновом потоке внутри долгоживущего процесса."""
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._stop.clear()
+        sources = {s.name: s.interval for s in self._sources}
+        self.logger.info("Scheduler started in background. Sources=%s", sources)
+        self._thread = threading.Thread(target=self._loop, name="parser-scheduler", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    async def run_async(self) -> None:
+        """Вариант для asyncio: сетевые запросы идут в пуле потоков, цикл событий не блокируется."""
+        self._stop.clear()
+        try:
+            while not self._stop.is_set():
+                try:
+                    await asyncio.to_thread(self.tick)
+                except Exception:  # noqa: BLE001
+                    self.logger.exception("Scheduler tick failed")
+                # ждём событие остановки, а не sleep: stop() прерывает ожидание сразу
+                await asyncio.to_thread(self._stop.wait, self.seconds_until_next())
+        finally:
+            self.logger.info("Scheduler stopped")
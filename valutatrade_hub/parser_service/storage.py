@@ -4,6 +4,11 @@ from datetime import datetime, timezone
 from typing import Any
 
 from valutatrade_hub.infra.database import DatabaseManager
+from valutatrade_hub.infra.rates_cache import RateEntry, RatesCache, parse_entry
+from valutatrade_hub.infra.settings import SettingsLoader
+from valutatrade_hub.parser_service.aggregates import CandleAggregator
+from valutatrade_hub.parser_service.history import history_store
+from valutatrade_hub.parser_service.timeseries import TimeSeriesStore, to_epoch
 
 
 def utc_iso_z(dt: datetime) -> str:
@@ -14,36 +19,71 @@ def utc_iso_z(dt: datetime) -> str:
 class RatesStorage:
     def __init__(self) -> None:
         self.db = DatabaseManager()
+        settings = SettingsLoader()
+        self.history = history_store()
+
+        self.timeseries = TimeSeriesStore(str(settings.get("TIMESERIES_DIR", "data/timeseries")))
+        if not self.timeseries.imported:
+            # однократный импорт уже накопленной истории (включая старый HISTORY_FILE);
+            # маркер ставится после импорта, прерванный импорт повторится (дубликаты отсекаются)
+            self.timeseries.append_records(self.history.iter_records())
+            self.timeseries.mark_imported()
+        self.candles = CandleAggregator(
+            self.timeseries,
+            str(settings.get("CANDLES_DIR", "data/candles")),
+            max_series=int(settings.get("CANDLES_CACHE_SERIES", 64)),
+            max_candles=int(settings.get("CANDLES_CACHE_CANDLES", 5000)),
+        )
 
     def append_history_records(self, records: list[dict[str, Any]]) -> None:
-        history = self.db.load_history()
-        existing_ids = {r.get("id") for r in history}
-        for rec in records:
-            if rec.get("id") not in existing_ids:
-                history.append(rec)
-        self.db.save_history(history)
+        # дописываем только новые записи в текущий сегмент, без перезаписи всей истории
+        self.history.append(records)
+        self.timeseries.append_records(records)
+        # свечи пересчитываются только по новым точкам, закрытые берутся из кеша;
+        # точка старше закрытой свечи снова открывает её
+        since: dict[str, int] = {}
+        for r in records:
+            pair = f"{r['from_currency']}_{r['to_currency']}"
+            t = to_epoch(r["timestamp"])
+            since[pair] = min(t, since.get(pair, t))
+        self.candles.update_pairs(list(since), since=since)
 
-    def upsert_snapshot_pairs(self, pairs: dict[str, dict[str, Any]], last_refresh: str) -> None:
-        snap = self.db.load_rates()
-        snap_pairs = snap.get("pairs") or {}
+    def upsert_snapshot_pairs(self, pairs: dict[str, dict[str, Any]], last_refresh: str) -> bool:
+        """
+        Дифференциальное обновление снапшота: берётся разобранный снапшот из RatesCache
+        (без повторного чтения rates.json), в хранилище пишутся только пары,
+        у которых время обновления новее. Если таких нет — запись пропускается,
+        версия снапшота не меняется. Возвращает True, если что-то записано.
+        """
+        cache = RatesCache()
+        current = cache.snapshot()
+        changes: dict[str, RateEntry] = {}
+        # у пар одного обновления одинаковое updated_at — разбираем его один раз
+        times: dict[str, datetime | None] = {}
 
         for pair, entry in pairs.items():
             # entry: {"rate":..., "updated_at":..., "source":...}
-            new_time = entry.get("updated_at")
-            old_time = (snap_pairs.get(pair) or {}).get("updated_at")
-
-            if old_time is None:
-                snap_pairs[pair] = entry
+            old = current.pairs.get(pair)
+            if (
+                old is not None
+                and old.updated_at is not None
+                and entry.get("updated_at") == old.updated_at
+            ):
+                continue  # то же время обновления — пара не новее
+            new = parse_entry(entry, times)
+            if new is None:
                 continue
-            # сравнение ISO строк как datetime:
-            try:
-                old_dt = datetime.fromisoformat(old_time.replace("Z", "+00:00"))
-                new_dt = datetime.fromisoformat(new_time.replace("Z", "+00:00"))
-                if new_dt > old_dt:
-                    snap_pairs[pair] = entry
-            except Exception:
-                snap_pairs[pair] = entry
-
-        snap["pairs"] = snap_pairs
-        snap["last_refresh"] = last_refresh
-        self.db.save_rates(snap)
+            if old is None or old.updated_ts is None or new.updated_ts is None:
+                if new != old:
+                    changes[pair] = new
+            elif new.updated_ts > old.updated_ts:
+                changes[pair] = new
+
+        if not changes:
+            return False
+        merged = {**current.pairs, **changes}
+        raw = {"pairs": {k: e.to_json() for k, e in merged.items()}, "last_refresh": last_refresh}
+        self.db.save_rates(raw, changed=changes)
+        # читатели в этом процессе получат новый снапшот без повторного чтения файла
+        cache.apply(changes, last_refresh)
+        return True
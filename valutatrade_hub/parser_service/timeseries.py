@@ -0,0 +1,262 @@
+from __future__ import annotations
+
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+from valutatrade_hub.core.utils import parse_iso_dt
+from valutatrade_hub.infra.backends.json_files import iter_json_records
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy необязателен
+    np = None  # type: ignore[assignment]
+
+TimePoint = int | float | str | datetime
+
+
+def to_epoch(value: TimePoint) -> int:
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, str):
+        return int(parse_iso_dt(value).timestamp())
+    return int(value)
+
+
+class _Column:
+    """Бинарный файл фиксированного типа ("q" — int64, "d" — float64), отображённый в память."""
+
+    def __init__(self, path: str, typecode: str) -> None:
+        self.path = path
+        self.typecode = typecode
+        self._size = -1
+        self._view: Any = None
+        self._mmap: mmap.mmap | None = None
+
+    def view(self) -> Any:
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if size != self._size:
+            self._close()
+            self._size = size
+            if size == 0:
+                empty = array(self.typecode)
+                self._view = np.asarray(empty) if np is not None else memoryview(empty)
+            elif np is not None:
+                self._view = np.memmap(self.path, dtype=self.typecode, mode="r")
+            else:
+                with open(self.path, "rb") as f:
+                    self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._view = memoryview(self._mmap).cast(self.typecode)
+        return self._view
+
+    @property
+    def tmp_path(self) -> str:
+        return self.path + ".tmp"
+
+    def length(self) -> int:
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return size // array(self.typecode).itemsize
+
+    def truncate(self, length: int) -> None:
+        self._close()
+        with open(self.path, "r+b") as f:
+            f.truncate(length * array(self.typecode).itemsize)
+        self._size = -1
+
+    def append(self, values: array) -> None:
+        with open(self.path, "ab") as f:
+            values.tofile(f)
+
+    def write_tmp(self, values: array) -> None:
+        with open(self.tmp_path, "wb") as f:
+            values.tofile(f)
+
+    def commit_tmp(self) -> None:
+        self._close()
+        os.replace(self.tmp_path, self.path)
+        self._size = -1
+
+    def _close(self) -> None:
+        if isinstance(self._view, memoryview):
+            self._view.release()
+        self._view = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+
+class _Series:
+    """
+    Пара колонок одного ряда. Согласованность при падении:
+    - дозапись: сначала rate, потом ts; при открытии обе колонки обрезаются до меньшей
+    - слияние: обе колонки пишутся во .tmp, затем ставится маркер <PAIR>.merging
+      и .tmp по очереди заменяют колонки; при открытии с маркером замена доводится до конца,
+      без маркера недописанные .tmp удаляются
+    """
+
+    def __init__(self, directory: str, pair: str) -> None:
+        self.ts = _Column(os.path.join(directory, f"{pair}.ts"), "q")
+        self.rate = _Column(os.path.join(directory, f"{pair}.rate"), "d")
+        self.marker = os.path.join(directory, f"{pair}.merging")
+        self._recover()
+
+    def _recover(self) -> None:
+        columns = (self.rate, self.ts)
+        if os.path.exists(self.marker):
+            for col in columns:
+                if os.path.exists(col.tmp_path):
+                    col.commit_tmp()
+            os.remove(self.marker)
+        for col in columns:
+            if os.path.exists(col.tmp_path):
+                os.remove(col.tmp_path)
+        n = min(self.ts.length(), self.rate.length())
+        for col in columns:
+            size = n * array(col.typecode).itemsize
+            if os.path.exists(col.path) and os.path.getsize(col.path) != size:
+                col.truncate(n)
+
+    def append(self, points: list[tuple[int, float]]) -> None:
+        # ts пишется последним: точка видна читателям, только когда курс уже на диске
+        self.rate.append(array("d", (r for _, r in points)))
+        self.ts.append(array("q", (t for t, _ in points)))
+
+    def rewrite(self, points: list[tuple[int, float]]) -> None:
+        self.rate.write_tmp(array("d", (r for _, r in points)))
+        self.ts.write_tmp(array("q", (t for t, _ in points)))
+        with open(self.marker, "wb"):
+            pass
+        self.rate.commit_tmp()
+        self.ts.commit_tmp()
+        os.remove(self.marker)
+
+
+class TimeSeriesStore:
+    """
+    Ряды курсов по парам: для каждой пары два файла — <PAIR>.ts (int64, эпоха в секундах)
+    и <PAIR>.rate (float64), отсортированные по времени и отображённые в память
+    (numpy.memmap, а без numpy — mmap + memoryview).
+
+    Запросы (range / last_n / as_of) — бинарный поиск по времени без разбора JSON.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._imported_marker = os.path.join(directory, ".imported")
+        self._lock = threading.Lock()
+        self._series: dict[str, _Series] = {}
+
+    def _get(self, pair: str) -> _Series:
+        s = self._series.get(pair)
+        if s is None:
+            s = self._series[pair] = _Series(self.directory, pair)
+        return s
+
+    @property
+    def imported(self) -> bool:
+        """Однократный импорт истории завершён (прерванный повторяется при следующем запуске)."""
+        return os.path.exists(self._imported_marker)
+
+    def mark_imported(self) -> None:
+        with open(self._imported_marker, "wb"):
+            pass
+
+    def pairs(self) -> list[str]:
+        names = os.listdir(self.directory)
+        return sorted(name[: -len(".ts")] for name in names if name.endswith(".ts"))
+
+    # ---- запись ----
+    def append_records(self, records: Iterable[dict[str, Any]]) -> int:
+        """Записи истории (формат RatesUpdater) → точки рядов. Возвращает число новых точек."""
+        by_pair: dict[str, list[tuple[int, float]]] = {}
+        for rec in records:
+            pair = f"{rec['from_currency']}_{rec['to_currency']}"
+            by_pair.setdefault(pair, []).append((to_epoch(rec["timestamp"]), float(rec["rate"])))
+        added = 0
+        with self._lock:
+            for pair, points in by_pair.items():
+                added += self._append_points(pair, points)
+        return added
+
+    def _append_points(self, pair: str, points: list[tuple[int, float]]) -> int:
+        s = self._get(pair)
+        points.sort(key=lambda p: p[0])
+        ts_view = s.ts.view()
+        last = int(ts_view[-1]) if len(ts_view) else None
+        if last is not None:
+            # повтор последней точки (тот же опрос ещё раз) не должен вести к слиянию
+            points = [p for p in points if p[0] != last]
+            if not points:
+                return 0
+
+        if last is None or points[0][0] > last:
+            # обычный случай: новые точки позже всех существующих — просто дописываем
+            fresh = _unique(points)
+            s.append(fresh)
+            return len(fresh)
+
+        # точки из прошлого (импорт, поздние данные): сливаем и переписываем ряд
+        # курс пишется раньше ts: лишний хвост rate — точка, которую ещё дописывают
+        rate_view = s.rate.view()[: len(ts_view)]
+        existing = list(zip((int(t) for t in ts_view), (float(r) for r in rate_view), strict=True))
+        known = {t for t, _ in existing}
+        extra = [p for p in _unique(points) if p[0] not in known]
+        if not extra:
+            return 0
+        merged = sorted(existing + extra, key=lambda p: p[0])
+        s.rewrite(merged)
+        return len(extra)
+
+    def import_history_file(self, path: str) -> int:
+        """Однократный импорт из старого HISTORY_FILE (JSON-список записей)."""
+        return self.append_records(iter_json_records(path))
+
+    # ---- чтение ----
+    def _columns(self, pair: str) -> tuple[Any, Any]:
+        s = self._get(pair)
+        return s.ts.view(), s.rate.view()
+
+    def _slice(self, ts: Any, rates: Any, i: int, j: int) -> tuple[Any, Any]:
+        if np is not None:
+            return ts[i:j], rates[i:j]
+        return list(ts[i:j]), list(rates[i:j])
+
+    def range(self, pair: str, start: TimePoint, end: TimePoint) -> tuple[Any, Any]:
+        """Точки с start <= t <= end: (timestamps, rates)."""
+        ts, rates = self._columns(pair)
+        i = _search(ts, to_epoch(start), left=True)
+        j = _search(ts, to_epoch(end), left=False)
+        return self._slice(ts, rates, i, j)
+
+    def last_n(self, pair: str, n: int) -> tuple[Any, Any]:
+        ts, rates = self._columns(pair)
+        return self._slice(ts, rates, max(0, len(ts) - int(n)), len(ts))
+
+    def as_of(self, pair: str, moment: TimePoint) -> tuple[int, float] | None:
+        """Последняя точка с t <= moment."""
+        ts, rates = self._columns(pair)
+        j = _search(ts, to_epoch(moment), left=False)
+        if j == 0:
+            return None
+        return int(ts[j - 1]), float(rates[j - 1])
+
+
+def _search(ts: Any, value: int, left: bool) -> int:
+    if np is not None:
+        return int(np.searchsorted(ts, value, side="left" if left else "right"))
+    return bisect_left(ts, value) if left else bisect_right(ts, value)
+
+
+def _unique(points: list[tuple[int, float]]) -> list[tuple[int, float]]:
+    # одна точка на секунду: при совпадении времени остаётся первая
+    out: list[tuple[int, float]] = []
+    for t, r in points:
+        if not out or out[-1][0] != t:
+            out.append((t, r))
+    return out
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from valutatrade_hub.core.exceptions import ApiRequestError
+from valutatrade_hub.parser_service.config import ParserConfig
+
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class _CachedResponse:
+    etag: str | None
+    last_modified: str | None
+    data: Any
+
+
+class HttpTransport:
+    """
+    Общий HTTP-транспорт для API-клиентов.
+
+    - один requests.Session с пулом keep-alive соединений
+    - повторы при сетевых ошибках и 429/5xx: экспоненциальная задержка с jitter,
+      для 429/503 учитывается заголовок Retry-After
+    - условные запросы: ETag / Last-Modified запоминаются, и на 304
+      возвращается прошлый ответ без повторного скачивания
+    """
+
+    _default: HttpTransport | None = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, config: ParserConfig) -> None:
+        self.config = config
+        self.logger = logging.getLogger("valutatrade.parser")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=config.HTTP_POOL_SIZE, pool_maxsize=config.HTTP_POOL_SIZE
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._cache: dict[tuple[str, tuple[tuple[str, str], ...]], _CachedResponse] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls, config: ParserConfig) -> HttpTransport:
+        """Транспорт, общий для всех клиентов процесса."""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls(config)
+            return cls._default
+
+    def _backoff(self, attempt: int) -> float:
+        # "full jitter": равномерно в [0, min(cap, base * 2^attempt)]
+        ceiling = min(
+            self.config.REQUEST_BACKOFF_MAX_SECONDS,
+            self.config.REQUEST_BACKOFF_SECONDS * 2**attempt,
+        )
+        return random.uniform(0, ceiling)
+
+    def _retry_after(self, response: requests.Response) -> float | None:
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return max(0.0, min(seconds, self.config.REQUEST_BACKOFF_MAX_SECONDS))
+
+    def get_json(self, url: str, source: str, params: dict[str, Any] | None = None) -> Any:
+        key = (url, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+        with self._lock:
+            cached = self._cache.get(key)
+
+        headers: dict[str, str] = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+
+        attempts = max(1, int(self.config.REQUEST_RETRIES) + 1)
+        for attempt in range(attempts):
+            last_try = attempt == attempts - 1
+            try:
+                r = self.session.get(
+                    url, params=params, headers=headers, timeout=self.config.REQUEST_TIMEOUT
+                )
+            except requests.exceptions.RequestException as e:
+                if last_try:
+                    raise ApiRequestError(f"{source} network error: {e}") from e
+                delay = self._backoff(attempt)
+                self.logger.warning("%s network error (%s), retry in %.2fs", source, e, delay)
+                time.sleep(delay)
+                continue
+
+            if r.status_code == 304 and cached is not None:
+                self.logger.info("%s not modified (304)", source)
+                return cached.data
+
+            if r.status_code in _RETRY_STATUSES and not last_try:
+                delay = self._retry_after(r) if r.status_code in (429, 503) else None
+                if delay is None:
+                    delay = self._backoff(attempt)
+                self.logger.warning(
+                    "%s status_code=%d, retry in %.2fs", source, r.status_code, delay
+                )
+                time.sleep(delay)
+                continue
+
+            if r.status_code != 200:
+                raise ApiRequestError(f"{source} status_code={r.status_code}")
+            try:
+                data = r.json()
+            except ValueError as e:
+                raise ApiRequestError(f"{source} invalid JSON: {e}") from e
+
+            etag = r.headers.get("ETag")
+            last_modified = r.headers.get("Last-Modified")
+            if etag or last_modified:
+                with self._lock:
+                    self._cache[key] = _CachedResponse(
+                        etag=etag, last_modified=last_modified, data=data
+                    )
+            return data
+
+        raise ApiRequestError(f"{source}: retries exhausted")  # pragma: no cover
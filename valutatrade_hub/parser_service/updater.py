@@ -2,23 +2,137 @@ from __future__ import annotations
 
 import logging
 import time
+from collections.abc import Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 from typing import Any
 
 from valutatrade_hub.core.exceptions import ApiRequestError
+from valutatrade_hub.infra.settings import SettingsLoader
 from valutatrade_hub.parser_service.api_clients import BaseApiClient
+from valutatrade_hub.parser_service.providers import plan_requests
 from valutatrade_hub.parser_service.storage import RatesStorage, utc_iso_z
 
+# пачки пар по запросам; None — опросить источник целиком
+Batches = list[list[str]] | None
+
 
 class RatesUpdater:
-    def __init__(self, clients: list[tuple[str, BaseApiClient]], storage: RatesStorage) -> None:
+    """
+    Опрос всех клиентов и запись результата в снапшот и историю.
+
+    concurrent=True: все клиенты опрашиваются одновременно (пул потоков),
+    результаты объединяются по мере готовности, а источники, не успевшие
+    за PARSER_UPDATE_DEADLINE_SECONDS, считаются неудачными.
+
+    wanted_pairs: нужные пары распределяются по источникам заранее (plan_requests),
+    каждый источник запрашивает только свои пары пачками по batch_size.
+    Без wanted_pairs каждый источник отдаёт всё, что умеет.
+    """
+
+    def __init__(
+        self,
+        clients: list[tuple[str, BaseApiClient]],
+        storage: RatesStorage,
+        concurrent: bool = True,
+        deadline_seconds: float | None = None,
+        wanted_pairs: Iterable[str] | None = None,
+    ) -> None:
         self.clients = clients
+        self.wanted_pairs = list(wanted_pairs) if wanted_pairs is not None else None
         self.storage = storage
+        self.concurrent = concurrent
+        if deadline_seconds is None:
+            deadline_seconds = float(SettingsLoader().get("PARSER_UPDATE_DEADLINE_SECONDS", 30))
+        self.deadline_seconds = deadline_seconds
         self.logger = logging.getLogger("valutatrade.parser")
 
-    def run_update(self) -> dict[str, Any]:
+    def _fetch(
+        self, name: str, client: BaseApiClient, batches: Batches
+    ) -> tuple[dict[str, float], int]:
+        self.logger.info("Fetching from %s...", name)
+        t0 = time.time()
+        rates = client.fetch_rates() if batches is None else client.fetch_batches(batches)
+        ms = int((time.time() - t0) * 1000)
+        self.logger.info("OK from %s (%d rates) in %dms", name, len(rates), ms)
+        return rates, ms
+
+    def _fetch_all(
+        self, clients: list[tuple[str, BaseApiClient, Batches]]
+    ) -> list[tuple[int, str, dict[str, float] | None, int, str | None]]:
+        """
+        Возвращает (priority, name, rates | None, request_ms, error) для каждого клиента.
+        priority — позиция клиента в списке: при совпадении пар побеждает более поздний,
+        как и при последовательном опросе.
+        """
+        results: list[tuple[int, str, dict[str, float] | None, int, str | None]] = []
+
+        if not self.concurrent or len(clients) <= 1:
+            for prio, (name, client, batches) in enumerate(clients):
+                try:
+                    rates, ms = self._fetch(name, client, batches)
+                    results.append((prio, name, rates, ms, None))
+                except Exception as e:  # noqa: BLE001
+                    results.append((prio, name, None, 0, _describe_error(name, e)))
+            return results
+
+        deadline = time.monotonic() + self.deadline_seconds
+        pool = ThreadPoolExecutor(max_workers=len(clients), thread_name_prefix="rates-fetch")
+        pending: dict[Future[tuple[dict[str, float], int]], tuple[int, str]] = {
+            pool.submit(self._fetch, name, client, batches): (prio, name)
+            for prio, (name, client, batches) in enumerate(clients)
+        }
+        try:
+            while pending:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    prio, name = pending.pop(fut)
+                    try:
+                        rates, ms = fut.result()
+                        results.append((prio, name, rates, ms, None))
+                    except Exception as e:  # noqa: BLE001
+                        results.append((prio, name, None, 0, _describe_error(name, e)))
+            for fut, (prio, name) in pending.items():
+                fut.cancel()
+                msg = f"Failed to fetch from {name}: deadline {self.deadline_seconds:g}s exceeded"
+                results.append((prio, name, None, 0, msg))
+        finally:
+            # зависшие запросы не держат цикл обновления
+            pool.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    def source_names(self) -> list[str]:
+        return [name for name, _ in self.clients]
+
+    def _planned(
+        self, clients: list[tuple[str, BaseApiClient]], only: set[str] | None
+    ) -> list[tuple[str, BaseApiClient, Batches]]:
+        if self.wanted_pairs is None:
+            return [(n, c, None) for n, c in clients]
+        plan = plan_requests(self.wanted_pairs, clients)
+        if plan.uncovered and only is None:
+            self.logger.warning(
+                "No source for %d pair(s): %s", len(plan.uncovered), ", ".join(plan.uncovered)
+            )
+        self.logger.info("Planned %d request(s) to %d source(s)", plan.requests, len(plan.batches))
+        # порядок клиентов сохраняется: от него зависит приоритет при совпадении пар
+        return [(n, c, plan.batches[n]) for n, c in clients if n in plan.batches]
+
+    def run_update(self, only: Iterable[str] | None = None) -> dict[str, Any]:
+        """
+        only — имена источников, которые нужно опросить (по умолчанию все).
+        В результате failed_sources — источники, не вернувшие курсы.
+        """
         self.logger.info("Starting rates update...")
+        wanted = set(only) if only is not None else None
+        selected = [(n, c) for n, c in self.clients if wanted is None or n in wanted]
+        clients = self._planned(selected, wanted)
+        failed_sources: list[str] = []
         all_pairs: dict[str, dict[str, Any]] = {}
+        pair_priority: dict[str, int] = {}
         history_records: list[dict[str, Any]] = []
 
         now = datetime.now(tz=timezone.utc)
@@ -27,39 +141,32 @@ class RatesUpdater:
         errors: list[str] = []
         total_rates = 0
 
-        for name, client in self.clients:
-            self.logger.info("Fetching from %s...", name)
-            t0 = time.time()
-            try:
-                rates = client.fetch_rates()
-                ms = int((time.time() - t0) * 1000)
-                self.logger.info("OK (%d rates) in %dms", len(rates), ms)
-
-                # normalize into Core snapshot and history
-                for pair, rate in rates.items():
-                    all_pairs[pair] = {"rate": float(rate), "updated_at": ts, "source": name}
-                    from_cur, to_cur = pair.split("_", 1)
-                    history_records.append(
-                        {
-                            "id": f"{from_cur}_{to_cur}_{ts}",
-                            "from_currency": from_cur,
-                            "to_currency": to_cur,
-                            "rate": float(rate),
-                            "timestamp": ts,
-                            "source": name,
-                            "meta": {"request_ms": ms, "status_code": 200},
-                        }
-                    )
-                total_rates += len(rates)
-
-            except ApiRequestError as e:
-                msg = f"Failed to fetch from {name}: {e}"
-                errors.append(msg)
-                self.logger.error(msg)
-            except Exception as e:  # noqa: BLE001
-                msg = f"Failed to fetch from {name}: {type(e).__name__}: {e}"
+        for prio, name, rates, ms, error in self._fetch_all(clients):
+            if rates is None:
+                msg = error or f"Failed to fetch from {name}"
                 errors.append(msg)
+                failed_sources.append(name)
                 self.logger.error(msg)
+                continue
+
+            # normalize into Core snapshot and history
+            for pair, rate in rates.items():
+                if prio >= pair_priority.get(pair, -1):
+                    all_pairs[pair] = {"rate": float(rate), "updated_at": ts, "source": name}
+                    pair_priority[pair] = prio
+                from_cur, to_cur = pair.split("_", 1)
+                history_records.append(
+                    {
+                        "id": f"{from_cur}_{to_cur}_{ts}",
+                        "from_currency": from_cur,
+                        "to_currency": to_cur,
+                        "rate": float(rate),
+                        "timestamp": ts,
+                        "source": name,
+                        "meta": {"request_ms": ms, "status_code": 200},
+                    }
+                )
+            total_rates += len(rates)
 
         if history_records:
             self.logger.info("Writing %d history records...", len(history_records))
@@ -75,7 +182,26 @@ class RatesUpdater:
                 "updated": total_rates,
                 "last_refresh": ts,
                 "errors": errors,
+                "failed_sources": failed_sources,
             }
         if errors and total_rates == 0:
-            return {"status": "failed", "updated": 0, "last_refresh": ts, "errors": errors}
-        return {"status": "ok", "updated": total_rates, "last_refresh": ts, "errors": []}
+            return {
+                "status": "failed",
+                "updated": 0,
+                "last_refresh": ts,
+                "errors": errors,
+                "failed_sources": failed_sources,
+            }
+        return {
+            "status": "ok",
+            "updated": total_rates,
+            "last_refresh": ts,
+            "errors": [],
+            "failed_sources": [],
+        }
+
+
+def _describe_error(name: str, e: Exception) -> str:
+    if isinstance(e, ApiRequestError):
+        return f"Failed to fetch from {name}: {e}"
+    return f"Failed to fetch from {name}: {type(e).__name__}: {e}"
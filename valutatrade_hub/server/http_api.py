@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import select
+import signal
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Any
+from urllib.parse import parse_qsl, urlsplit
+
+from valutatrade_hub.core.exceptions import (
+    ApiRequestError,
+    ConcurrentModificationError,
+    CurrencyNotFoundError,
+    InsufficientFundsError,
+    UserAlreadyExistsError,
+)
+from valutatrade_hub.core.usecases import CoreService
+from valutatrade_hub.infra.settings import SettingsLoader
+from valutatrade_hub.logging_config import configure_logging
+
+# как часто простаивающее keep-alive соединение проверяет очередь новых соединений
+_IDLE_POLL_SECONDS = 0.05
+
+Params = dict[str, Any]
+Handler = Callable[[Params, str | None], dict[str, Any]]
+
+# порядок важен: подклассы раньше базовых классов
+_ERROR_STATUS: tuple[tuple[type[Exception], int], ...] = (
+    (PermissionError, 401),
+    (UserAlreadyExistsError, 409),
+    (ConcurrentModificationError, 409),
+    (InsufficientFundsError, 422),
+    (CurrencyNotFoundError, 400),
+    (ValueError, 400),
+    (ApiRequestError, 503),
+)
+
+
+class ApiApp:
+    """
+    Маршруты HTTP/JSON API поверх одного CoreService на процесс:
+    индекс пользователей, кеш курсов и матрица кросс-курсов остаются
+    тёплыми между запросами.
+
+    Авторизация — заголовок "Authorization: Bearer <token>", токен выдаёт /login;
+    сессии хранит CoreService.sessions (срок жизни, LRU, SESSIONS_FILE).
+    """
+
+    def __init__(self, core: CoreService | None = None) -> None:
+        self.core = core or CoreService()
+        self.logger = logging.getLogger("valutatrade.server")
+        self.routes: dict[tuple[str, str], Handler] = {
+            ("GET", "/health"): self.health,
+            ("POST", "/register"): self.register,
+            ("POST", "/login"): self.login,
+            ("POST", "/logout"): self.logout,
+            ("GET", "/portfolio"): self.portfolio,
+            ("POST", "/buy"): self.buy,
+            ("POST", "/sell"): self.sell,
+            ("GET", "/rate"): self.rate,
+        }
+
+    def handle(
+        self, method: str, path: str, params: Params, token: str | None
+    ) -> tuple[int, dict[str, Any]]:
+        route = self.routes.get((method, path))
+        if route is None:
+            return 404, {"error": f"Неизвестный метод {method} {path}"}
+        try:
+            return 200, route(params, token)
+        except Exception as e:  # noqa: BLE001 - любая ошибка превращается в JSON-ответ
+            status = next((code for exc, code in _ERROR_STATUS if isinstance(e, exc)), 500)
+            if status == 500:
+                self.logger.exception("Unhandled error in %s %s", method, path)
+            return status, {"error": str(e), "type": type(e).__name__}
+
+    # ---- маршруты ----
+    def health(self, params: Params, token: str | None) -> dict[str, Any]:
+        return {"status": "ok"}
+
+    def register(self, params: Params, token: str | None) -> dict[str, Any]:
+        username = _require(params, "username")
+        user_id = self.core.create_user(username=username, password=_require(params, "password"))
+        return {"user_id": user_id, "username": username}
+
+    def login(self, params: Params, token: str | None) -> dict[str, Any]:
+        token = self.core.open_session(_require(params, "username"), _require(params, "password"))
+        session = self.core.resolve_session(token)
+        return {"token": token, "user_id": session.user_id, "username": session.username}
+
+    def logout(self, params: Params, token: str | None) -> dict[str, Any]:
+        # без токена core.logout() завершил бы «текущую» сессию процесса
+        return {"logged_out": bool(token) and self.core.logout(token)}
+
+    def portfolio(self, params: Params, token: str | None) -> dict[str, Any]:
+        session = self.core.resolve_session(token)
+        return self.core.show_portfolio(str(params.get("base", "USD")).upper(), session=session)
+
+    def _trade(self, side: str, params: Params, token: str | None) -> dict[str, Any]:
+        session = self.core.resolve_session(token)
+        trade = self.core.buy if side == "buy" else self.core.sell
+        return trade(
+            user_id=session.user_id,
+            currency_code=str(_require(params, "currency")).upper(),
+            amount=_amount(_require(params, "amount")),
+            base_currency=str(params.get("base", "USD")).upper(),
+        )
+
+    def buy(self, params: Params, token: str | None) -> dict[str, Any]:
+        return self._trade("buy", params, token)
+
+    def sell(self, params: Params, token: str | None) -> dict[str, Any]:
+        return self._trade("sell", params, token)
+
+    def rate(self, params: Params, token: str | None) -> dict[str, Any]:
+        from_code = str(_require(params, "from")).upper()
+        to_code = str(_require(params, "to")).upper()
+        rate, updated_at, source = self.core.get_rate(from_code, to_code, allow_stale=True)
+        return {
+            "from": from_code,
+            "to": to_code,
+            "rate": rate,
+            "updated_at": updated_at,
+            "source": source,
+        }
+
+
+def _require(params: Params, key: str) -> Any:
+    value = params.get(key)
+    if value is None or value == "":
+        raise ValueError(f"Параметр '{key}' обязателен")
+    return value
+
+
+def _amount(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError("'amount' должен быть положительным числом") from None
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: клиент переиспользует соединение
+    # заголовки и тело уходят разными send(); без TCP_NODELAY ответ ждёт delayed ACK (~40 мс)
+    disable_nagle_algorithm = True
+    server: ApiServer
+
+    def _dispatch(self, method: str) -> None:
+        url = urlsplit(self.path)
+        params: Params = dict(parse_qsl(url.query))
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            # границу тела не знаем — соединение дальше не читается
+            self.close_connection = True
+            self._reply(400, {"error": "Некорректный заголовок Content-Length"})
+            return
+        if length:
+            try:
+                body = json.loads(self.rfile.read(length))
+            except ValueError:  # JSONDecodeError и UnicodeDecodeError
+                body = None
+            if not isinstance(body, dict):
+                self._reply(400, {"error": "Тело запроса должно быть JSON-объектом"})
+                return
+            params.update(body)
+
+        auth = self.headers.get("Authorization", "")
+        token = auth[len("Bearer "):].strip() if auth.startswith("Bearer ") else None
+        status, payload = self.server.app.handle(method, url.path.rstrip("/") or "/", params, token)
+        self._reply(status, payload)
+
+    def _reply(self, status: int, payload: dict[str, Any]) -> None:
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def handle(self) -> None:
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection and self._next_request_ready():
+            self.handle_one_request()
+
+    def _next_request_ready(self) -> bool:
+        """
+        Ждать следующий запрос keep-alive соединения. Поток отдаётся сразу,
+        если новые соединения ждут свободного потока, и по истечении keepalive.
+        """
+        # конвейерный запрос может уже лежать в буфере rfile
+        self.connection.settimeout(0)
+        try:
+            if self.rfile.peek(1):
+                return True
+        except OSError:
+            return False
+        finally:
+            self.connection.settimeout(self.timeout)
+        deadline = time.monotonic() + self.server.keepalive
+        while not self.server.has_waiting():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            timeout = min(remaining, _IDLE_POLL_SECONDS)
+            ready, _, _ = select.select([self.connection], [], [], timeout)
+            if ready:
+                return True
+        return False
+
+    def do_GET(self) -> None:  # noqa: N802 - имя задаёт BaseHTTPRequestHandler
+        self._dispatch("GET")
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._dispatch("POST")
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        logging.getLogger("valutatrade.server").debug("%s " + format, self.address_string(), *args)
+
+
+class ApiServer(HTTPServer):
+    """
+    HTTP-сервер с ограниченным пулом рабочих потоков (SERVER_WORKERS):
+    соединения обслуживаются параллельно, но не больше workers одновременно,
+    остальные ждут в очереди. Простаивающее keep-alive соединение
+    освобождает поток через SERVER_KEEPALIVE_SECONDS, а если в очереди
+    есть соединения — сразу: простой клиентов не занимает весь пул.
+    """
+
+    allow_reuse_address = True
+
+    def __init__(
+        self, address: tuple[str, int], app: ApiApp, workers: int, keepalive: float
+    ) -> None:
+        handler = type("RequestHandler", (_RequestHandler,), {"timeout": keepalive})
+        super().__init__(address, handler)
+        self.app = app
+        self.keepalive = keepalive
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="api-worker"
+        )
+        # соединения, принятые, но ещё не взятые рабочим потоком
+        self._waiting = 0
+        self._waiting_lock = threading.Lock()
+
+    def has_waiting(self) -> bool:
+        return self._waiting > 0
+
+    def process_request(self, request: Any, client_address: Any) -> None:
+        with self._waiting_lock:
+            self._waiting += 1
+        self._pool.submit(self._process, request, client_address)
+
+    def _process(self, request: Any, client_address: Any) -> None:
+        with self._waiting_lock:
+            self._waiting -= 1
+        try:
+            self.finish_request(request, client_address)
+        except Exception:  # noqa: BLE001
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def create_server(
+    host: str | None = None,
+    port: int | None = None,
+    workers: int | None = None,
+    app: ApiApp | None = None,
+) -> ApiServer:
+    settings = SettingsLoader()
+    host = host or str(settings.get("SERVER_HOST", "127.0.0.1"))
+    port = int(settings.get("SERVER_PORT", 8000)) if port is None else int(port)
+    return ApiServer(
+        (host, port),
+        app or ApiApp(),
+        workers=int(workers or settings.get("SERVER_WORKERS", 32)),
+        keepalive=float(settings.get("SERVER_KEEPALIVE_SECONDS", 15)),
+    )
+
+
+def run_server() -> None:
+    """Точка входа project-server: HTTP API до SIGTERM/Ctrl+C."""
+    parser = argparse.ArgumentParser(description="ValutaTrade Hub HTTP API")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    configure_logging()
+    logger = logging.getLogger("valutatrade.server")
+    server = create_server(args.host, args.port, args.workers)
+    # shutdown() ждёт выхода из serve_forever, поэтому вызываем его из другого потока
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    host, port = server.server_address[:2]
+    logger.info("API server listening on http://%s:%s", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info("API server stopped")
+
+
+if __name__ == "__main__":
+    run_server()
@@ -0,0 +1,135 @@
+"""
+Нагрузочный тест HTTP API на localhost.
+
+    python -m valutatrade_hub.server.loadtest --clients 16 --requests 200
+    python -m valutatrade_hub.server.loadtest --url http://127.0.0.1:8000 --scenario rate
+
+Без --url сервер поднимается в этом же процессе на свободном порту.
+Каждый клиент регистрирует собственного пользователя loadtest_<...>
+(в текущем хранилище!), входит и шлёт запросы по keep-alive соединению.
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from urllib.parse import urlsplit
+
+_SCENARIOS: dict[str, list[tuple[str, str, dict[str, Any] | None]]] = {
+    "rate": [("GET", "/rate?from=BTC&to=USD", None)],
+    "portfolio": [("GET", "/portfolio?base=USD", None)],
+    "mixed": [
+        ("GET", "/rate?from=BTC&to=USD", None),
+        ("GET", "/portfolio?base=USD", None),
+        ("POST", "/buy", {"currency": "EUR", "amount": 1}),
+        ("GET", "/rate?from=EUR&to=BTC", None),
+        ("POST", "/sell", {"currency": "EUR", "amount": 1}),
+    ],
+}
+
+
+class _Client:
+    def __init__(self, host: str, port: int) -> None:
+        self.conn = http.client.HTTPConnection(host, port, timeout=30)
+        self.token: str | None = None
+
+    def call(
+        self, method: str, path: str, body: dict[str, Any] | None = None
+    ) -> tuple[int, dict[str, Any]]:
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers["Authorization"] = f"Bearer {self.token}"
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        self.conn.request(method, path, body=data, headers=headers)
+        resp = self.conn.getresponse()
+        return resp.status, json.loads(resp.read() or b"{}")
+
+
+def _run_client(host: str, port: int, n: int, scenario: str, idx: int) -> tuple[list[float], int]:
+    client = _Client(host, port)
+    username = f"loadtest_{os.getpid()}_{int(time.time())}_{idx}"
+    client.call("POST", "/register", {"username": username, "password": "loadtest"})
+    status, payload = client.call("POST", "/login", {"username": username, "password": "loadtest"})
+    if status != 200:
+        raise RuntimeError(f"login failed: {payload}")
+    client.token = payload["token"]
+
+    steps = _SCENARIOS[scenario]
+    latencies: list[float] = []
+    errors = 0
+    for i in range(n):
+        method, path, body = steps[i % len(steps)]
+        t0 = time.perf_counter()
+        status, _ = client.call(method, path, body)
+        latencies.append(time.perf_counter() - t0)
+        if status >= 400:
+            errors += 1
+    client.conn.close()
+    return latencies, errors
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Нагрузочный тест ValutaTrade Hub HTTP API")
+    parser.add_argument(
+        "--url", default=None, help="адрес запущенного сервера; без него — встроенный"
+    )
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="запросов на клиента")
+    parser.add_argument("--scenario", choices=sorted(_SCENARIOS), default="mixed")
+    args = parser.parse_args()
+
+    server = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname or "127.0.0.1", url.port or 80
+    else:
+        from valutatrade_hub.server.http_api import create_server
+
+        server = create_server("127.0.0.1", 0, workers=max(args.clients, 1))
+        host, port = server.server_address[:2]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    try:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            futures = [
+                pool.submit(_run_client, host, port, args.requests, args.scenario, i)
+                for i in range(args.clients)
+            ]
+            results = [f.result() for f in futures]
+        elapsed = time.perf_counter() - t0
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    latencies = [x for lat, _ in results for x in lat]
+    errors = sum(e for _, e in results)
+    print(
+        f"scenario={args.scenario} clients={args.clients} "
+        f"requests={len(latencies)} errors={errors}"
+    )
+    print(f"elapsed={elapsed:.2f}s throughput={len(latencies) / elapsed:.0f} req/s")
+    print(
+        "latency ms: "
+        f"p50={_percentile(latencies, 50) * 1000:.2f} "
+        f"p95={_percentile(latencies, 95) * 1000:.2f} "
+        f"p99={_percentile(latencies, 99) * 1000:.2f}"
+    )
+
+
+if __name__ == "__main__":
+    main()